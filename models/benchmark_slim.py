@@ -0,0 +1,355 @@
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+import argparse
+import logging
+import json
+from multiprocessing import Pool
+
+#add '/models/' directory to search path to avoid import errors
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import slim as slim
+
+BENCHMARK_FORMAT_VERSION = 1
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DATA_FILE_SUFFIX = '_processed.csv'
+
+# settings for each problem type (same as make_submission.sh)
+PROBLEM_TYPES = {
+    'best': {'max_coef': 10, 'max_offset': 100, 'max_size': -1, 'c0_value': -1},
+    'max_5_features': {'max_coef': 10, 'max_offset': 100, 'max_size': 5, 'c0_value': -1},
+    'regularized': {'max_coef': 10, 'max_offset': 100, 'max_size': -1, 'c0_value': 0.01},
+}
+
+# metric name -> (change that counts as a regression, absolute tolerance)
+# 'increase' metrics regress when they grow by more than the relative and absolute tolerance
+# 'change' metrics describe the formulation and regress whenever they differ from the baseline
+BENCHMARK_METRICS = {
+    'build_time': ('increase', 1.0),
+    'peak_rss': ('increase', 16 * 1024 * 1024),
+    'mps_size': ('change', 0),
+    'n_variables': ('change', 0),
+    'n_constraints': ('change', 0),
+    'nonzeros': ('change', 0),
+    'first_incumbent_time': ('increase', 1.0),
+    'final_gap': ('increase', 1e-4),
+    'objective_value': ('increase', 1e-6),
+}
+
+
+# parse command line arguments
+def setup_parser():
+    """
+    Create an argparse Parser object for command line arguments to benchmark_slim.
+    This object determines all command line arguments, handles input
+    validation and default values.
+
+    See https://docs.python.org/3/library/argparse.html for configuration
+    """
+
+    def is_positive_integer(value):
+        parsed_value = int(value)
+        if parsed_value <= 0:
+            raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+        return parsed_value
+
+    def is_file_on_disk(file_name):
+        if not os.path.isfile(file_name):
+            raise argparse.ArgumentTypeError("the file %s does not exist!" % file_name)
+        else:
+            return file_name
+
+    def file_choices(choices, file_name):
+        ext = os.path.splitext(file_name)[1][1:]
+        if ext not in choices:
+            parser.error("file doesn't end with one of {}".format(choices))
+        return file_name
+
+    def is_file_of_type_on_disk(choices, file_name):
+        return is_file_on_disk(file_choices(choices, file_name))
+
+    parser = argparse.ArgumentParser(
+        prog='benchmark_slim',
+        description='Build and solve SLIM IPs for each dataset and problem type with a fixed time limit, and compare the results to a baseline',
+        epilog='Copyright (C) 2017 Berk Ustun',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--results_file',
+                        type=lambda s: file_choices("json", s),
+                        required=True,
+                        help='name of the file to save the benchmark results (must end in .json)')
+
+    parser.add_argument('--baseline',
+                        type=lambda s: is_file_of_type_on_disk("json", s),
+                        help='results file from an earlier run; runs that are worse than the baseline are reported as regressions')
+
+    parser.add_argument('--datasets',
+                        type=lambda s: s.split(','),
+                        help='comma-separated names of the datasets to run; defaults to every dataset in models/data')
+
+    parser.add_argument('--problem_types',
+                        type=lambda s: s.split(','),
+                        default=sorted(PROBLEM_TYPES.keys()),
+                        help='comma-separated names of the problem types to run (%s)' % ', '.join(sorted(PROBLEM_TYPES.keys())))
+
+    parser.add_argument('--timelimit',
+                        type=is_positive_integer,
+                        default=60,
+                        help='time limit on each solve (in seconds)')
+
+    parser.add_argument('--threads',
+                        type=is_positive_integer,
+                        default=1,
+                        help='number of threads used by CPLEX')
+
+    parser.add_argument('--random_seed',
+                        type=int,
+                        default=0,
+                        help='random seed used by CPLEX')
+
+    parser.add_argument('--solver_profile',
+                        choices=sorted(slim.SOLVER_PROFILES.keys()),
+                        default=slim.DEFAULT_SOLVER_PROFILE,
+                        help='CPLEX parameter profile used for every solve')
+
+    parser.add_argument('--group_constraints',
+                        choices=['none', 'sos1', 'linear'],
+                        default='none',
+                        help='restrict the levels of each one-hot encoded categorical feature to at most 1 non-zero coefficient, using SOS1 sets or linear constraints (compare formulations with --baseline)')
+
+    parser.add_argument('--tolerance',
+                        type=float,
+                        default=0.10,
+                        help='relative increase over the baseline that counts as a regression')
+
+    parser.add_argument('--log',
+                        type=str,
+                        help='name of the log file')
+
+    parser.add_argument('--silent',
+                        action='store_true',
+                        help='flag to suppress logging to stderr')
+
+    return parser
+
+
+# running benchmarks
+def get_benchmark_datasets(data_dir = DATA_DIR):
+    """
+    returns a dictionary mapping the name of each dataset in data_dir to its file
+    """
+    data_files = sorted(glob.glob(os.path.join(data_dir, '*' + DATA_FILE_SUFFIX)))
+    return {os.path.basename(f)[:-len(DATA_FILE_SUFFIX)]: f for f in data_files}
+
+
+def run_benchmark(job):
+    """
+    builds and solves one SLIM IP; runs in a fresh worker process so that peak_rss only covers this job
+    """
+    work_dir = tempfile.mkdtemp(prefix='slim_benchmark_')
+    try:
+        start_time = time.time()
+        data = slim.load_data_from_file(job['data_file'])
+        load_time = time.time() - start_time
+
+        slim_input = slim.get_slim_input(data, **PROBLEM_TYPES[job['problem_type']])
+        group_constraints = job.get('group_constraints', 'none')
+        if group_constraints != 'none':
+            groups = slim.get_one_hot_groups(data)
+            for group_name in sorted(groups.keys()):
+                slim_input['coef_constraints'].add_group(group_name, groups[group_name])
+            slim_input['group_constraint_type'] = group_constraints
+
+        progress_file = os.path.join(work_dir, 'progress.json')
+        slim_IP, slim_info, slim_summary = slim.train_slim(data,
+                                                           slim_input=slim_input,
+                                                           timelimit=job['timelimit'],
+                                                           threads=job['threads'],
+                                                           random_seed=job['random_seed'],
+                                                           solver_profile=job.get('solver_profile', slim.DEFAULT_SOLVER_PROFILE),
+                                                           progress_file=progress_file)
+
+        instance_file = os.path.join(work_dir, 'instance.mps')
+        slim_IP.write(instance_file)
+
+        return {
+            'dataset': job['dataset'],
+            'problem_type': job['problem_type'],
+            'group_constraints': group_constraints,
+            'N': data['X'].shape[0],
+            'P': data['X'].shape[1],
+            'load_time': load_time,
+            'build_time': slim_info['stage_times']['total_wall_time'],
+            'solve_time': slim_summary['total_elapsed_time'],
+            'peak_rss': slim.get_peak_rss(),
+            'mps_size': os.path.getsize(instance_file),
+            'n_variables': slim_IP.variables.get_num(),
+            'n_constraints': slim_IP.linear_constraints.get_num(),
+            'nonzeros': slim_IP.linear_constraints.get_num_nonzeros(),
+            'first_incumbent_time': slim_summary['first_incumbent_time'],
+            'root_bound': slim_summary['root_bound'],
+            'final_gap': slim_summary['optimality_gap'],
+            'objective_value': slim_summary['objective_value'],
+            'solution_status': slim_summary['solution_status'],
+            'nodes_processed': slim_summary['nodes_processed'],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_benchmarks(datasets, problem_types, timelimit = 60, threads = 1, random_seed = 0, solver_profile = slim.DEFAULT_SOLVER_PROFILE,
+                   group_constraints = 'none', logger = None):
+    """
+    runs run_benchmark for every dataset x problem type, one at a time and each in a new process
+
+    solver_profile is the name of a profile in slim.SOLVER_PROFILES or a dictionary of CPLEX parameters
+    group_constraints is 'none', 'sos1' or 'linear'; how to restrict the levels of one-hot encoded features (see slim.get_one_hot_groups)
+
+    Returns
+    -------
+    dictionary with the settings of the run ('meta') and a list with one entry per dataset x problem type ('results')
+    """
+    jobs = [{'dataset': dataset,
+             'data_file': data_file,
+             'problem_type': problem_type,
+             'timelimit': timelimit,
+             'threads': threads,
+             'random_seed': random_seed,
+             'solver_profile': solver_profile,
+             'group_constraints': group_constraints}
+            for dataset, data_file in sorted(datasets.items())
+            for problem_type in problem_types]
+
+    results = []
+    pool = Pool(processes=1, maxtasksperchild=1)
+    try:
+        for result in pool.imap(run_benchmark, jobs):
+            if logger is not None:
+                logger.info("%s_%s: build_time = %1.2fs, first_incumbent_time = %s, final_gap = %1.4f, status = %s" %
+                            (result['dataset'], result['problem_type'], result['build_time'],
+                             result['first_incumbent_time'], result['final_gap'], result['solution_status']))
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+
+    meta = {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+        'code_version': slim.get_code_version(extra_files=[os.path.abspath(__file__)]),
+        'timelimit': timelimit,
+        'threads': threads,
+        'random_seed': random_seed,
+        'solver_profile': solver_profile,
+        'group_constraints': group_constraints,
+    }
+    return {'meta': meta, 'results': results}
+
+
+# comparing to a baseline
+def diff_benchmarks(benchmark, baseline, tolerance = 0.10):
+    """
+    compares the results of two benchmark runs
+
+    Parameters
+    ----------
+    benchmark       output of run_benchmarks
+    baseline        output of run_benchmarks for an earlier version of the code
+    tolerance       relative increase that counts as a regression for 'increase' metrics (see BENCHMARK_METRICS)
+
+    Returns
+    -------
+    list of dictionaries, one for each metric that regressed (dataset, problem_type, metric, baseline, value)
+    """
+    baseline_results = {(r['dataset'], r['problem_type']): r for r in baseline['results']}
+    regressions = []
+
+    for result in benchmark['results']:
+        key = (result['dataset'], result['problem_type'])
+        if key not in baseline_results:
+            continue
+
+        base = baseline_results[key]
+        for metric, (direction, absolute_tolerance) in sorted(BENCHMARK_METRICS.items()):
+            value = result.get(metric)
+            base_value = base.get(metric)
+            if value is None and base_value is None:
+                continue
+
+            if value is None or base_value is None:
+                # e.g. no incumbent was found within the time limit
+                regressed = value is None
+            elif direction == 'change':
+                regressed = value != base_value
+            else:
+                regressed = value > base_value + max(tolerance * abs(base_value), absolute_tolerance)
+
+            if regressed:
+                regressions.append({'dataset': key[0],
+                                    'problem_type': key[1],
+                                    'metric': metric,
+                                    'baseline': base_value,
+                                    'value': value})
+
+    return regressions
+
+
+if __name__ == '__main__':
+
+    parser = setup_parser()
+    parsed = parser.parse_args()
+    parsed_dict = vars(parsed)
+    parsed_string = [key + ' : ' + str(parsed_dict[key]) + '\n' for key in parsed_dict]
+    parsed_string.sort()
+
+    # setup logging
+    logger = logging.getLogger()
+    logger = slim.setup_logging(logger, log_to_console=(not parsed.silent), log_file=parsed.log)
+    logger.setLevel(logging.INFO)
+    logger.info("running 'benchmark_slim.py'")
+    logger.info("current working directory: %r" % os.getcwd())
+    logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
+
+    # per-stage timings are recorded in the results; do not log them for every run
+    logging.getLogger(slim.STAGE_LOGGER_NAME).setLevel(logging.WARNING)
+
+    datasets = get_benchmark_datasets()
+    if parsed.datasets is not None:
+        unknown_datasets = [d for d in parsed.datasets if d not in datasets]
+        if len(unknown_datasets) > 0:
+            parser.error("unknown datasets: %s" % ', '.join(unknown_datasets))
+        datasets = {d: datasets[d] for d in parsed.datasets}
+
+    unknown_problem_types = [p for p in parsed.problem_types if p not in PROBLEM_TYPES]
+    if len(unknown_problem_types) > 0:
+        parser.error("unknown problem types: %s" % ', '.join(unknown_problem_types))
+
+    benchmark = run_benchmarks(datasets, parsed.problem_types,
+                               timelimit=parsed.timelimit,
+                               threads=parsed.threads,
+                               random_seed=parsed.random_seed,
+                               solver_profile=parsed.solver_profile,
+                               group_constraints=parsed.group_constraints,
+                               logger=logger)
+
+    with open(parsed.results_file, 'w') as fh:
+        json.dump(slim.to_json_compatible(benchmark), fh, indent=2, sort_keys=True)
+    logger.info("saved benchmark results to file: %s" % parsed.results_file)
+
+    exit_code = 0
+    if parsed.baseline is not None:
+        with open(parsed.baseline, 'r') as fh:
+            baseline = json.load(fh)
+
+        regressions = diff_benchmarks(benchmark, baseline, tolerance=parsed.tolerance)
+        for r in regressions:
+            logger.warning("regression in %s_%s: %s = %r (baseline = %r)" % (r['dataset'], r['problem_type'], r['metric'], r['value'], r['baseline']))
+        logger.info("found %d regressions compared to baseline: %s" % (len(regressions), parsed.baseline))
+        exit_code = 1 if len(regressions) > 0 else 0
+
+    logger.info("quitting")
+    sys.exit(exit_code)
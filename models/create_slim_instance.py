@@ -62,9 +62,13 @@ def setup_parser():
     )
 
     parser.add_argument('--data_file',
-                        type=lambda s: is_file_of_type_on_disk("csv", s),
+                        type=lambda s: is_file_of_type_on_disk(["csv", "npz", "parquet", "feather"], s),
                         required=True,
-                        help='csv file with training data')
+                        help='csv, npz, parquet or feather file with training data')
+
+    parser.add_argument('--feature_names',
+                        type=lambda s: s.split(','),
+                        help='comma-separated names of the features to use; only these columns are read from data_file')
 
     parser.add_argument('--instance_file',
                         type=lambda s: file_choices("mps", s),
@@ -95,6 +99,35 @@ def setup_parser():
                         default=-1,
                         help='l0 regularization parameter; set as a positive float > 0.00; or -1 for smallest value')
 
+    parser.add_argument('--coef_constraints_file',
+                        type=lambda s: is_file_of_type_on_disk("npz", s),
+                        help='npz file with coefficient constraints saved by CoefficientSet.save; overrides max_coef and max_offset')
+
+    parser.add_argument('--save_coef_constraints',
+                        type=lambda s: file_choices("npz", s),
+                        help='name of file to save the coefficient constraints of the instance (must end in .npz)')
+
+    parser.add_argument('--reduce_features',
+                        action='store_true',
+                        help='remove constant, duplicate and complementary columns before building the instance (models are still reported in terms of the original variables)')
+
+    parser.add_argument('--integer_loss',
+                        action='store_true',
+                        help='write the loss constraints with integer coefficients and rhs = 1 when the data and coefficients are integer (solve with default tolerances)')
+
+    parser.add_argument('--group_constraints',
+                        choices=['none', 'sos1', 'linear'],
+                        default='none',
+                        help='restrict the levels of each one-hot encoded categorical feature to at most 1 non-zero coefficient, using SOS1 sets or linear constraints')
+
+    parser.add_argument('--manifest',
+                        type=str,
+                        help='name of the manifest file that records how each instance was produced; defaults to manifest.json in the directory of instance_file')
+
+    parser.add_argument('--force',
+                        action='store_true',
+                        help='flag to rebuild the instance even if the manifest shows that it is up to date')
+
     parser.add_argument('--log',
                         type=str,
                         help='name of the log file')
@@ -106,69 +139,133 @@ def setup_parser():
     return parser
 
 # create instance
-def create_slim_instance(data_file, max_coef=10, c0_value=-1, max_size =-1, max_offset=-1, logger = None):
-
-    # load dataset from csv
-    data = slim.load_data_from_csv(data_file)
-    N, P = data['X'].shape
-
-    # set data-dependent parameters
-    max_size = P if max_size == -1 else min(max_size, P)
-    c0_value = 0.9 / (N * P) if c0_value == -1 else min(c0_value, 1.00)
-
-    # setup coefficient constraints
-    coef_constraints = slim.CoefficientSet(variable_names=data['variable_names'], ub=max_coef, lb=-max_coef)
-
-    if max_offset == -1:
-        # choose upper and lower bounds for the intercept coefficient
-        # to ensure that there will be no regularization due to the intercept, choose
-        #
-        # intercept_ub < min_i(min_score_i)
-        # intercept_lb > max_i(max_score_i)
-        #
-        # where min_score_i = min((Y*X) * \rho) for rho in \Lset
-        # where max_score_i = max((Y*X) * \rho) for rho in \Lset
-        #
-        # setting intercept_ub and intercept_lb in this way ensures that we can classify every point as positive and negative
-        scores_at_ub = (data['X'] * data['Y']) * coef_constraints.ub
-        scores_at_lb = (data['X'] * data['Y']) * coef_constraints.lb
-        non_intercept_ind = np.array([n != '(Intercept)' for n in data['variable_names']])
-        scores_at_ub = scores_at_ub[:, non_intercept_ind]
-        scores_at_lb = scores_at_lb[:, non_intercept_ind]
-        max_scores = np.fmax(scores_at_ub, scores_at_lb)
-        min_scores = np.fmin(scores_at_ub, scores_at_lb)
-        max_scores = np.sum(max_scores, 1)
-        min_scores = np.sum(min_scores, 1)
-        intercept_ub = -min(min_scores) + 1
-        intercept_lb = -max(max_scores) + 1
-    else:
-        intercept_ub = abs(max_offset)
-        intercept_lb = -abs(max_offset)
-
-    coef_constraints.set_field('ub', '(Intercept)', intercept_ub)
-    coef_constraints.set_field('lb', '(Intercept)', intercept_lb)
-    #coef_constraints.view()
-
-    #create SLIM IP
-    slim_input = {
-        'X': data['X'],
-        'X_names': data['variable_names'],
-        'Y': data['Y'],
-        'C_0': c0_value,
-        'w_pos': 1.0,
-        'w_neg': 1.0,
-        'L0_min': 0,
-        'L0_max': max_size,
-        'err_min': 0,
-        'err_max': 1.0,
-        'pos_err_min': 0,
-        'pos_err_max': 1.0,
-        'neg_err_min': 0,
-        'neg_err_max': 1.0,
-        'coef_constraints': coef_constraints
-    }
+def create_slim_instance(data_file, max_coef=10, c0_value=-1, max_size=-1, max_offset=-1, logger=None,
+                         feature_names=None, coef_constraints_file=None, save_coef_constraints=None, reduce_features=False,
+                         integer_loss=False, group_constraints='none', instance_file=None, instance_info=None,
+                         manifest=None, force=False):
+    """
+    builds a SLIM IP from the data in data_file; if instance_file is given, then we also save the IP as an MPS file
+    (and slim_info as a pickle in instance_info) and record the files in the manifest, unless the manifest shows
+    that they are up to date (see get_instance_fingerprint)
+
+    Parameters
+    ----------
+    data_file               csv, npz, parquet or feather file with training data
+    max_coef                value of upper and lower bounds for any coefficient
+    c0_value                l0 regularization parameter; set as -1 for smallest value
+    max_size                maximum number of non-zero coefficients; set as -1 for no limit
+    max_offset              value of upper and lower bound on offset parameter; set as -1 to use a conservative value
+    logger                  logging.Logger object
+    feature_names           names of the features to use; if None, then we use every column of data_file
+    coef_constraints_file   npz file with coefficient constraints saved by CoefficientSet.save (overrides max_coef and max_offset)
+    save_coef_constraints   name of a file to save the coefficient constraints of the instance
+    reduce_features         set to True to remove redundant columns before building the instance (see reduce_features)
+    integer_loss            set to True to write the loss constraints with integer coefficients when possible
+    group_constraints       'none', 'sos1' or 'linear'; how to restrict one-hot encoded features (see get_one_hot_groups)
+    instance_file           name of the MPS file to save the instance; if None, then nothing is saved or recorded
+    instance_info           name of the pickle file to save slim_info
+    manifest                name of the manifest file; defaults to manifest.json in the directory of instance_file
+    force                   set to True to rebuild the instance even if the manifest shows that it is up to date
+
+    Returns
+    -------
+    slim_IP                 cplex.Cplex object (None if the instance files were up to date)
+    slim_info               dictionary produced by create_slim_ip (None if the instance files were up to date)
+    """
+    log = logger.info if logger is not None else lambda msg: None
+
+    data = slim.load_data_from_file(data_file, feature_names=feature_names)
+
+    coef_constraints = None
+    if coef_constraints_file is not None:
+        coef_constraints = slim.CoefficientSet.load(coef_constraints_file)
+        log("loaded coefficient constraints from file: %s" % coef_constraints_file)
+
+    feature_map = None
+    if reduce_features:
+        # constant columns are only folded into the intercept if they fit within its bounds
+        intercept_bounds = slim.get_intercept_bounds(data, coef_constraints, max_coef=max_coef, max_offset=max_offset)
+        data, feature_map = slim.reduce_features(data, intercept_bounds=intercept_bounds)
+        for name in sorted(feature_map['dropped'].keys()):
+            reason, representative = feature_map['dropped'][name]
+            log("removed %s column %s (represented by %s)" % (reason, name, representative))
+        log("reduced data from %d to %d columns" % (len(feature_map['variable_names']), len(feature_map['kept_ind'])))
+        if coef_constraints is not None:
+            # drop the constraints of the removed columns
+            coef_constraints = coef_constraints.subset(data['variable_names'])
+
+    slim_input = slim.get_slim_input(data,
+                                     max_coef=max_coef,
+                                     max_size=max_size,
+                                     max_offset=max_offset,
+                                     c0_value=c0_value,
+                                     coef_constraints=coef_constraints,
+                                     integer_loss=integer_loss)
+    if feature_map is not None:
+        slim_input['feature_map'] = feature_map
+
+    if group_constraints != 'none':
+        # groups saved with the coefficient constraints take precedence over the groups found in the data
+        if len(slim_input['coef_constraints'].groups) == 0:
+            groups = slim.get_one_hot_groups(data)
+            for group_name in sorted(groups.keys()):
+                slim_input['coef_constraints'].add_group(group_name, groups[group_name])
+            log("added %d feature groups: %s" % (len(groups), ', '.join(sorted(groups.keys()))))
+        slim_input['group_constraint_type'] = group_constraints
+
+    if save_coef_constraints is not None:
+        slim_input['coef_constraints'].save(save_coef_constraints)
+        log("saved coefficient constraints to file: %s" % save_coef_constraints)
+
+    # fingerprint the instance before building it
+    if instance_file is not None:
+        if manifest is None:
+            manifest = os.path.join(os.path.dirname(os.path.abspath(instance_file)), 'manifest.json')
+
+        artifact_files = [instance_file]
+        if instance_info is not None:
+            artifact_files.append(instance_info)
+
+        data_hash = slim.get_file_hash(data_file)
+        code_version = slim.get_code_version(extra_files=[os.path.abspath(__file__)])
+        fingerprint = slim.get_instance_fingerprint(data_hash, slim_input, code_version)
+        log("instance fingerprint: %s" % fingerprint)
+
+        if not force and slim.is_instance_cached(manifest, artifact_files, fingerprint):
+            log("found up-to-date instance files in manifest: %s" % manifest)
+            log("skipping rebuild")
+            return None, None
+
+    # check the data once and reuse the summary in create_slim_ip (e.g. binary_data_flag) instead of scanning X again
+    slim_input['data_summary'] = slim.check_data(data, return_summary=True)
+    log("checked data: %d rows (%d duplicates), %d columns" %
+        (slim_input['data_summary']['N'], slim_input['data_summary']['n_duplicate_rows'], slim_input['data_summary']['P']))
 
     slim_IP, slim_info = slim.create_slim_ip(slim_input)
+    log("generated SLIM IP")
+    if integer_loss:
+        log("integer loss constraints: %s" % ('on' if slim_info['integer_loss_flag'] else 'off (data or coefficients are not integer)'))
+
+    if instance_file is None:
+        return slim_IP, slim_info
+
+    timer = slim.StageTimer('write')
+    with timer.stage('write_instance'):
+        slim_IP.write(instance_file)
+    log("saved SLIM IP to file: %s" % instance_file)
+
+    if instance_info is not None:
+        with timer.stage('write_instance_info'):
+            with open(instance_info, 'w') as fh:
+                pickle.dump(slim_info, fh)
+        log("saved SLIM IP information to file: %s" % instance_info)
+
+    slim.record_instance(manifest, artifact_files, fingerprint,
+                         data_file=data_file,
+                         data_hash=data_hash,
+                         slim_input=slim_input,
+                         code_version=code_version)
+    log("recorded instance files in manifest: %s" % manifest)
     return slim_IP, slim_info
 
 if __name__ == '__main__':
@@ -187,22 +284,22 @@ if __name__ == '__main__':
     logger.info("current working directory: %r" % os.getcwd())
     logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
 
-    slim_IP, slim_info = create_slim_instance(data_file=parsed.data_file,
-                                              max_coef=parsed.max_coef,
-                                              max_size=parsed.max_size,
-                                              max_offset=parsed.max_offset,
-                                              c0_value=parsed.c0_value,
-                                              logger=logger)
-    logger.info("generated SLIM IP")
-
-    slim_IP.write(parsed.instance_file)
-    logger.info("saved SLIM IP to file: %s" % parsed.instance_file)
-
-    if parsed.instance_info is not None:
-        with open(parsed.instance_info, 'w') as fh:
-            pickle.dump(slim_info, fh)
-        logger.info("saved SLIM IP information to file: %s" % parsed.instance_info)
+    create_slim_instance(parsed.data_file,
+                         max_coef=parsed.max_coef,
+                         c0_value=parsed.c0_value,
+                         max_size=parsed.max_size,
+                         max_offset=parsed.max_offset,
+                         logger=logger,
+                         feature_names=parsed.feature_names,
+                         coef_constraints_file=parsed.coef_constraints_file,
+                         save_coef_constraints=parsed.save_coef_constraints,
+                         reduce_features=parsed.reduce_features,
+                         integer_loss=parsed.integer_loss,
+                         group_constraints=parsed.group_constraints,
+                         instance_file=parsed.instance_file,
+                         instance_info=parsed.instance_info,
+                         manifest=parsed.manifest,
+                         force=parsed.force)
 
     logger.info("quitting")
     sys.exit(0)
-
@@ -0,0 +1,171 @@
+import os
+import sys
+import argparse
+import logging
+import json
+
+#add '/models/' directory to search path to avoid import errors
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import slim as slim
+
+# parse command line arguments
+def setup_parser():
+    """
+    Create an argparse Parser object for command line arguments to cross_validate_slim.
+    This object determines all command line arguments, handles input
+    validation and default values.
+
+    See https://docs.python.org/3/library/argparse.html for configuration
+    """
+
+    def is_positive_integer(value):
+        parsed_value = int(value)
+        if parsed_value <= 0:
+            raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+        return parsed_value
+
+    def is_positive_float_or_negative_one(value):
+        parsed_value = float(value)
+        if not (parsed_value == -1 or parsed_value > 0.0):
+            raise argparse.ArgumentTypeError("%s is an invalid value (must be -1 or > 0.00)" % value)
+        return parsed_value
+
+    def is_positive_integer_or_negative_one(value):
+        parsed_value = int(value)
+        if not (parsed_value == -1 or parsed_value >= 1):
+            raise argparse.ArgumentTypeError("%s is an invalid value (must be -1 or >=1)" % value)
+        else:
+            return parsed_value
+
+    def is_file_on_disk(file_name):
+        if not os.path.isfile(file_name):
+            raise argparse.ArgumentTypeError("the file %s does not exist!" % file_name)
+        else:
+            return file_name
+
+    def file_choices(choices, file_name):
+        ext = os.path.splitext(file_name)[1][1:]
+        if ext not in choices:
+            parser.error("file doesn't end with one of {}".format(choices))
+        return file_name
+
+    def is_file_of_type_on_disk(choices, file_name):
+        return is_file_on_disk(file_choices(choices, file_name))
+
+    parser = argparse.ArgumentParser(
+        prog='cross_validate_slim',
+        description='Run K-fold cross-validation for SLIM in parallel from the command shell',
+        epilog='Copyright (C) 2017 Berk Ustun',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--data_file',
+                        type=lambda s: is_file_of_type_on_disk("csv", s),
+                        required=True,
+                        help='csv file with training data')
+
+    parser.add_argument('--fold_file',
+                        type=lambda s: is_file_of_type_on_disk("csv", s),
+                        required=True,
+                        help='csv file with fold indices between 1 to K for each sample')
+
+    parser.add_argument('--results_file',
+                        type=lambda s: file_choices("json", s),
+                        required=True,
+                        help='name of results file (must end in .json)')
+
+    parser.add_argument('--max_size',
+                        type = is_positive_integer_or_negative_one,
+                        default=-1,
+                        help='maximum number of non-zero coefficients; set as -1 for no limit')
+
+    parser.add_argument('--max_coef',
+                        type=is_positive_integer,
+                        default=10,
+                        help='value of upper and lower bounds for any coefficient')
+
+    parser.add_argument('--max_offset',
+                        type=is_positive_integer_or_negative_one,
+                        default=-1,
+                        help='value of upper and lower bound on offset parameter; set as -1 to use a conservative value')
+
+    parser.add_argument('--c0_value',
+                        type=is_positive_float_or_negative_one,
+                        default=-1,
+                        help='l0 regularization parameter; set as a positive float > 0.00; or -1 for smallest value')
+
+    parser.add_argument('--integer_loss',
+                        action='store_true',
+                        help='use integer loss constraints (and default CPLEX tolerances) when the data and coefficients are integer')
+
+    parser.add_argument('--timelimit',
+                        type=is_positive_integer_or_negative_one,
+                        default=300,
+                        help='time limit on training each fold (in seconds); set as -1 for no time limit')
+
+    parser.add_argument('--n_workers',
+                        type=is_positive_integer,
+                        help='number of worker processes; defaults to the number of CPUs')
+
+    parser.add_argument('--threads',
+                        type=is_positive_integer,
+                        default=1,
+                        help='number of CPLEX threads used by each worker')
+
+    parser.add_argument('--log',
+                        type=str,
+                        help='name of the log file')
+
+    parser.add_argument('--silent',
+                        action='store_true',
+                        help='flag to suppress logging to stderr')
+
+    return parser
+
+if __name__ == '__main__':
+
+    parser = setup_parser()
+    parsed = parser.parse_args()
+    parsed_dict = vars(parsed)
+    parsed_string = [key + ' : ' + str(parsed_dict[key]) + '\n' for key in parsed_dict]
+    parsed_string.sort()
+
+    # setup logging
+    logger = logging.getLogger()
+    logger = slim.setup_logging(logger, log_to_console=(not parsed.silent), log_file=parsed.log)
+    logger.setLevel(logging.INFO)
+    logger.info("running 'cross_validate_slim.py'")
+    logger.info("current working directory: %r" % os.getcwd())
+    logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
+
+    data = slim.load_data_from_csv(parsed.data_file)
+    fold_idx = slim.load_folds_from_csv(parsed.fold_file, data['X'].shape[0])
+    logger.info("loaded data with %d samples and %d folds" % (data['X'].shape[0], max(fold_idx)))
+
+    slim_settings = {
+        'max_coef': parsed.max_coef,
+        'max_size': parsed.max_size,
+        'max_offset': parsed.max_offset,
+        'c0_value': parsed.c0_value,
+        'integer_loss': parsed.integer_loss,
+    }
+
+    results = slim.run_cross_validation(data, fold_idx,
+                                        slim_settings=slim_settings,
+                                        timelimit=parsed.timelimit,
+                                        n_workers=parsed.n_workers,
+                                        threads=parsed.threads)
+
+    for fold_results in results:
+        logger.info("fold %d: train_error = %1.4f, test_error = %1.4f, status = %s" %
+                    (fold_results['fold_num'],
+                     fold_results['error_rate'],
+                     float(fold_results.get('test_false_positives', float('nan')) + fold_results.get('test_false_negatives', float('nan'))) / max(fold_results['n_test'], 1),
+                     fold_results['solution_status']))
+
+    with open(parsed.results_file, 'w') as fh:
+        json.dump(slim.to_json_compatible(results), fh, indent=2)
+    logger.info("saved cross-validation results to file: %s" % parsed.results_file)
+
+    logger.info("quitting")
+    sys.exit(0)
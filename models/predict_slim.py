@@ -0,0 +1,422 @@
+import os
+import sys
+import re
+import time
+import argparse
+import logging
+from io import BytesIO
+from multiprocessing import Pool, cpu_count
+
+#add '/models/' directory to search path to avoid import errors
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import slim as slim
+
+DEFAULT_CHUNK_SIZE = 100000
+PROGRESS_LOG_INTERVAL = 10.0
+CSV_BLOCK_SIZE = 65536
+
+# state of each worker process (set by _initialize_worker)
+_worker = {}
+
+
+# parse command line arguments
+def setup_parser():
+    """
+    Create an argparse Parser object for command line arguments to predict_slim.
+    This object determines all command line arguments, handles input
+    validation and default values.
+
+    See https://docs.python.org/3/library/argparse.html for configuration
+    """
+
+    def is_positive_integer(value):
+        parsed_value = int(value)
+        if parsed_value <= 0:
+            raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+        return parsed_value
+
+    def is_file_on_disk(file_name):
+        if not os.path.isfile(file_name):
+            raise argparse.ArgumentTypeError("the file %s does not exist!" % file_name)
+        else:
+            return file_name
+
+    def file_choices(choices, file_name):
+        ext = os.path.splitext(file_name)[1][1:]
+        if ext not in choices:
+            parser.error("file doesn't end with one of {}".format(choices))
+        return file_name
+
+    def is_file_of_type_on_disk(choices, file_name):
+        return is_file_on_disk(file_choices(choices, file_name))
+
+    parser = argparse.ArgumentParser(
+        prog='predict_slim',
+        description='Apply a SLIM scoring system to a large data file in chunks across multiple processes',
+        epilog='Copyright (C) 2017 Berk Ustun',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--scorer_file',
+                        type=lambda s: is_file_of_type_on_disk("json", s),
+                        required=True,
+                        help='scorer produced by solve_slim_instance.py --scorer_file (or slim.export_scorer)')
+
+    parser.add_argument('--data_file',
+                        type=lambda s: is_file_of_type_on_disk(["csv", "npz", "parquet", "feather"], s),
+                        required=True,
+                        help='csv, npz, parquet or feather file with one row per point; only the columns used by the scorer are read')
+
+    parser.add_argument('--output_file',
+                        type=lambda s: file_choices("csv", s),
+                        required=True,
+                        help='name of the csv file to save the scores and predictions (in the same order as the rows of data_file)')
+
+    parser.add_argument('--id_column',
+                        type=str,
+                        help='name of a column in data_file to copy to the output file')
+
+    parser.add_argument('--chunk_size',
+                        type=is_positive_integer,
+                        default=DEFAULT_CHUNK_SIZE,
+                        help='number of rows scored at a time (approximate for csv files; parquet and feather files are scored by row group and record batch)')
+
+    parser.add_argument('--n_workers',
+                        type=is_positive_integer,
+                        default=cpu_count(),
+                        help='number of worker processes')
+
+    parser.add_argument('--log',
+                        type=str,
+                        help='name of the log file')
+
+    parser.add_argument('--silent',
+                        action='store_true',
+                        help='flag to suppress logging to stderr')
+
+    return parser
+
+
+# reading chunks
+def get_file_type(data_file):
+    return os.path.splitext(data_file)[1][1:].lower()
+
+
+def get_column_names(data_file, file_type):
+    """
+    returns the names of the columns in data_file without reading the data
+    """
+    if file_type == 'csv':
+        import pandas as pd
+        return list(pd.read_csv(data_file, sep=',', nrows=0).columns.values)
+
+    if file_type == 'npz':
+        import numpy as np
+        with np.load(data_file) as npz:
+            return [str(n) for n in npz[slim.NPZ_COLUMNS_KEY]]
+
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(data_file).names)
+
+    import pyarrow.ipc as ipc
+    return list(ipc.open_file(data_file).schema.names)
+
+
+def get_line_terminator(data_file):
+    """
+    returns the line terminator of a csv file ('\\r\\n', '\\n' or '\\r') from the end of its header
+    """
+    with open(data_file, 'rb') as fh:
+        while True:
+            block = fh.read(CSV_BLOCK_SIZE)
+            if not block:
+                return '\n'
+            match = re.search(b'\r\n|\n|\r', block)
+            if match is not None:
+                if match.group() == b'\r' and match.end() == len(block) and fh.read(1) == b'\n':
+                    return '\r\n'
+                return match.group().decode('ascii')
+
+
+def find_line_end(fh, position, line_terminator):
+    """
+    returns the position after the first line_terminator at or after position (or the end of the file)
+    """
+    fh.seek(position)
+    buffer = b''
+    while True:
+        block = fh.read(CSV_BLOCK_SIZE)
+        if not block:
+            return fh.tell()
+        buffer += block
+        ind = buffer.find(line_terminator)
+        if ind >= 0:
+            return position + ind + len(line_terminator)
+        # keep the last bytes in case the terminator is split between blocks
+        n_keep = len(line_terminator) - 1
+        position += len(buffer) - n_keep
+        buffer = buffer[len(buffer) - n_keep:]
+
+
+def get_csv_chunks(data_file, chunk_size, line_terminator):
+    """
+    splits the rows of a csv file into byte ranges of about chunk_size rows, so that each worker can parse its own chunk
+    (assumes that fields do not contain line breaks)
+    """
+    line_terminator = line_terminator.encode('ascii')
+    with open(data_file, 'rb') as fh:
+        file_size = os.fstat(fh.fileno()).st_size
+        start = find_line_end(fh, 0, line_terminator)
+
+        # estimate the number of bytes per row from the first rows
+        end = start
+        sample_rows = 0
+        while sample_rows < 1000 and end < file_size:
+            end = find_line_end(fh, end, line_terminator)
+            sample_rows += 1
+        bytes_per_row = float(end - start) / max(sample_rows, 1)
+        chunk_bytes = max(int(bytes_per_row * chunk_size), 1)
+
+        chunks = []
+        while start < file_size:
+            end = find_line_end(fh, min(start + chunk_bytes, file_size), line_terminator)
+            chunks.append((start, end))
+            start = end
+
+    return chunks
+
+
+def get_npz_column(data_file, name):
+    """
+    returns a column of an npz file as a read-only memory map, so that chunks of rows can be read without loading the column
+    (columns saved with np.savez are stored uncompressed); compressed columns (np.savez_compressed) are loaded whole
+    """
+    import struct
+    import zipfile
+    import numpy as np
+    from numpy.lib import format as npy_format
+
+    with zipfile.ZipFile(data_file) as zf:
+        info = zf.getinfo(name + '.npy')
+
+    if info.compress_type == zipfile.ZIP_STORED:
+        with open(data_file, 'rb') as fh:
+            # the data of a member starts after its local header (30 bytes, then the file name and extra field)
+            fh.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', fh.read(4))
+            fh.seek(info.header_offset + 30 + name_length + extra_length)
+            version = npy_format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran_order, dtype = npy_format.read_array_header_1_0(fh)
+            else:
+                shape, fortran_order, dtype = npy_format.read_array_header_2_0(fh)
+            offset = fh.tell()
+
+        if not dtype.hasobject and np.prod(shape) > 0:
+            return np.memmap(data_file, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
+
+    with np.load(data_file) as npz:
+        return npz[name]
+
+
+def open_feather_file(data_file):
+    """
+    returns a reader for the record batches of a feather (Arrow IPC) file; the file is memory-mapped,
+    so each batch is only read when it is used
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    return ipc.open_file(pa.memory_map(data_file, 'r'))
+
+
+def get_row_chunks(data_file, file_type, chunk_size, line_terminator = None):
+    """
+    returns the chunks of rows in data_file that are scored by each job
+    - csv:      byte ranges (see get_csv_chunks; line_terminator is from get_line_terminator)
+    - parquet:  row groups
+    - feather:  record batches
+    - npz:      (start, end) row ranges
+    """
+    if file_type == 'csv':
+        return get_csv_chunks(data_file, chunk_size, line_terminator)
+
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+        return list(range(pq.ParquetFile(data_file).num_row_groups))
+
+    if file_type == 'feather':
+        return list(range(open_feather_file(data_file).num_record_batches))
+
+    # count the rows from the shape of one column
+    first_column = get_column_names(data_file, file_type)[0]
+    n_rows = len(get_npz_column(data_file, first_column))
+    return [(start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+
+
+def _initialize_worker(scorer_file, data_file, file_type, line_terminator, column_names, read_names, id_column):
+    _worker['scorer'] = slim.load_scorer(scorer_file)
+    _worker['data_file'] = data_file
+    _worker['file_type'] = file_type
+    _worker['line_terminator'] = line_terminator
+    _worker['column_names'] = column_names
+    _worker['read_names'] = read_names
+    _worker['id_column'] = id_column
+    _worker['reader'] = None
+
+
+def _read_chunk(chunk):
+    """
+    returns a pandas.DataFrame with the columns in read_names for the rows in chunk,
+    and the number of rows in the chunk of data_file
+    """
+    import numpy as np
+    import pandas as pd
+    data_file = _worker['data_file']
+    file_type = _worker['file_type']
+    read_names = _worker['read_names']
+
+    if file_type == 'csv':
+        start, end = chunk
+        with open(data_file, 'rb') as fh:
+            fh.seek(start)
+            buffer = fh.read(end - start)
+
+        # the C parser only takes a single character as lineterminator (its default handles '\r\n')
+        line_terminator = _worker['line_terminator']
+        n_rows = len([line for line in buffer.split(line_terminator.encode('ascii')) if line.strip()])
+        df = pd.read_csv(BytesIO(buffer), sep=',', header=None, names=_worker['column_names'], usecols=read_names,
+                         lineterminator=None if line_terminator == '\r\n' else line_terminator)
+        return df, n_rows
+
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+        row_group = pq.ParquetFile(data_file).read_row_group(chunk, columns=read_names)
+        return row_group.to_pandas(), row_group.num_rows
+
+    # npz columns and feather batches are memory-mapped once per worker; each chunk only reads its own rows
+    if file_type == 'feather':
+        if _worker['reader'] is None:
+            _worker['reader'] = open_feather_file(data_file)
+        batch = _worker['reader'].get_batch(chunk)
+        df = pd.DataFrame({n: batch.column(batch.schema.get_field_index(n)).to_pandas() for n in read_names}, columns=read_names)
+        return df, batch.num_rows
+
+    if _worker['reader'] is None:
+        _worker['reader'] = {n: get_npz_column(data_file, n) for n in read_names}
+    start, end = chunk
+    df = pd.DataFrame({n: np.array(_worker['reader'][n][start:end]) for n in read_names}, columns=read_names)
+    return df, end - start
+
+
+def _score_chunk(chunk):
+    """
+    scores one chunk and returns (number of rows in the chunk, number of rows scored, csv text with the output rows)
+    """
+    import numpy as np
+    import pandas as pd
+    scorer = _worker['scorer']
+    id_column = _worker['id_column']
+    df, n_rows = _read_chunk(chunk)
+
+    if len(_worker['read_names']) == 0:
+        # intercept-only scorer without id_column: no columns are read, so df has no rows
+        scores = np.full(n_rows, scorer.intercept)
+    else:
+        # score binary columns with the bit-packed kernel (get_packed_data returns X unchanged otherwise)
+        X = slim.get_packed_data({'X': df[scorer.feature_names].values})['X']
+        scores = scorer.score(X, column_names=scorer.feature_names)
+
+    output = pd.DataFrame({'score': scores, 'prediction': (scores > 0) * 2 - 1}, columns=['score', 'prediction'])
+    if id_column is not None:
+        output.insert(0, id_column, df[id_column].values)
+    return n_rows, len(output), output.to_csv(header=False, index=False)
+
+
+def predict_slim(scorer_file, data_file, output_file, id_column = None, chunk_size = DEFAULT_CHUNK_SIZE, n_workers = 1, logger = None):
+    """
+    Scores every row of data_file with a scorer and writes the scores and predictions to output_file.
+    Workers read and score chunks in parallel; the output is written in the order of the rows of data_file.
+
+    Returns
+    -------
+    dictionary with n_rows, elapsed_time and rows_per_second
+    """
+    log = logger.info if logger is not None else (lambda msg: None)
+
+    scorer = slim.load_scorer(scorer_file)
+    file_type = get_file_type(data_file)
+    column_names = get_column_names(data_file, file_type)
+
+    read_names = list(scorer.feature_names)
+    if id_column is not None:
+        if id_column not in column_names:
+            raise ValueError('data_file does not contain column: %s' % id_column)
+        read_names = [id_column] + [n for n in read_names if n != id_column]
+    scorer.get_columns(column_names)
+
+    line_terminator = get_line_terminator(data_file) if file_type == 'csv' else None
+    chunks = get_row_chunks(data_file, file_type, chunk_size, line_terminator)
+    log("scoring %s in %d chunks with %d workers (reading %d of %d columns)" %
+        (data_file, len(chunks), n_workers, len(read_names), len(column_names)))
+
+    start_time = time.time()
+    last_log_time = start_time
+    n_rows = 0
+    n_file_rows = 0
+    header = ([id_column] if id_column is not None else []) + ['score', 'prediction']
+
+    pool = Pool(processes=n_workers,
+                initializer=_initialize_worker,
+                initargs=(scorer_file, data_file, file_type, line_terminator, column_names, read_names, id_column))
+    try:
+        with open(output_file, 'w') as fh:
+            fh.write(','.join(header) + '\n')
+            for chunk_file_rows, chunk_rows, chunk_output in pool.imap(_score_chunk, chunks):
+                fh.write(chunk_output)
+                n_rows += chunk_rows
+                n_file_rows += chunk_file_rows
+                now = time.time()
+                if now - last_log_time >= PROGRESS_LOG_INTERVAL:
+                    log("scored %d rows (%1.0f rows/sec)" % (n_rows, n_rows / (now - start_time)))
+                    last_log_time = now
+    finally:
+        pool.close()
+        pool.join()
+
+    if n_rows != n_file_rows:
+        raise ValueError('scored %d rows but %s has %d rows' % (n_rows, data_file, n_file_rows))
+
+    elapsed_time = time.time() - start_time
+    rows_per_second = n_rows / elapsed_time if elapsed_time > 0 else float('nan')
+    log("scored %d rows in %1.2f seconds (%1.0f rows/sec)" % (n_rows, elapsed_time, rows_per_second))
+    return {'n_rows': n_rows, 'elapsed_time': elapsed_time, 'rows_per_second': rows_per_second}
+
+
+if __name__ == '__main__':
+
+    parser = setup_parser()
+    parsed = parser.parse_args()
+    parsed_dict = vars(parsed)
+    parsed_string = [key + ' : ' + str(parsed_dict[key]) + '\n' for key in parsed_dict]
+    parsed_string.sort()
+
+    # setup logging
+    logger = logging.getLogger()
+    logger = slim.setup_logging(logger, log_to_console=(not parsed.silent), log_file=parsed.log)
+    logger.setLevel(logging.INFO)
+    logger.info("running 'predict_slim.py'")
+    logger.info("current working directory: %r" % os.getcwd())
+    logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
+
+    predict_slim(parsed.scorer_file,
+                 parsed.data_file,
+                 parsed.output_file,
+                 id_column=parsed.id_column,
+                 chunk_size=parsed.chunk_size,
+                 n_workers=parsed.n_workers,
+                 logger=logger)
+
+    logger.info("saved predictions to file: %s" % parsed.output_file)
+    logger.info("quitting")
+    sys.exit(0)
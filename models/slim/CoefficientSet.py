@@ -1,28 +1,83 @@
 import numpy as np
-from prettytable import PrettyTable
+
+INTERCEPT_NAMES = {'Intercept', '(Intercept)', 'intercept', '(intercept)'}
+NUMERIC_FIELDS = ['ub', 'lb', 'C_0j', 'sign']
+STRING_FIELDS = ['vtype']
+VTYPES = ['I', 'C']
+COEFFICIENT_SET_DTYPE = np.dtype([('ub', np.float64),
+                                  ('lb', np.float64),
+                                  ('C_0j', np.float64),
+                                  ('sign', np.float64),
+                                  ('vtype', np.dtype((str, 1))),
+                                  ('group', np.int32)])
+NO_GROUP = -1
+
+
+def _check_vtype(values):
+    # vtype is stored as a single character, so longer values would be truncated
+    values = np.asarray(values).flatten()
+    invalid = ~np.in1d(values.astype(str), VTYPES)
+    if np.any(invalid):
+        raise ValueError("vtype should be one of %r; found %r" % (VTYPES, sorted(set(values[invalid].tolist()))))
 
 
 class CoefficientSet(object):
+    """
+    Constraints on the coefficients of a SLIM scoring system.
+
+    Fields are stored in one structured array with one record per variable, and variables are
+    looked up through a name -> index dictionary. Copies made with copy() share the array until
+    either copy is modified (copy-on-write), so sweeps can derive many sets from a base set cheaply.
+    Fields (e.g. coef_set.ub) are views of this array: change them with set_field or by assigning
+    the whole field, and do not write to a view that was taken before copy(), since the write
+    would show up in both sets.
+
+    Variables can also be assigned to groups (e.g. the levels of a one-hot encoded categorical
+    feature). create_slim_ip restricts each group to at most one non-zero coefficient.
+    """
+
+    def _get_field(self, field_name):
+        values = self._values[field_name]
+        if self._shared:
+            # writes to a shared array must go through set_field so that it is copied first
+            values.flags.writeable = False
+        return values
+
+    def _set_field_values(self, field_name, values):
+        if field_name == 'vtype':
+            _check_vtype(values)
+        self._write_access()
+        self._values[field_name] = values
+
+    def _write_access(self):
+        if self._shared:
+            self._values = self._values.copy()
+            self._shared = False
+
+    ub = property(lambda self: self._get_field('ub'), lambda self, v: self._set_field_values('ub', v))
+    lb = property(lambda self: self._get_field('lb'), lambda self, v: self._set_field_values('lb', v))
+    C_0j = property(lambda self: self._get_field('C_0j'), lambda self, v: self._set_field_values('C_0j', v))
+    sign = property(lambda self: self._get_field('sign'), lambda self, v: self._set_field_values('sign', v))
+    vtype = property(lambda self: self._get_field('vtype'), lambda self, v: self._set_field_values('vtype', v))
 
     def check_string_input(self, input_name, input_value):
 
-        if type(input_value) is np.array:
-
+        if type(input_value) is np.ndarray:
             if input_value.size == self.P:
-                setattr(self, input_name, input_value)
+                setattr(self, input_name, input_value.flatten())
             elif input_value.size == 1:
-                setattr(self, input_name, np.repeat(input_value, self.P))
+                setattr(self, input_name, np.repeat(input_value.flatten(), self.P))
             else:
                 raise ValueError("length of %s is %d; should be %d" % (input_name, input_value.size, self.P))
 
         elif type(input_value) is str:
-            setattr(self, input_name, float(input_value)*np.ones(self.P))
+            setattr(self, input_name, np.repeat(input_value, self.P))
 
         elif type(input_value) is list:
             if len(input_value) == self.P:
                 setattr(self, input_name, np.array([str(x) for x in input_value]))
             elif len(input_value) == 1:
-                setattr(self, input_name, np.repeat(input_value, self.P))
+                setattr(self, input_name, np.repeat(str(input_value[0]), self.P))
             else:
                 raise ValueError("length of %s is %d; should be %d" % (input_name, len(input_value), self.P))
 
@@ -34,9 +89,9 @@ class CoefficientSet(object):
         if type(input_value) is np.ndarray:
 
             if input_value.size == self.P:
-                setattr(self, input_name, input_value)
+                setattr(self, input_name, input_value.flatten())
             elif input_value.size == 1:
-                setattr(self, input_name, input_value*np.ones(self.P))
+                setattr(self, input_name, input_value.flatten()*np.ones(self.P))
             else:
                 raise ValueError("length of %s is %d; should be %d" % (input_name, input_value.size, self.P))
 
@@ -57,7 +112,7 @@ class CoefficientSet(object):
     def __init__(self, **kwargs):
 
         if 'variable_names' in kwargs:
-            variable_names = kwargs.get('variable_names')
+            variable_names = list(kwargs.get('variable_names'))
             P = len(variable_names)
         elif 'P' in kwargs:
             P = kwargs.get('P')
@@ -67,6 +122,15 @@ class CoefficientSet(object):
 
         self.P = P
         self.variable_names = variable_names
+        self._index = {name: j for j, name in enumerate(variable_names)}
+        if len(self._index) != P:
+            raise ValueError("variable_names is not unique")
+        self._intercept_ind = np.array([j for j, name in enumerate(variable_names) if name in INTERCEPT_NAMES], dtype = int)
+        self._values = np.zeros(P, dtype = COEFFICIENT_SET_DTYPE)
+        self._values['group'] = NO_GROUP
+        self._shared = False
+        self.group_names = []
+
         self.fix_flag   = kwargs.get('fix_flag', True)
         self.check_flag = kwargs.get('check_flag', True)
         self.print_flag = kwargs.get('print_flag', False)
@@ -83,38 +147,168 @@ class CoefficientSet(object):
         self.check_numeric_input('sign', sign)
         self.check_string_input('vtype', vtype)
 
+        groups = kwargs.get('groups', {})
+        for group_name in sorted(groups.keys()):
+            self.add_group(group_name, groups[group_name])
+
         if self.check_flag: self.check_set()
         if self.print_flag: self.view()
 
     def __len__(self):
         return self.P
 
+    def copy(self):
+        """
+        returns a copy of this set that shares its values until either set is modified
+        (views of fields that were taken before the copy still point to the shared values; see CoefficientSet)
+        """
+        clone = CoefficientSet.__new__(CoefficientSet)
+        clone.__dict__.update(self.__dict__)
+        clone.group_names = list(self.group_names)
+        self._shared = True
+        clone._shared = True
+        return clone
+
+    def save(self, file_name):
+        """
+        saves the set as a .npz file that can be loaded with CoefficientSet.load
+        """
+        np.savez(file_name,
+                 values = self._values,
+                 variable_names = np.array(self.variable_names),
+                 group_names = np.array(self.group_names, dtype = str),
+                 flags = np.array([self.fix_flag, self.check_flag, self.print_flag]))
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        loads a set saved with CoefficientSet.save
+        the fields are read as arrays, so loading does not depend on the number of variables
+        """
+        with np.load(file_name) as saved:
+            values = saved['values']
+            variable_names = saved['variable_names'].tolist()
+            group_names = saved['group_names'].tolist()
+            flags = saved['flags']
+
+        if values.dtype.names != COEFFICIENT_SET_DTYPE.names:
+            raise ValueError("%s does not contain a CoefficientSet" % file_name)
+
+        return cls._from_values(variable_names, values, group_names, [bool(f) for f in flags])
+
+    @classmethod
+    def _from_values(cls, variable_names, values, group_names, flags):
+        coef_set = cls.__new__(cls)
+        coef_set.P = len(variable_names)
+        coef_set.variable_names = variable_names
+        coef_set._index = {name: j for j, name in enumerate(variable_names)}
+        coef_set._intercept_ind = np.array([j for j, name in enumerate(variable_names) if name in INTERCEPT_NAMES], dtype = int)
+        coef_set._values = values.astype(COEFFICIENT_SET_DTYPE)
+        coef_set._shared = False
+        coef_set.group_names = group_names
+        coef_set.fix_flag, coef_set.check_flag, coef_set.print_flag = flags
+        return coef_set
+
+    def subset(self, variable_names):
+        """
+        returns a new set with the constraints of variable_names, in that order (e.g. the columns kept by reduce_features)
+        groups keep the variables that are in the subset, and groups without any of these variables are dropped
+        """
+        variable_names = list(variable_names)
+        ind = self.get_index(variable_names)
+        if np.any(ind < 0):
+            raise ValueError("CoefficientSet does not contain variables: %r" % [n for n, j in zip(variable_names, ind) if j < 0])
+
+        values = self._values[ind]
+        group = values['group']
+        kept_groups = sorted(set(group[group != NO_GROUP].tolist()))
+        group_ind = {g: k for k, g in enumerate(kept_groups)}
+        values['group'] = [group_ind.get(g, NO_GROUP) for g in group.tolist()]
+        group_names = [self.group_names[g] for g in kept_groups]
+        return CoefficientSet._from_values(variable_names, values, group_names, [self.fix_flag, self.check_flag, self.print_flag])
+
+    @property
+    def groups(self):
+        """
+        dictionary mapping the name of each group to the names of the variables in the group
+        """
+        group = self._values['group']
+        return {group_name: [self.variable_names[j] for j in np.flatnonzero(group == g)]
+                for g, group_name in enumerate(self.group_names)}
+
+    def add_group(self, group_name, variable_names):
+        """
+        assigns variable_names to a group; at most one variable in a group can have a non-zero coefficient
+        """
+        if group_name in self.group_names:
+            raise ValueError("CoefficientSet already contains a group named %s" % group_name)
+
+        ind = self.get_index(list(variable_names))
+        if np.any(ind < 0):
+            raise ValueError("CoefficientSet does not contain variables: %r" % [n for n, j in zip(variable_names, ind) if j < 0])
+        if np.any(np.in1d(ind, self._intercept_ind)):
+            raise ValueError("the intercept cannot belong to a group")
+        if np.any(self._values['group'][ind] != NO_GROUP):
+            raise ValueError("variables can only belong to one group")
+
+        self._write_access()
+        self._values['group'][ind] = len(self.group_names)
+        self.group_names.append(group_name)
+
+    def get_index(self, variable_names):
+        """
+        returns the positions of variable_names in the set (-1 for names that are not in the set)
+        """
+        if type(variable_names) is str:
+            return self._index.get(variable_names, -1)
+        return np.array([self._index.get(n, -1) for n in variable_names], dtype = int)
+
     def check_set(self):
 
-        for i in range(0, len(self.variable_names)):
+        values = self._values
+        _check_vtype(values['vtype'])
+        ub = values['ub']
+        lb = values['lb']
+        sign = values['sign']
+        C_0j = values['C_0j']
+
+        with np.errstate(invalid = 'ignore'):
+            # sign and C_0j are nan by default
+            swap_ind = np.flatnonzero(ub < lb)
+            # sign constraints apply to the bounds after swapping
+            lb_ind = np.flatnonzero((sign > 0) & (np.minimum(lb, ub) < 0))
+            ub_ind = np.flatnonzero((sign < 0) & (np.maximum(lb, ub) > 0))
+
+        intercept_ind = self._intercept_ind
+        if len(intercept_ind) > 0 and self.fix_flag:
+            intercept_C_0j = C_0j[intercept_ind]
+            intercept_ind = intercept_ind[np.isnan(intercept_C_0j) | (np.nan_to_num(intercept_C_0j) > 0)]
+        else:
+            intercept_ind = intercept_ind[:0]
+
+        if len(swap_ind) + len(lb_ind) + len(ub_ind) + len(intercept_ind) == 0:
+            return
 
-            if self.ub[i] < self.lb[i]:
-                if self.print_flag:
-                    print "fixed issue: ub < lb for variable %s" % self.variable_names[i]
-                ub = ub[i]
-                lb = lb[i]
-                self.ub[i] = lb
-                self.lb[i] = ub
+        self._write_access()
+        values = self._values
 
-            if self.sign[i] > 0 and self.lb[i] < 0:
-                self.lb[i] = 0.0
+        if len(swap_ind) > 0:
+            if self.print_flag:
+                for j in swap_ind:
+                    print("fixed issue: ub < lb for variable %s" % self.variable_names[j])
+            ub_values = values['ub'][swap_ind]
+            values['ub'][swap_ind] = values['lb'][swap_ind]
+            values['lb'][swap_ind] = ub_values
 
-            if self.sign[i] < 0 and self.ub[i] > 0:
-                self.ub[i] = 0.0
+        values['lb'][lb_ind] = 0.0
+        values['ub'][ub_ind] = 0.0
 
-            if self.variable_names[i] in {'Intercept','(Intercept)', 'intercept', '(intercept)'}:
-                if self.C_0j[i] > 0 or np.isnan(self.C_0j[i]):
-                    if self.print_flag:
-                        print "found intercept variable with penalty value of C_0j = %1.4f" % self.C_0j[i]
-                    if self.fix_flag:
-                        if self.print_flag:
-                            print "setting C_0j for intercept to 0.0 to ensure that intercept is not penalized"
-                        self.C_0j[i] = 0.0
+        if len(intercept_ind) > 0:
+            if self.print_flag:
+                for j in intercept_ind:
+                    print("found intercept variable with penalty value of C_0j = %1.4f" % values['C_0j'][j])
+                    print("setting C_0j for intercept to 0.0 to ensure that intercept is not penalized")
+            values['C_0j'][intercept_ind] = 0.0
 
     def get_field_as_nparray(self, field_name):
         return np.array(getattr(self, field_name))
@@ -124,55 +318,43 @@ class CoefficientSet(object):
 
     def set_field(self, field_name, variable_names, field_values):
 
-        curr_values = getattr(self, field_name)
+        if field_name not in NUMERIC_FIELDS + STRING_FIELDS:
+            raise ValueError("CoefficientSet does not have a field named %s" % field_name)
 
         if type(variable_names) is str:
-
             variable_names = [variable_names]
-            if type(field_values) is list:
-                if len(field_values) is 1:
-                    pass
-                else:
-                    raise ValueError("user provided multiple values for single field")
-
-            elif type(field_values) is np.ndarray:
-                if len(field_values) is 1:
-                    pass
-                else:
-                    raise ValueError("user provided multiple values for single field")
-                field_values = field_values.to_list()
+            field_values = np.array(field_values).flatten()
+            if field_values.size != 1:
+                raise ValueError("user provided multiple values for single field")
 
-            else:
-                field_values = [field_values]
+        elif type(variable_names) is list or type(variable_names) is np.ndarray:
+            field_values = np.array(field_values).flatten()
+            if field_values.size != 1 and field_values.size != len(variable_names):
+                raise ValueError("length of variable names and values do not match")
 
-        elif type(variable_names) is list:
-
-            if type(field_values) is list:
-                if len(field_values) != len(variable_names):
-                    raise ValueError("length of variable names and values do not match")
+        else:
+            raise ValueError("user provided variable_names with an unsupported type")
 
-            elif type(field_values) is np.ndarray:
-                if len(field_values) == len(variable_names):
-                    raise ValueError("length of variable names and values do not match")
-                field_values = field_values.to_list()
+        if field_values.size == 1:
+            field_values = np.repeat(field_values, len(variable_names))
 
-            else:
-                field_values = [field_values]*len(variable_names)
+        ind = self.get_index(variable_names)
+        found = ind >= 0
+        if self.print_flag and not np.all(found):
+            for variable_name in np.array(variable_names)[~found]:
+                print("warning: Lset object does not contain variable with name: %s" % variable_name)
 
-        for variable_name in variable_names:
+        if field_name == 'vtype':
+            _check_vtype(field_values)
 
-            if variable_name in self.variable_names:
-                user_ind = variable_names.index(variable_name)
-                self_ind = self.variable_names.index(variable_name)
-                curr_values[self_ind] = field_values[user_ind]
-            else:
-                if self.print_flag:
-                    print "warning: Lset object does not contain variable with name: %s" % variable_name
+        self._write_access()
+        self._values[field_name][ind[found]] = field_values[found]
 
         if self.check_flag: self.check_set()
         if self.print_flag: self.view()
 
     def view(self):
+        from prettytable import PrettyTable
         x = PrettyTable()
         x.align = "r"
         x.add_column("variable_name", self.variable_names)
@@ -181,4 +363,6 @@ class CoefficientSet(object):
         x.add_column("lb", self.get_field_as_list('lb'))
         x.add_column("ub", self.get_field_as_list('ub'))
         x.add_column("C_0j", self.get_field_as_list('C_0j'))
-        print x
\ No newline at end of file
+        if len(self.group_names) > 0:
+            x.add_column("group", [self.group_names[g] if g != NO_GROUP else '' for g in self._values['group']])
+        print(x)
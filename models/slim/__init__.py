@@ -1,3 +1,17 @@
 from .CoefficientSet import *
 from .create_slim_mip import *
-from .helper_functions import *
\ No newline at end of file
+from .solve_slim_mip import *
+from .checkpoint import *
+from .progress import *
+from .solver_profiles import *
+from .helper_functions import *
+from .verification import *
+from .scoring import *
+from .score_analysis import *
+from .scorer import *
+from .bit_packing import *
+from .feature_reduction import *
+from .instrumentation import *
+from .instance_cache import *
+from .shared_data import *
+from .cross_validation import *
@@ -0,0 +1,166 @@
+import numpy as np
+from .data_validation import DEFAULT_CHUNK_SIZE
+
+WORD_SIZE = 64
+
+
+class BitPackedMatrix(object):
+    """
+    N x P binary feature matrix stored column-wise as packed bit vectors (1 bit per entry instead of 64 for float64).
+
+    X.dot(rho) only reads the columns with non-zero coefficients. Each column is added to a bit-sliced counter
+    (one bit vector per bit of the count) with bitwise AND/XOR on 64-bit words, once for each bit of |rho[j]|.
+    The counters are unpacked once at the end, so the cost grows with the number of non-zero coefficients and the
+    number of bits in their values rather than with P.
+
+    Row slices (X[start:end]) are views, so code that computes X[start:end].dot(rho) over chunks of rows
+    (e.g. verify_slim_solution, score_models, get_score_histogram) works with a BitPackedMatrix in place of X.
+
+    X_packed = BitPackedMatrix(data['X'])
+    scores = X_packed.dot(rho)
+    """
+
+    def __init__(self, X, chunk_size = DEFAULT_CHUNK_SIZE):
+        """
+        Parameters
+        ----------
+        X               N x P matrix with entries in {0, 1} (can be memory-mapped)
+        chunk_size      number of rows of X packed at a time (rounded up to a multiple of 64)
+        """
+        if X is None:
+            return
+
+        N, P = X.shape
+        n_words = (N + WORD_SIZE - 1) // WORD_SIZE
+        chunk_size = max(WORD_SIZE, (chunk_size + WORD_SIZE - 1) // WORD_SIZE * WORD_SIZE)
+
+        packed = np.zeros(shape = (P, n_words * WORD_SIZE // 8), dtype = np.uint8)
+        for start in range(0, N, chunk_size):
+            end = min(start + chunk_size, N)
+            X_chunk = np.asarray(X[start:end])
+            assert np.all((X_chunk == 0) | (X_chunk == 1)), 'X should only contain 0 and 1'
+            packed_chunk = np.packbits(X_chunk.T.astype(np.bool_), axis = 1)
+            packed[:, start // 8:start // 8 + packed_chunk.shape[1]] = packed_chunk
+
+        self._words = packed.view(np.uint64)
+        self._row_offset = 0
+        self.shape = (N, P)
+
+    @classmethod
+    def _view(cls, words, row_offset, n_rows, n_cols):
+        view = cls(None)
+        view._words = words
+        view._row_offset = row_offset
+        view.shape = (n_rows, n_cols)
+        return view
+
+    @property
+    def nbytes(self):
+        return self._words.nbytes
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, rows):
+        """
+        returns a BitPackedMatrix with the rows in a slice (e.g. X[start:end]) without copying the bits
+        """
+        assert isinstance(rows, slice) and rows.step in (None, 1), 'BitPackedMatrix only supports slices of rows'
+        start, stop, _ = rows.indices(self.shape[0])
+        stop = max(start, stop)
+        first_row = self._row_offset + start
+        first_word = first_row // WORD_SIZE
+        last_word = (self._row_offset + stop + WORD_SIZE - 1) // WORD_SIZE
+        return BitPackedMatrix._view(self._words[:, first_word:last_word], first_row - first_word * WORD_SIZE, stop - start, self.shape[1])
+
+    def _unpack(self, bits):
+        # bits is a vector of words for the rows of this matrix
+        return np.unpackbits(bits.view(np.uint8))[self._row_offset:self._row_offset + self.shape[0]]
+
+    def get_column(self, j):
+        return self._unpack(self._words[j])
+
+    def toarray(self):
+        return np.column_stack([self.get_column(j) for j in range(self.shape[1])]) if self.shape[1] > 0 else np.zeros(self.shape, dtype = np.uint8)
+
+    def _count(self, idx, counts):
+        """
+        returns sum_k counts[k] * X[:, idx[k]] for non-negative integer counts with a bit-sliced adder
+        """
+        n_words = self._words.shape[1]
+        planes = []
+        for j, c in zip(idx, counts):
+            column = self._words[j]
+            level = 0
+            while c > 0:
+                if c & 1:
+                    # add column to the counter at this level and propagate the carry
+                    while len(planes) <= level:
+                        planes.append(np.zeros(n_words, dtype = np.uint64))
+                    carry = column
+                    for k in range(level, len(planes)):
+                        next_carry = planes[k] & carry
+                        planes[k] ^= carry
+                        carry = next_carry
+                    if carry.any():
+                        planes.append(carry)
+                c >>= 1
+                level += 1
+
+        total = np.zeros(self.shape[0], dtype = np.int64)
+        for k, plane in enumerate(planes):
+            if plane.any():
+                total += self._unpack(plane).astype(np.int64) << k
+        return total
+
+    def sparse_dot(self, idx, points):
+        """
+        returns X[:, idx].dot(points) for a list of column indices and integer points
+        """
+        points = np.asarray(points)
+        if len(points) == 0:
+            return np.zeros(self.shape[0], dtype = np.int64)
+
+        if not np.all(points == np.round(points)):
+            # non-integer coefficients: unpack the columns that are used
+            return np.column_stack([self.get_column(j) for j in idx]).dot(points.astype(np.float))
+
+        points = np.round(points).astype(np.int64)
+        idx = np.asarray(idx)
+        pos = points > 0
+        neg = points < 0
+        return self._count(idx[pos], points[pos]) - self._count(idx[neg], -points[neg])
+
+    def dot(self, rho):
+        """
+        Parameters
+        ----------
+        rho             P x 1 coefficient vector or P x R matrix of coefficients
+
+        Returns
+        -------
+        N x 1 vector (or N x R matrix) of scores; scores are int64 if rho is integer-valued
+        """
+        rho = np.asarray(rho)
+        assert rho.shape[0] == self.shape[1], 'rho should have %d rows' % self.shape[1]
+        if rho.ndim == 1:
+            idx = np.flatnonzero(rho)
+            return self.sparse_dot(idx, rho[idx])
+
+        scores = [self.dot(rho[:, r]) for r in range(rho.shape[1])]
+        return np.column_stack(scores) if len(scores) > 0 else np.zeros((self.shape[0], 0), dtype = np.int64)
+
+
+def get_packed_data(data, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    returns a shallow copy of data with X stored as a BitPackedMatrix (or data itself if X is not binary)
+    """
+    X = data['X']
+    for start in range(0, X.shape[0], chunk_size):
+        X_chunk = X[start:start + chunk_size]
+        if not np.all((X_chunk == 0) | (X_chunk == 1)):
+            return data
+
+    packed_data = dict(data)
+    packed_data['X'] = BitPackedMatrix(X, chunk_size = chunk_size)
+    return packed_data
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import logging
+import numpy as np
+from .verification import get_variable_columns
+
+CHECKPOINT_FORMAT_VERSION = 1
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+CUTOFF_TOLERANCE = 1e-6
+
+
+# Checkpoint Files
+def save_checkpoint(checkpoint, checkpoint_file):
+    """
+    writes a checkpoint dictionary as JSON; the file is replaced atomically so an interrupted run never leaves a corrupt checkpoint
+    """
+    checkpoint = dict(checkpoint)
+    checkpoint['format_version'] = CHECKPOINT_FORMAT_VERSION
+    checkpoint['saved'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime())
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w') as fh:
+        json.dump(checkpoint, fh)
+    os.rename(tmp_file, checkpoint_file)
+
+
+def load_checkpoint(checkpoint_file):
+    """
+    returns the checkpoint dictionary stored in checkpoint_file, or None if the file does not exist or has another format
+    """
+    if not os.path.isfile(checkpoint_file):
+        return None
+
+    with open(checkpoint_file, 'r') as fh:
+        checkpoint = json.load(fh)
+
+    if checkpoint.get('format_version') != CHECKPOINT_FORMAT_VERSION:
+        return None
+
+    return checkpoint
+
+
+def get_checkpoint(slim_info, rho, objective_value, best_bound, elapsed_time, nodes_processed = 0):
+    return {
+        'variable_names': list(slim_info['X_names']),
+        'rho': [float(v) for v in rho],
+        'objective_value': float(objective_value),
+        'best_bound': float(best_bound),
+        'elapsed_time': float(elapsed_time),
+        'nodes_processed': int(nodes_processed),
+    }
+
+
+# Checkpointing during the Solve
+class CheckpointWriter(object):
+    """
+    Saves the incumbent rho, the best bound and the elapsed time to a checkpoint file during the solve.
+    The file is written at most once every checkpoint_interval seconds and only if the incumbent or bound changed.
+    This is a handler for SolveMonitorCallback (CPLEX only runs one MIPInfoCallback per problem):
+
+    add_solve_monitor(slim_IP, [CheckpointWriter(slim_info, checkpoint_file)])
+    """
+
+    def __init__(self, slim_info, checkpoint_file, checkpoint_interval = DEFAULT_CHECKPOINT_INTERVAL, elapsed_time_offset = 0.0):
+        self.slim_info = slim_info
+        self.rho_idx = list(slim_info['rho_idx'])
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = float(checkpoint_interval)
+        self.elapsed_time_offset = float(elapsed_time_offset)
+        self.next_save_time = self.checkpoint_interval
+        self.last_saved = None
+        self.n_saved = 0
+
+    def update(self, cb, elapsed_time):
+
+        if elapsed_time < self.next_save_time or not cb.has_incumbent():
+            return
+
+        self.next_save_time = elapsed_time + self.checkpoint_interval
+        objective_value = cb.get_incumbent_objective_value()
+        best_bound = cb.get_best_objective_value()
+        if self.last_saved == (objective_value, best_bound):
+            return
+
+        checkpoint = get_checkpoint(self.slim_info,
+                                    rho = cb.get_incumbent_values(self.rho_idx),
+                                    objective_value = objective_value,
+                                    best_bound = best_bound,
+                                    elapsed_time = self.elapsed_time_offset + elapsed_time,
+                                    nodes_processed = cb.get_num_nodes())
+
+        save_checkpoint(checkpoint, self.checkpoint_file)
+        self.last_saved = (objective_value, best_bound)
+        self.n_saved += 1
+
+
+# Resuming from a Checkpoint
+def get_slim_mip_start(rho, slim_info, data):
+    """
+    Computes the values of every variable in a SLIM IP for a given coefficient vector
+
+    Parameters
+    ----------
+    rho         P x 1 vector of coefficients
+    slim_info   dictionary produced by create_slim_ip
+    data        dictionary with the training data used to create the IP
+
+    Returns
+    -------
+    idx         list of the indices of the variables in the IP
+    values      list of values for these variables (a feasible solution if rho satisfies the coefficient constraints)
+    """
+    rho = np.asarray(rho, dtype = np.float).flatten()
+    rounded_rho = np.round(rho)
+    rho = np.where(np.abs(rho - rounded_rho) <= CUTOFF_TOLERANCE, rounded_rho, rho)
+    assert len(rho) == len(slim_info['rho_idx']), 'rho should contain %d values' % len(slim_info['rho_idx'])
+
+    alpha_cols = get_variable_columns(slim_info['alpha_names'], 'alpha_')
+    beta_cols = get_variable_columns(slim_info['beta_names'], 'beta_')
+
+    alpha = (rho[alpha_cols] != 0.0).astype(np.float)
+    beta = np.abs(rho[beta_cols])
+
+    scores = np.ravel(data['Y']) * data['X'].dot(rho)
+    error = (scores < slim_info.get('loss_rhs', slim_info['epsilon'])).astype(np.float)
+    total_error_pos = np.sum(error[slim_info['pos_ind']])
+    total_error_neg = np.sum(error[slim_info['neg_ind']])
+    total_l0_norm = np.count_nonzero(rho[slim_info['L0_reg_ind']])
+
+    idx = (list(slim_info['rho_idx']) + list(slim_info['alpha_idx']) + list(slim_info['beta_idx']) + list(slim_info['error_idx']) +
+           list(slim_info['total_l0_norm_idx']) + list(slim_info['total_error_idx']) +
+           list(slim_info['total_error_pos_idx']) + list(slim_info['total_error_neg_idx']))
+
+    values = (rho.tolist() + alpha.tolist() + beta.tolist() + error.tolist() +
+              [float(total_l0_norm), total_error_pos + total_error_neg, total_error_pos, total_error_neg])
+
+    return idx, values
+
+
+def add_slim_mip_start(slim_IP, slim_info, data, rho, name = 'checkpoint', set_cutoff = True):
+    """
+    adds rho as a MIP start for slim_IP and (optionally) sets its objective value as an upper cutoff
+
+    :return: objective value of the MIP start
+    """
+    idx, values = get_slim_mip_start(rho, slim_info, data)
+    import cplex
+    slim_IP.MIP_starts.add(cplex.SparsePair(ind = idx, val = values), slim_IP.MIP_starts.effort_level.check_feasibility, name)
+
+    obj = np.array(slim_IP.objective.get_linear(idx))
+    objective_value = float(np.dot(obj, values))
+    if set_cutoff:
+        slim_IP.parameters.mip.tolerances.uppercutoff.set(objective_value + CUTOFF_TOLERANCE * max(1.0, abs(objective_value)))
+
+    return objective_value
+
+
+def resume_from_checkpoint(slim_IP, slim_info, data, checkpoint, timelimit = -1):
+    """
+    Prepares slim_IP to continue from a checkpoint: adds the incumbent as a MIP start, sets an upper cutoff
+    at its objective value and returns the time that is left from timelimit.
+    The best bound cannot be passed to CPLEX; it is kept in the checkpoint and reported by the caller.
+    If the incumbent is outside the current coefficient bounds, then nothing is added and timelimit is returned unchanged.
+
+    :return:
+    %timelimit remaining time limit (in seconds); -1 if there is no time limit
+    %resumed True if the incumbent was added as a MIP start
+    """
+    assert checkpoint['variable_names'] == list(slim_info['X_names']), 'checkpoint was saved for a different set of variables'
+
+    rho = np.array(checkpoint['rho'])
+    if not (np.all(rho >= slim_info['rho_lb']) and np.all(rho <= slim_info['rho_ub'])):
+        logging.getLogger(__name__).warning('not resuming from checkpoint: its incumbent is outside the current coefficient bounds')
+        return timelimit, False
+
+    add_slim_mip_start(slim_IP, slim_info, data, rho)
+    if timelimit < 0:
+        return -1, True
+    return max(timelimit - checkpoint['elapsed_time'], 0.0), True
@@ -1,7 +1,117 @@
-import cplex
 from math import ceil, floor
 from helper_functions import *
 from CoefficientSet import CoefficientSet
+from instrumentation import StageTimer
+
+
+def get_coefficient_set(data, max_coef=10, max_offset=-1):
+    """
+    :param data: dictionary produced by load_data_from_csv
+    :param max_coef: value of upper and lower bounds for any coefficient
+    :param max_offset: value of upper and lower bound on offset parameter; set as -1 to use a conservative value
+
+    :return:
+    %coef_constraints CoefficientSet with bounds of -max_coef to max_coef, and bounds for the intercept
+    """
+    coef_constraints = CoefficientSet(variable_names=data['variable_names'], ub=max_coef, lb=-max_coef)
+
+    if max_offset == -1:
+        # choose upper and lower bounds for the intercept coefficient
+        # to ensure that there will be no regularization due to the intercept, choose
+        #
+        # intercept_ub < min_i(min_score_i)
+        # intercept_lb > max_i(max_score_i)
+        #
+        # where min_score_i = min((Y*X) * \rho) for rho in \Lset
+        # where max_score_i = max((Y*X) * \rho) for rho in \Lset
+        #
+        # setting intercept_ub and intercept_lb in this way ensures that we can classify every point as positive and negative
+        non_intercept_ind = np.array([n != '(Intercept)' for n in data['variable_names']])
+        XY = data['X'][:, non_intercept_ind] * data['Y']
+        scores_at_ub = XY * coef_constraints.ub[non_intercept_ind]
+        scores_at_lb = XY * coef_constraints.lb[non_intercept_ind]
+        max_scores = np.fmax(scores_at_ub, scores_at_lb)
+        min_scores = np.fmin(scores_at_ub, scores_at_lb)
+        max_scores = np.sum(max_scores, 1)
+        min_scores = np.sum(min_scores, 1)
+        intercept_ub = -min(min_scores) + 1
+        intercept_lb = -max(max_scores) + 1
+    else:
+        intercept_ub = abs(max_offset)
+        intercept_lb = -abs(max_offset)
+
+    coef_constraints.set_field('ub', '(Intercept)', intercept_ub)
+    coef_constraints.set_field('lb', '(Intercept)', intercept_lb)
+    #coef_constraints.view()
+    return coef_constraints
+
+
+def get_intercept_bounds(data, coef_constraints=None, max_coef=10, max_offset=-1):
+    """
+    :param data: dictionary produced by load_data_from_csv
+    :param coef_constraints: CoefficientSet for data; if None, then we use get_coefficient_set(data, max_coef, max_offset)
+
+    :return:
+    %intercept_bounds (lb, ub) of the '(Intercept)' coefficient, or None if there is no intercept (e.g. for reduce_features)
+    """
+    if coef_constraints is None:
+        coef_constraints = get_coefficient_set(data, max_coef=max_coef, max_offset=max_offset)
+    j = coef_constraints.get_index('(Intercept)')
+    if j < 0:
+        return None
+    return float(coef_constraints.lb[j]), float(coef_constraints.ub[j])
+
+
+def get_slim_input(data, max_coef=10, c0_value=-1, max_size=-1, max_offset=-1, coef_constraints=None, integer_loss=False):
+    """
+    :param data: dictionary produced by load_data_from_csv
+    :param max_coef: value of upper and lower bounds for any coefficient
+    :param c0_value: l0 regularization parameter; set as -1 for smallest value
+    :param max_size: maximum number of non-zero coefficients; set as -1 for no limit
+    :param max_offset: value of upper and lower bound on offset parameter; set as -1 to use a conservative value
+    :param coef_constraints: CoefficientSet to use as is (e.g. from CoefficientSet.load); if None, then we
+                             derive the constraints from max_coef, max_offset and the data
+    :param integer_loss: set to True to use integer loss constraints when the data and coefficients are integer
+
+    :return:
+    %slim_input dictionary of inputs for create_slim_ip
+    """
+
+    timer = StageTimer('get_slim_input')
+    N, P = data['X'].shape
+
+    # set data-dependent parameters
+    max_size = P if max_size == -1 else min(max_size, P)
+    c0_value = 0.9 / (N * P) if c0_value == -1 else min(c0_value, 1.00)
+
+    # setup coefficient constraints
+    if coef_constraints is not None:
+        assert list(coef_constraints.variable_names) == list(data['variable_names']), 'coef_constraints should have the same variable_names as data'
+    else:
+        coef_constraints = get_coefficient_set(data, max_coef=max_coef, max_offset=max_offset)
+    timer.lap('coefficient_set')
+
+    #create SLIM IP
+    slim_input = {
+        'X': data['X'],
+        'X_names': data['variable_names'],
+        'Y': data['Y'],
+        'C_0': c0_value,
+        'w_pos': 1.0,
+        'w_neg': 1.0,
+        'L0_min': 0,
+        'L0_max': max_size,
+        'err_min': 0,
+        'err_max': 1.0,
+        'pos_err_min': 0,
+        'pos_err_max': 1.0,
+        'neg_err_min': 0,
+        'neg_err_max': 1.0,
+        'coef_constraints': coef_constraints,
+        'integer_loss': integer_loss,
+    }
+
+    return slim_input
 
 
 def create_slim_ip(input, print_flag=False):
@@ -10,11 +120,16 @@ def create_slim_ip(input, print_flag=False):
     %Y          N x 1 np.array of labels (-1 or 1 only)
     %X          N x P np.matrix of feature values (should include a column of 1s to act as an intercept
     %X_names    P x 1 list of strings with names of the feature values (all unique and Intercept name)
+    %data_summary   (optional) summary statistics of X from check_data(data, return_summary = True)
+    %group_constraint_type  (optional) 'sos1' or 'linear'; how groups in coef_constraints are added to the IP
+    %feature_map    (optional) mapping from reduce_features, used to report models in terms of the original variables
+    %integer_loss   (optional) set to True to write the loss constraints with integer coefficients when X, Y and rho are integer
 
     :return:
     %slim_IP
     %slim_info
     """
+    import cplex
 
     #setup printing
     if print_flag:
@@ -24,6 +139,9 @@ def create_slim_ip(input, print_flag=False):
         def print_handle(msg):
             pass
 
+    #record the wall time and peak memory of each stage
+    timer = StageTimer('create_slim_ip')
+
     #check preconditions
     assert 'X' in input, 'no field named X  in input'
     assert 'X_names' in input, 'no field named X_names in input'
@@ -41,7 +159,14 @@ def create_slim_ip(input, print_flag=False):
     neg_ind = np.flatnonzero(input['Y'] == -1)
     N_pos = len(pos_ind)
     N_neg = len(neg_ind)
-    binary_data_flag = np.all((input['X'] == 0) | (input['X'] == 1))
+    if 'data_summary' in input:
+        # reuse summary statistics from check_data(data, return_summary = True)
+        binary_data_flag = input['data_summary']['binary_data_flag']
+        integer_data_flag = input['data_summary']['integer_data_flag']
+    else:
+        binary_data_flag = np.all((input['X'] == 0) | (input['X'] == 1))
+        integer_data_flag = np.all(np.floor(XY) == XY)
+    timer.lap('check_input')
 
     #outcome variable name
     if ('Y_name' in input) and (type(input['Y_name']) is list):
@@ -72,6 +197,9 @@ def create_slim_ip(input, print_flag=False):
     input = get_or_set_default(input, 'C_1', float('nan'), print_flag = print_flag)
     input = get_or_set_default(input, 'M', float('nan'), print_flag = print_flag)
     input = get_or_set_default(input, 'epsilon', 0.001, print_flag = print_flag)
+    input = get_or_set_default(input, 'group_constraint_type', 'sos1', print_flag = print_flag)
+    input = get_or_set_default(input, 'integer_loss', False, print_flag = print_flag)
+    assert input['group_constraint_type'] in ('sos1', 'linear'), "group_constraint_type should be 'sos1' or 'linear'"
 
     #coefficient constraints
     if 'coef_constraints' in input:
@@ -163,26 +291,41 @@ def create_slim_ip(input, print_flag=False):
     assert(pos_err_max <= N_pos)
     assert(neg_err_max <= N_neg)
 
+    timer.lap('parameters')
+
+    #integer loss constraints
+    #if XY and rho are integer then every score XY[i,].dot(rho) is integer, so score > 0 <=> score >= 1
+    #and we can use integer coefficients with rhs = 1 instead of rhs = epsilon and fractional values of M
+    integer_rho_flag = (rho_type == 'I' * P) and np.all(np.floor(rho_lb) == rho_lb) and np.all(np.floor(rho_ub) == rho_ub)
+    integer_loss_flag = bool(input['integer_loss'] and integer_data_flag and integer_rho_flag)
+    if input['integer_loss'] and not integer_loss_flag:
+        print_handle('cannot use integer loss constraints since X, Y or rho are not integer-valued; using epsilon = %1.4f' % input['epsilon'])
+
     #TODO: strengthen bounds
     #loss constraint parameters
     epsilon  = input['epsilon']
+    loss_rhs = 1.0 if integer_loss_flag else epsilon
+    loss_margin = 1.0 if integer_loss_flag else 1.05 * epsilon
     if np.isnan(input['M']):
         max_points = np.maximum(XY * rho_lb, XY * rho_ub)
         max_score_reg = np.sum(-np.sort(-max_points[:, L0_reg_ind])[:, 0:int(L0_max)], axis = 1)
         max_score_no_reg = np.sum(max_points[:, ~L0_reg_ind], axis = 1)
         max_score = max_score_reg + max_score_no_reg
-        M = max_score + 1.05 * epsilon
+        M = max_score + loss_margin
     else:
         M = input['M']
 
     #sanity checks for loss constraint parameters
     M = M * np.ones(shape = (N,))
-    M_max = max(np.sum(abs(XY) * rho_max, axis = 1)) + 1.05 * input['epsilon']
+    if integer_loss_flag:
+        M = np.ceil(M)
+    M_max = max(np.sum(abs(XY) * rho_max, axis = 1)) + loss_margin
     assert(len(M) == N)
     assert(all(M > 0))
     assert(all(M <= M_max))
     assert(epsilon > 0.0)
     assert(epsilon < 1.0)
+    timer.lap('big_M')
 
 
     #### CREATE CPLEX IP
@@ -234,16 +377,19 @@ def create_slim_ip(input, print_flag=False):
     slim_IP = cplex.Cplex()
     slim_IP.objective.set_sense(slim_IP.objective.sense.minimize)
     slim_IP.variables.add(obj = obj, lb = lb, ub = ub, types = ctype, names=var_names)
+    timer.lap('add_variables')
 
     #Loss Constraints
     #Enforce z_i = 1 if incorrect classification)
     #M_i * z_i >= XY[i,].dot(rho) + epsilon
+    #(rhs = 1 and integer M_i if integer_loss_flag = True)
     for i in range(0, N):
         slim_IP.linear_constraints.add(names = ["error_" + str(i)],
                                        lin_expr = [cplex.SparsePair(ind = rho_names + [error_names[i]],
                                                                     val = XY[i,].tolist() + [M[i]])],
                                        senses = "G",
-                                       rhs = [epsilon])
+                                       rhs = [loss_rhs])
+    timer.lap('loss_constraints')
 
     # 0-Norm LB Constraints:
     # lambda_j,lb * alpha_j <= lambda_j <= Inf
@@ -287,6 +433,8 @@ def create_slim_ip(input, print_flag=False):
                                        senses = "G",
                                        rhs = [0.0])
 
+    timer.lap('norm_constraints')
+
     # flags for whether or not we will add contraints
     add_L0_norm_constraint = (L0_min > 0) or (L0_max < P)
     add_total_error_constraint = (err_min > 0) or (err_max < N)
@@ -360,6 +508,8 @@ def create_slim_ip(input, print_flag=False):
                                    rhs = [0.0])
 
 
+    timer.lap('auxiliary_constraints')
+
     #### Drop Variables and Constraints
     variables_to_drop = []
     constraints_to_drop = []
@@ -411,11 +561,38 @@ def create_slim_ip(input, print_flag=False):
     if len(variables_to_drop) > 0:
         variables_to_drop = list(set(variables_to_drop))
         slim_IP.variables.delete(variables_to_drop)
+    timer.lap('drop_variables')
+
+    #### Group Constraints
+    # at most one variable in each group of coef_constraints can have a non-zero coefficient
+    # sum(alpha[j] for j in group) <= 1, added as an SOS1 set or as a linear constraint
+    # alpha[j] only exists if rho[j] is L0-regularized and not fixed, so other variables are not constrained
+    dropped_variables = set(variables_to_drop)
+    groups = {}
+    for group_name in sorted(coef_constraints.groups.keys()):
+        group_ind = coef_constraints.get_index(coef_constraints.groups[group_name])
+        group_ind = [int(j) for j in group_ind if alpha_names[j] not in dropped_variables]
+        if len(group_ind) < 2:
+            continue
+
+        groups[group_name] = group_ind
+        group_alpha_names = [alpha_names[j] for j in group_ind]
+        if input['group_constraint_type'] == 'sos1':
+            slim_IP.SOS.add(type = slim_IP.SOS.type.SOS1,
+                            SOS = cplex.SparsePair(ind = group_alpha_names, val = list(range(1, len(group_ind) + 1))),
+                            name = 'group_' + group_name)
+        else:
+            slim_IP.linear_constraints.add(names = ['group_' + group_name],
+                                           lin_expr = [cplex.SparsePair(ind = group_alpha_names, val = [1.0] * len(group_ind))],
+                                           senses = "L",
+                                           rhs = [1.0])
+
+    timer.lap('group_constraints')
 
     #create info dictionary for debugging
-    rho_names = [n for n in rho_names if n not in variables_to_drop]
-    alpha_names = [n for n in alpha_names if n not in variables_to_drop]
-    beta_names = [n for n in beta_names if n not in variables_to_drop]
+    rho_names = [n for n in rho_names if n not in dropped_variables]
+    alpha_names = [n for n in alpha_names if n not in dropped_variables]
+    beta_names = [n for n in beta_names if n not in dropped_variables]
 
     slim_info = {
         "C_0": C_0,
@@ -438,11 +615,15 @@ def create_slim_ip(input, print_flag=False):
         "rho_lb": rho_lb,
         "M": M,
         "epsilon": epsilon,
+        "integer_loss_flag": integer_loss_flag,
+        "loss_rhs": loss_rhs,
         "binary_data_flag": binary_data_flag,
         "pos_ind": pos_ind,
         "neg_ind": neg_ind,
         "L0_reg_ind": L0_reg_ind,
         "L1_reg_ind": L1_reg_ind,
+        "groups": groups,
+        "group_constraint_type": input['group_constraint_type'],
         #
         "n_variables": slim_IP.variables.get_num(),
         "n_constraints": slim_IP.linear_constraints.get_num(),
@@ -470,10 +651,13 @@ def create_slim_ip(input, print_flag=False):
         #
         "X_names": input['X_names'],
         "Y_name": input['Y_name'],
+        "feature_map": input.get('feature_map'),
         #
         # dropped
         "variables_to_drop": variables_to_drop,
         "constraints_to_drop": constraints_to_drop,
     }
 
+    timer.lap('slim_info')
+    slim_info['stage_times'] = timer.summary()
     return slim_IP, slim_info
@@ -0,0 +1,118 @@
+import numpy as np
+from multiprocessing import Pool
+from .shared_data import shared_data, attached_data
+from .solve_slim_mip import train_slim
+from .helper_functions import get_accuracy_stats
+
+
+def _get_fold_bounds(fold_idx):
+    """
+    returns the row order that sorts samples by fold, and the (start, end) rows of each fold in that order
+    """
+    order = np.argsort(fold_idx, kind='mergesort')
+    K = int(fold_idx[order[-1]])
+    fold_ends = np.cumsum(np.bincount(fold_idx, minlength=K+1))
+    fold_bounds = {k: (int(fold_ends[k-1]), int(fold_ends[k])) for k in range(1, K+1)}
+    return order, fold_bounds
+
+
+# Cross-Validation
+def _run_fold(job):
+
+    with attached_data(job['handle']) as data:
+        return _train_fold(data, job)
+
+
+def _train_fold(data, job):
+
+    fold_num = job['fold_num']
+
+    if fold_num == 0:
+        train_data = data
+        test_data = None
+    else:
+        start, end = job['fold_bounds'][fold_num]
+        train_data = {
+            'variable_names': data['variable_names'],
+            'outcome_name': data['outcome_name'],
+        }
+        test_data = {}
+        for field_name in ['X', 'Y', 'sample_weights']:
+            values = data[field_name]
+            # the test set is a view; the training set is materialized once here since create_slim_ip forms Y * X anyway
+            test_data[field_name] = values[start:end]
+            train_data[field_name] = np.concatenate((values[:start], values[end:]), axis=0)
+
+    slim_IP, slim_info, fold_results = train_slim(train_data,
+                                                  slim_settings=job['slim_settings'],
+                                                  timelimit=job['timelimit'],
+                                                  threads=job['threads'],
+                                                  check_solution=job['check_solution'])
+
+    has_solution = slim_IP.solution.is_primal_feasible()
+    fold_results['pretty_model'] = str(fold_results['pretty_model'])
+    fold_results['fold_num'] = fold_num
+    fold_results['n_train'] = train_data['X'].shape[0]
+    fold_results['n_test'] = 0 if test_data is None else test_data['X'].shape[0]
+
+    if has_solution:
+        accuracy_data = {'X': train_data['X'], 'Y': train_data['Y'], 'sample_weights': train_data['sample_weights']}
+        if test_data is not None:
+            accuracy_data['X_test'] = test_data['X']
+            accuracy_data['Y_test'] = test_data['Y']
+            accuracy_data['sample_weights_test'] = test_data['sample_weights']
+        fold_results.update(get_accuracy_stats(fold_results['rho'], accuracy_data))
+
+    return fold_results
+
+
+def run_cross_validation(data, fold_idx, slim_settings = None, timelimit = 300, n_workers = None, threads = 1, check_solution = True, shared_dir = None):
+    """
+    Trains SLIM on the full dataset and on each of the K training folds in parallel workers.
+    The data are published to shared memory once (see publish_data); workers attach to it without copying or pickling X.
+
+    Parameters
+    ----------
+    data                dictionary produced by load_data_from_csv (with fold_num = 0)
+    fold_idx            N x 1 numpy.ndarray of fold indices between 1 to K (see load_folds_from_csv)
+    slim_settings       dictionary of keyword arguments for get_slim_input (max_coef, c0_value, max_size, max_offset, integer_loss)
+    timelimit           time limit for each solve (in seconds); set as -1 for no time limit
+    n_workers           number of worker processes; defaults to the number of CPUs
+    threads             number of CPLEX threads used by each worker
+    check_solution      set to True to run check_slim_ip_solution on each solution
+    shared_dir          directory for the shared data; defaults to /dev/shm if it exists
+
+    Returns
+    -------
+    list of K + 1 dictionaries, one for the full model (fold_num = 0) and one for each fold,
+    each containing the output of get_slim_summary and get_accuracy_stats
+    """
+    fold_idx = np.asarray(fold_idx).flatten().astype(int)
+    assert len(fold_idx) == data['X'].shape[0], 'fold_idx should contain N elements'
+    K = int(np.max(fold_idx))
+    assert np.all(np.unique(fold_idx) == np.arange(1, K+1)), 'folds should contain indices between 1 to %r' % K
+
+    if slim_settings is None:
+        slim_settings = {}
+
+    order, fold_bounds = _get_fold_bounds(fold_idx)
+
+    # rows are stored in order of their fold index so that the test set for each fold is a view
+    with shared_data(data, row_order=order, shared_dir=shared_dir) as handle:
+        jobs = [{'handle': handle,
+                 'fold_num': fold_num,
+                 'fold_bounds': fold_bounds,
+                 'slim_settings': slim_settings,
+                 'timelimit': timelimit,
+                 'threads': threads,
+                 'check_solution': check_solution}
+                for fold_num in range(0, K+1)]
+
+        pool = Pool(processes=n_workers)
+        try:
+            results = pool.map(_run_fold, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+    return results
@@ -0,0 +1,151 @@
+import hashlib
+import warnings
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class DataValidator(object):
+    """
+    Checks training data for binary classification in a single pass over chunks of rows.
+    Each call to update() only allocates temporaries of the size of the chunk, so the
+    validator can be used on in-memory data (see check_data) or on chunks as they are parsed.
+
+    validator = DataValidator(variable_names)
+    for X_chunk, Y_chunk in chunks:
+        validator.update(X_chunk, Y_chunk)
+    summary = validator.check()
+    """
+
+    def __init__(self, variable_names, intercept_name = '(Intercept)', count_duplicates = True):
+
+        self.variable_names = list(variable_names)
+        self.P = len(self.variable_names)
+        self.intercept_idx = self.variable_names.index(intercept_name) if intercept_name in self.variable_names else None
+        self.count_duplicates = count_duplicates
+
+        self.N = 0
+        self.N_pos = 0
+        self.N_neg = 0
+        self.n_nan = 0
+        self.n_inf = 0
+        self.n_invalid_labels = 0
+        self.n_duplicate_rows = 0
+        self.column_min = np.repeat(np.inf, self.P)
+        self.column_max = np.repeat(-np.inf, self.P)
+        self.integer_column_flags = np.ones(self.P, dtype = bool)
+        self._row_digests = set()
+
+        self.has_sample_weights = False
+        self.n_nonpositive_weights = 0
+        self.sample_weights_min = np.inf
+        self.sample_weights_max = -np.inf
+
+    def update(self, X, Y, sample_weights = None):
+
+        X = np.asarray(X)
+        Y = np.ravel(Y)
+        n = X.shape[0]
+        assert X.ndim == 2 and X.shape[1] == self.P, 'X chunk should have %d columns' % self.P
+        assert len(Y) == n, 'dimension mismatch. Y must contain as many entries as X. Need len(Y) = N.'
+
+        if n == 0:
+            return self
+
+        # feature matrix
+        if np.issubdtype(X.dtype, np.floating):
+            finite = np.isfinite(X)
+            if not finite.all():
+                bad = X[~finite]
+                self.n_nan += int(np.count_nonzero(np.isnan(bad)))
+                self.n_inf += int(np.count_nonzero(np.isinf(bad)))
+                X = np.where(finite, X, 0.0)
+            self.integer_column_flags &= np.all(np.floor(X) == X, axis = 0)
+        elif not np.issubdtype(X.dtype, np.integer) and X.dtype != bool:
+            raise AssertionError('X should contain numeric entries')
+
+        self.column_min = np.fmin(self.column_min, X.min(axis = 0))
+        self.column_max = np.fmax(self.column_max, X.max(axis = 0))
+
+        if self.count_duplicates:
+            # rows are compared by the SHA-1 digest of their bytes (20 bytes per distinct row; collisions are negligible)
+            # adding 0.0 maps -0.0 to 0.0 so that equal rows have equal bytes
+            X_rows = X + 0.0 if np.issubdtype(X.dtype, np.floating) else X
+            rows = np.ascontiguousarray(X_rows).view(np.dtype((np.void, X_rows.dtype.itemsize * self.P))).ravel()
+            n_seen = len(self._row_digests)
+            self._row_digests.update(hashlib.sha1(row).digest() for row in rows.tolist())
+            self.n_duplicate_rows += n - (len(self._row_digests) - n_seen)
+
+        # labels
+        n_pos = int(np.count_nonzero(Y == 1))
+        n_neg = int(np.count_nonzero(Y == -1))
+        self.N_pos += n_pos
+        self.N_neg += n_neg
+        self.n_invalid_labels += n - n_pos - n_neg
+
+        # sample weights
+        if sample_weights is not None:
+            sample_weights = np.ravel(sample_weights)
+            assert len(sample_weights) == n, 'sample_weights should contain N elements'
+            self.has_sample_weights = True
+            self.n_nonpositive_weights += int(np.count_nonzero(~(sample_weights > 0)))
+            self.sample_weights_min = min(self.sample_weights_min, np.min(sample_weights))
+            self.sample_weights_max = max(self.sample_weights_max, np.max(sample_weights))
+
+        self.N += n
+        return self
+
+    def summary(self):
+        """
+        returns summary statistics of the data seen so far
+        """
+        binary_column_flags = self.integer_column_flags & (self.column_min >= 0) & (self.column_max <= 1)
+        return {
+            'N': self.N,
+            'P': self.P,
+            'N_pos': self.N_pos,
+            'N_neg': self.N_neg,
+            'column_min': self.column_min,
+            'column_max': self.column_max,
+            'constant_column_flags': self.column_min == self.column_max,
+            'binary_column_flags': binary_column_flags,
+            'integer_column_flags': np.copy(self.integer_column_flags),
+            'binary_data_flag': bool(np.all(binary_column_flags)),
+            'integer_data_flag': bool(np.all(self.integer_column_flags)),
+            'n_duplicate_rows': self.n_duplicate_rows if self.count_duplicates else float('nan'),
+            'sample_weights_min': self.sample_weights_min if self.has_sample_weights else float('nan'),
+            'sample_weights_max': self.sample_weights_max if self.has_sample_weights else float('nan'),
+        }
+
+    def check(self):
+        """
+        throws AssertionError if the data seen so far are not suitable for binary classification
+        (see check_data) and returns summary statistics otherwise
+        """
+        assert self.N > 0, 'X matrix must have at least 1 row'
+        assert self.P > 0, 'X matrix must have at least 1 column'
+        assert self.n_nan == 0, 'X has nan entries'
+        assert self.n_inf == 0, 'X has inf entries'
+
+        # offset in feature matrix
+        if self.intercept_idx is not None:
+            assert self.column_min[self.intercept_idx] == 1.0 and self.column_max[self.intercept_idx] == 1.0, \
+                "'(Intercept)' column should only be composed of 1s"
+        else:
+            warnings.warn("there is no column named '(Intercept)' in variable_names")
+
+        # labels values
+        assert self.n_invalid_labels == 0, 'Need Y[i] = [-1,1] for all i.'
+        if self.N_neg == self.N:
+            warnings.warn('Y does not contain any positive examples. Need Y[i] = +1 for at least 1 i.')
+        if self.N_pos == self.N:
+            warnings.warn('Y does not contain any negative examples. Need Y[i] = -1 for at least 1 i.')
+
+        if self.has_sample_weights:
+            assert self.n_nonpositive_weights == 0, 'sample_weights[i] > 0 for all i '
+            # by default, we set sample_weights as an N x 1 array of ones. if not, then sample weights is non-trivial
+            if not (self.sample_weights_min == 1 and self.sample_weights_max == 1):
+                if self.sample_weights_min == self.sample_weights_max:
+                    warnings.warn('note: sample_weights only has <2 unique values')
+
+        return self.summary()
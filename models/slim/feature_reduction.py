@@ -0,0 +1,135 @@
+import numpy as np
+
+INTERCEPT_NAME = '(Intercept)'
+REDUCTION_CHUNK_SIZE = 256
+
+
+def _get_column_chunks(X, chunk_size = REDUCTION_CHUNK_SIZE):
+    """
+    yields (start, columns) where columns is a contiguous (chunk_size x N) array with the columns of X from start
+    """
+    P = X.shape[1]
+    for start in range(0, P, chunk_size):
+        yield start, np.ascontiguousarray(X[:, start:start + chunk_size].T)
+
+
+def get_redundant_features(data, intercept_bounds = None, chunk_size = REDUCTION_CHUNK_SIZE):
+    """
+    Finds columns of X that can be removed without changing the set of scores a model can produce.
+    Columns are hashed in a single pass; columns with matching hashes are compared exactly.
+
+    constant    column that takes the same value c for every sample (absorbed by the intercept)
+    duplicate   column that is identical to an earlier column
+    complement  binary column equal to 1 - x for an earlier binary column x (absorbed by the intercept and -x)
+
+    Constant and complement columns are only removed when data has an '(Intercept)' column, except for
+    columns of 0s, which are always removed. Other constant columns are only removed when c is an integer
+    and lies within intercept_bounds, so that c times an integer coefficient can be moved to the intercept;
+    constant columns that fail these conditions are kept. Removing redundant columns only excludes models that use
+    several columns from the same group, which are never needed unless the coefficient bounds are binding.
+
+    Parameters
+    ----------
+    data                dictionary produced by load_data_from_csv
+    intercept_bounds    (lb, ub) of the intercept (see get_intercept_bounds); if None, then only the value of c is checked
+    chunk_size          number of columns that are copied and hashed at a time
+
+    Returns
+    -------
+    feature_map     dictionary with the following keys
+                    variable_names      list of the P original variable names
+                    kept_ind            list of the indices of the columns that are kept
+                    dropped             dictionary mapping the name of each removed column to a tuple
+                                        (reason, name of the column that represents it or None)
+    """
+    X = data['X']
+    variable_names = list(data['variable_names'])
+    P = X.shape[1]
+    has_intercept = INTERCEPT_NAME in variable_names
+    intercept_lb, intercept_ub = (-np.inf, np.inf) if intercept_bounds is None else intercept_bounds
+
+    # hash of a column -> indices of kept columns with that hash (and their values to rule out collisions)
+    seen = {}
+    kept_columns = {}
+    kept_ind = []
+    dropped = {}
+
+    def find_match(key, values):
+        for k in seen.get(key, []):
+            if np.array_equal(values, kept_columns[k]):
+                return k
+        return None
+
+    for start, columns in _get_column_chunks(X, chunk_size):
+        for offset in range(columns.shape[0]):
+            j = start + offset
+            name = variable_names[j]
+            values = columns[offset]
+
+            if name != INTERCEPT_NAME and values.size > 0:
+                v_min, v_max = values.min(), values.max()
+                if v_min == v_max == 0:
+                    dropped[name] = ('constant', None)
+                    continue
+                if v_min == v_max and has_intercept and float(v_min).is_integer() and intercept_lb <= v_min <= intercept_ub:
+                    dropped[name] = ('constant', INTERCEPT_NAME)
+                    continue
+
+                key = hash(values.tobytes())
+                k = find_match(key, values)
+                if k is not None:
+                    dropped[name] = ('duplicate', variable_names[k])
+                    continue
+
+                is_binary = v_min >= 0 and v_max <= 1 and np.all((values == 0) | (values == 1))
+                if has_intercept and is_binary:
+                    complement = (1 - values).astype(values.dtype)
+                    k = find_match(hash(complement.tobytes()), complement)
+                    if k is not None:
+                        dropped[name] = ('complement', variable_names[k])
+                        continue
+
+                seen.setdefault(key, []).append(j)
+                kept_columns[j] = np.copy(values)
+
+            kept_ind.append(j)
+
+    feature_map = {
+        'variable_names': variable_names,
+        'kept_ind': kept_ind,
+        'dropped': dropped,
+    }
+    assert len(kept_ind) + len(dropped) == P
+    return feature_map
+
+
+def reduce_features(data, feature_map = None, intercept_bounds = None):
+    """
+    Removes redundant columns from data (see get_redundant_features; intercept_bounds is only used if feature_map is None)
+
+    Returns
+    -------
+    reduced_data    copy of data that only contains the kept columns of X (other fields are shared)
+    feature_map     mapping between the reduced and original columns (pass to expand_rho or print_slim_model)
+    """
+    if feature_map is None:
+        feature_map = get_redundant_features(data, intercept_bounds = intercept_bounds)
+
+    assert list(data['variable_names']) == feature_map['variable_names'], 'feature_map does not match the variable_names of data'
+    kept_ind = feature_map['kept_ind']
+
+    reduced_data = dict(data)
+    reduced_data['X'] = data['X'][:, kept_ind]
+    reduced_data['variable_names'] = [feature_map['variable_names'][j] for j in kept_ind]
+    return reduced_data, feature_map
+
+
+def expand_rho(rho, feature_map):
+    """
+    Maps a coefficient vector for the reduced columns to the original columns (removed columns get 0 points)
+    """
+    rho = np.asarray(rho).flatten()
+    assert len(rho) == len(feature_map['kept_ind']), 'rho should contain one value for each kept column'
+    full_rho = np.zeros(len(feature_map['variable_names']), dtype = rho.dtype)
+    full_rho[feature_map['kept_ind']] = rho
+    return full_rho
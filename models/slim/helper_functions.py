@@ -2,11 +2,13 @@ import os
 import sys
 import time
 import numpy as np
-import pandas as pd
 import logging
 import warnings
-from prettytable import PrettyTable
-from cplex.exceptions import CplexError
+from .data_validation import DataValidator, DEFAULT_CHUNK_SIZE
+from .feature_reduction import expand_rho
+from .instrumentation import StageTimer
+from .verification import verify_slim_solution
+from .scoring import SPLIT_NAMES, get_split_fields, score_splits
 
 # Logging
 def setup_logging(logger, log_to_console = True, log_file = None):
@@ -54,6 +56,24 @@ def print_log(msg, print_flag = True):
             print '%s | %r' % (time.strftime("%m/%d/%y @ %I:%M %p", time.localtime()), msg)
         sys.stdout.flush()
 
+def to_json_compatible(value):
+    """
+    converts numpy arrays and scalars in value (recursively) to types that can be written with json.dump
+    """
+    if isinstance(value, dict):
+        return {str(k): to_json_compatible(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [to_json_compatible(v) for v in value]
+    elif isinstance(value, np.ndarray):
+        return to_json_compatible(value.tolist())
+    elif isinstance(value, np.bool_):
+        return bool(value)
+    elif isinstance(value, np.integer):
+        return int(value)
+    elif isinstance(value, np.floating):
+        return float(value)
+    return value
+
 # Loading Settings
 def get_or_set_default(settings, setting_name, default_value, type_check = False, print_flag = False):
 
@@ -76,7 +96,7 @@ def get_or_set_default(settings, setting_name, default_value, type_check = False
     return settings
 
 # Loading and Checking Training Data
-def check_data(data):
+def check_data(data, chunk_size = DEFAULT_CHUNK_SIZE, return_summary = False):
     """
     makes sure that 'data' contains training data that is suitable for binary classification problems
     throws AssertionError if
@@ -92,19 +112,22 @@ def check_data(data):
      - 'outcome_name' string containing the name of the output (optional)
      - 'sample_weights' N x 1 vector of sample weights, must all be positive
 
+    chunk_size      number of rows that are checked at a time (bounds the size of temporary arrays)
+    return_summary  set to True to return summary statistics instead of True (see DataValidator.summary)
+
     Returns
     -------
-    True if data passes checks
+    True if data passes checks (or a dictionary of summary statistics if return_summary is True)
 
     """
     # type checks
     assert type(data) is dict, "data should be a dict"
 
     assert 'X' in data, "data should contain X matrix"
-    assert type(data['X']) is np.ndarray, "type(X) should be numpy.ndarray"
+    assert isinstance(data['X'], np.ndarray), "type(X) should be numpy.ndarray"
 
     assert 'Y' in data, "data should contain Y matrix"
-    assert type(data['Y']) is np.ndarray, "type(Y) should be numpy.ndarray"
+    assert isinstance(data['Y'], np.ndarray), "type(Y) should be numpy.ndarray"
 
     assert 'variable_names' in data, "data should contain variable_names"
     assert type(data['variable_names']) is list, "variable_names should be a list"
@@ -124,33 +147,22 @@ def check_data(data):
     assert len(list(set(data['variable_names']))) == len(data['variable_names']), 'variable_names is not unique'
     assert len(data['variable_names']) == P, 'len(variable_names) should be same as # of cols in X'
 
-    # feature matrix
-    assert np.all(~np.isnan(X)), 'X has nan entries'
-    assert np.all(~np.isinf(X)), 'X has inf entries'
-
-    # offset in feature matrix
-    if '(Intercept)' in variable_names:
-        assert all(X[:, variable_names.index('(Intercept)')] == 1.0), "'(Intercept)' column should only be composed of 1s"
-    else:
-        warnings.warn("there is no column named '(Intercept)' in variable_names")
-
-    # labels values
-    assert all((Y == 1) | (Y == -1)), 'Need Y[i] = [-1,1] for all i.'
-    if all(Y == 1):
-        warnings.warn('Y does not contain any positive examples. Need Y[i] = +1 for at least 1 i.')
-    if all(Y == -1):
-        warnings.warn('Y does not contain any negative examples. Need Y[i] = -1 for at least 1 i.')
-
     if 'sample_weights' in data:
         sample_weights = data['sample_weights']
-        type(sample_weights) is np.ndarray
+        assert isinstance(sample_weights, np.ndarray), "type(sample_weights) should be numpy.ndarray"
         assert len(sample_weights) == N, 'sample_weights should contain N elements'
-        assert all(sample_weights > 0), 'sample_weights[i] > 0 for all i '
+    else:
+        sample_weights = None
 
-        # by default, we set sample_weights as an N x 1 array of ones. if not, then sample weights is non-trivial
-        if not all(sample_weights == 1):
-            if len(np.unique(sample_weights)) < 2:
-                warnings.warn('note: sample_weights only has <2 unique values')
+    # values of X, Y and sample_weights are checked in one pass over chunks of rows
+    validator = DataValidator(variable_names, count_duplicates = return_summary)
+    for start in range(0, N, chunk_size):
+        end = min(start + chunk_size, N)
+        validator.update(X[start:end], Y[start:end], None if sample_weights is None else sample_weights[start:end])
+    summary = validator.check()
+
+    if return_summary:
+        return summary
 
     return True
 
@@ -195,14 +207,66 @@ def load_data_from_csv(dataset_csv_file, sample_weights_csv_file = None, fold_cs
 
     """
 
-    if os.path.isfile(dataset_csv_file):
-        df = pd.read_csv(dataset_csv_file, sep=',')
-    else:
+    if not os.path.isfile(dataset_csv_file):
         raise IOError('could not find dataset_csv_file: %s' % dataset_csv_file)
 
-    raw_data = df.as_matrix()
-    data_headers = list(df.columns.values)
+    return load_data_from_file(dataset_csv_file,
+                               sample_weights_csv_file = sample_weights_csv_file,
+                               fold_csv_file = fold_csv_file,
+                               fold_num = fold_num)
+
+def load_data_from_file(data_file, outcome_name = None, feature_names = None, sample_weights_csv_file = None, fold_csv_file = None, fold_num = 0):
+    """
+    Loads training data from a csv file or a columnar file, reading only the columns that are needed
+
+    Parameters
+    ----------
+    data_file                       file containing the training data, stored as a table with N rows and d+1 named columns
+                                    supported formats:
+                                    - .csv      (see load_data_from_csv)
+                                    - .npz      bundle with one array per column (see save_data_to_npz)
+                                    - .parquet  requires pyarrow
+                                    - .feather  requires pyarrow
+
+    outcome_name                    name of the column with the outcome variable; entries must be (-1,1) or (0,1)
+                                    if outcome_name is None, then we use the first column
+
+    feature_names                   list of names of the columns to use as input variables
+                                    if feature_names is None, then we use every column other than the outcome
+                                    only the outcome and these columns are read from disk
+
+    sample_weights_csv_file         see load_data_from_csv
+    fold_csv_file                   see load_data_from_csv
+    fold_num                        see load_data_from_csv
+
+    Returns
+    -------
+    dictionary containing training data for a binary classification problem (see load_data_from_csv)
+    """
+    if not os.path.isfile(data_file):
+        raise IOError('could not find data_file: %s' % data_file)
+
+    timer = StageTimer('load_data')
+    file_type = _get_data_file_type(data_file)
+    data_headers = _get_column_names(data_file, file_type)
+    timer.lap('read_header')
+
+    if outcome_name is None:
+        outcome_name = data_headers[0]
+
+    if feature_names is None:
+        feature_names = [n for n in data_headers if n != outcome_name]
+    else:
+        feature_names = list(feature_names)
+
+    missing_names = [n for n in [outcome_name] + feature_names if n not in data_headers]
+    if len(missing_names) > 0:
+        raise ValueError('data_file does not contain columns: %r' % missing_names)
+
+    data_headers = [outcome_name] + feature_names
+    raw_data = _read_columns(data_file, file_type, data_headers)
     N = raw_data.shape[0]
+    timer.lap('read_columns')
 
     # setup Y vector and Y_name
     Y_col_idx = [0]
@@ -223,6 +287,7 @@ def load_data_from_csv(dataset_csv_file, sample_weights_csv_file = None, fold_cs
         sample_weights = np.ones(N)
     else:
         if os.path.isfile(sample_weights_csv_file):
+            import pandas as pd
             sample_weights = pd.read_csv(sample_weights_csv_file, sep=',', header=None)
             sample_weights = sample_weights.as_matrix()
         else:
@@ -238,113 +303,206 @@ def load_data_from_csv(dataset_csv_file, sample_weights_csv_file = None, fold_cs
 
     #load folds
     if fold_csv_file is not None:
-        if not os.path.isfile(fold_csv_file):
-            raise IOError('could not find fold_csv_file: %s' % fold_csv_file)
-        else:
-            fold_idx = pd.read_csv(fold_csv_file, sep=',', header=None)
-            fold_idx = fold_idx.values.flatten()
-            K = max(fold_idx)
-            all_fold_nums = np.sort(np.unique(fold_idx))
-            assert len(fold_idx) == N, "dimension mismatch: read %r fold indices (expected N = %r)" % (len(fold_idx), N)
-            assert np.all(all_fold_nums == np.arange(1, K+1)), "folds should contain indices between 1 to %r" % K
-            assert fold_num in np.arange(0, K+1), "fold_num should either be 0 or an integer between 1 to %r" % K
-            if fold_num >= 1:
-                test_idx = fold_num == fold_idx
-                train_idx = fold_num != fold_idx
-                data['X'] = data['X'][train_idx,]
-                data['Y'] = data['Y'][train_idx]
-                data['sample_weights'] = data['sample_weights'][train_idx]
+        fold_idx = load_folds_from_csv(fold_csv_file, N)
+        K = max(fold_idx)
+        assert fold_num in np.arange(0, K+1), "fold_num should either be 0 or an integer between 1 to %r" % K
+        if fold_num >= 1:
+            test_idx = fold_num == fold_idx
+            train_idx = fold_num != fold_idx
+            data['X'] = data['X'][train_idx,]
+            data['Y'] = data['Y'][train_idx]
+            data['sample_weights'] = data['sample_weights'][train_idx]
+    timer.lap('setup_arrays')
 
     assert check_data(data)
+    timer.lap('check_data')
     return data
 
+DATA_FILE_TYPES = {
+    '.csv': 'csv',
+    '.npz': 'npz',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+}
+
+NPZ_COLUMNS_KEY = '__columns__'
+
+def _get_data_file_type(data_file):
+    ext = os.path.splitext(data_file)[1].lower()
+    if ext not in DATA_FILE_TYPES:
+        raise ValueError("data_file doesn't end with one of %r" % sorted(DATA_FILE_TYPES.keys()))
+    return DATA_FILE_TYPES[ext]
+
+def _import_pyarrow(file_type):
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('reading %s files requires the pyarrow package' % file_type)
+    return pyarrow
+
+def _get_column_names(data_file, file_type):
+    """
+    returns the names of the columns in data_file without reading the data
+    """
+    if file_type == 'csv':
+        import pandas as pd
+        return list(pd.read_csv(data_file, sep=',', nrows=0).columns.values)
+
+    if file_type == 'npz':
+        with np.load(data_file) as npz:
+            return [str(n) for n in npz[NPZ_COLUMNS_KEY]]
+
+    _import_pyarrow(file_type)
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(data_file).names)
+    else:
+        import pyarrow.ipc as ipc
+        return list(ipc.open_file(data_file).schema.names)
+
+def _read_columns(data_file, file_type, column_names):
+    """
+    returns an N x len(column_names) numpy.ndarray with the values of the given columns (in order)
+    """
+    if file_type == 'csv':
+        import pandas as pd
+        df = pd.read_csv(data_file, sep=',', usecols=column_names)
+        return df[column_names].values
+
+    if file_type == 'npz':
+        with np.load(data_file) as npz:
+            # each column is a separate member of the bundle, so only the selected columns are read
+            first_column = npz[column_names[0]]
+            columns = [first_column] + [npz[n] for n in column_names[1:]]
+        raw_data = np.empty(shape = (len(first_column), len(columns)), dtype = np.result_type(*columns))
+        for j, column in enumerate(columns):
+            raw_data[:, j] = column
+        return raw_data
+
+    _import_pyarrow(file_type)
+    if file_type == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(data_file, columns=column_names)
+    else:
+        import pyarrow.feather as feather
+        table = feather.read_table(data_file, columns=column_names)
+    return table.to_pandas()[column_names].values
+
+def save_data_to_npz(data, npz_file):
+    """
+    saves data produced by load_data_from_file as a .npz bundle with one array per column,
+    so that subsets of columns can be loaded without reading the others
+
+    the '(Intercept)' column is not saved since it is added when the data are loaded
+    """
+    Y = np.array(data['Y']).flatten()
+    columns = {data['outcome_name']: Y}
+    column_names = [data['outcome_name']]
+    for j, name in enumerate(data['variable_names']):
+        if name == '(Intercept)':
+            continue
+        columns[name] = data['X'][:, j]
+        column_names.append(name)
+
+    assert NPZ_COLUMNS_KEY not in columns
+    columns[NPZ_COLUMNS_KEY] = np.array(column_names)
+    np.savez(npz_file, **columns)
+
+def load_folds_from_csv(fold_csv_file, N):
+    """
+    Parameters
+    ----------
+    fold_csv_file                   csv file containing indices of folds for K-fold cross validation
+                                    fold indices stored as a table with N rows and 1 column
+                                    folds must be integers between 1 to K
+
+    N                               number of samples in the training data
+
+    Returns
+    -------
+    N x 1 numpy.ndarray of fold indices between 1 to K
+    """
+    if not os.path.isfile(fold_csv_file):
+        raise IOError('could not find fold_csv_file: %s' % fold_csv_file)
+
+    import pandas as pd
+    fold_idx = pd.read_csv(fold_csv_file, sep=',', header=None)
+    fold_idx = fold_idx.values.flatten()
+    K = max(fold_idx)
+    all_fold_nums = np.sort(np.unique(fold_idx))
+    assert len(fold_idx) == N, "dimension mismatch: read %r fold indices (expected N = %r)" % (len(fold_idx), N)
+    assert np.all(all_fold_nums == np.arange(1, K+1)), "folds should contain indices between 1 to %r" % K
+    return fold_idx
+
+def get_one_hot_groups(data, delimiters = ('_eq_', '_')):
+    """
+    Finds groups of columns that encode the levels of a categorical variable, such as
+    'odor_eq_none', 'odor_eq_foul', ... in mushroom or 'Age_leq_21', 'Age_22_to_29', ... in adult
+
+    Columns are grouped by the part of their name before the first delimiter that appears in it
+    (delimiters are tried in order). A group is kept only if its columns are binary and at most
+    one of them is 1 in every row.
+
+    Returns
+    -------
+    dictionary mapping the name of each group to a list of the variable names in the group
+    """
+    candidates = {}
+    for j, name in enumerate(data['variable_names']):
+        if name == '(Intercept)':
+            continue
+        for delimiter in delimiters:
+            if delimiter in name and not name.startswith(delimiter):
+                candidates.setdefault(name.split(delimiter)[0], []).append(j)
+                break
+
+    groups = {}
+    for group_name, group_ind in candidates.items():
+        if len(group_ind) < 2:
+            continue
+        X_group = data['X'][:, group_ind]
+        if np.all((X_group == 0) | (X_group == 1)) and np.max(np.sum(X_group, axis = 1)) <= 1:
+            groups[group_name] = [data['variable_names'][j] for j in group_ind]
+
+    return groups
+
 # Check IP Solution
-def check_slim_ip_solution(slim_mip, slim_info, data):
-
-    #TODO skip tests if there is no solution
-    #TODO return true to prove that it's passed tests
-    #TODO (optional) collect warnings and return those?
-
-    #MIP related sanity checks
-    assert len(slim_mip.solution.get_values()) == slim_info['n_variables']
-
-    #setup function handles for convenient checking
-    get_L0_norm = lambda x: np.sum(np.count_nonzero(x[slim_info['L0_reg_ind']]))
-
-    #key variables
-    rho = np.array(slim_mip.solution.get_values(slim_info['rho_idx']))
-    alpha = np.array(slim_mip.solution.get_values(slim_info['alpha_idx']))
-    beta = np.array(slim_mip.solution.get_values(slim_info['beta_idx']))
-    err = np.array(slim_mip.solution.get_values(slim_info['error_idx']))
-
-    #auxiliary variables
-    total_error = np.array(slim_mip.solution.get_values(slim_info['total_error_idx']))
-    total_error_pos = np.array(slim_mip.solution.get_values(slim_info['total_error_pos_idx']))
-    total_error_neg = np.array(slim_mip.solution.get_values(slim_info['total_error_neg_idx']))
-    total_l0_norm = np.array(slim_mip.solution.get_values(slim_info['total_l0_norm_idx']))
-
-    # helper parameters
-    L0_reg_ind = slim_info['L0_reg_ind']
-    L1_reg_ind = slim_info['L1_reg_ind']
-    rho_L0_reg = rho[L0_reg_ind]
-    rho_L1_reg = rho[L1_reg_ind]
-
-    # test on coefficient vector
-    #assert len(rho) == len(coef_constraints), 'rho has the wrong length'
-    assert all(rho <= slim_info['rho_ub']), 'rho exceeds upper bounds'
-    assert all(rho >= slim_info['rho_lb']), 'rho exceeds lower bounds'
-
-    # tests on L0 indicator variables
-    assert all((alpha == 0)|(alpha == 1)), 'alpha should be binary'
-    assert all(abs(rho_L0_reg[alpha == 0]) == 0.0), 'alpha = 0 should => that rho == 0'
-    assert all(abs(rho_L0_reg[alpha == 1]) > 0.0), 'alpha = 1 should => that rho != 0'
-
-    # tests on L1 helper variables
-    assert all(abs(rho_L1_reg) == beta), 'beta != abs(rho)'
-
-    # tests on L1 helper variables
-    # beta_ub_reg = np.maximum(abs(slim_info['rho_ub'][L1_reg_ind]), abs(slim_info['rho_lb'][L1_reg_ind]))
-    # beta_lb_reg = np.zeros_like(beta_ub_reg)
-    # beta_lb_reg = np.maximum(beta_lb_reg, slim_info['rho_lb'][L1_reg_ind])
-    # beta_lb_reg = -np.minimum(beta_lb_reg, slim_info['rho_ub'][L1_reg_ind])
-    # beta_lb_reg = abs(beta_lb_reg)
-    #assert all(beta >= beta_lb_reg), 'beta should be <= beta_ub'
-    #assert all(beta <= beta_ub_reg), 'beta should be >= beta_lb'
-
-    # L0-norm bounds
-    expected_l0_norm = get_L0_norm(rho)
-    assert sum(alpha) == expected_l0_norm, 'alpha should := 1[rho != 0]'
-    assert total_l0_norm == expected_l0_norm
-    assert sum(alpha) >= slim_info['L0_min']
-    assert sum(alpha) <= slim_info['L0_max']
-    assert total_l0_norm >= slim_info['L0_min']
-    assert total_l0_norm <= slim_info['L0_max']
-    assert expected_l0_norm >= slim_info['L0_min']
-    assert expected_l0_norm <= slim_info['L0_max']
-
-    # aggregate error measure tests
-    expected_scores = (data['Y'] * data['X']).dot(rho)
-    expected_err_values = expected_scores <= slim_info['epsilon']
-    assert all((err == 0) | (err == 1)), 'err should be binary'
-    assert all(err == expected_err_values), 'error vector is not == sign(XY.dot(rho) + epsilon)'
-    assert total_error == sum(err), 'total_error should == sum(error(i))'
-    assert total_error == total_error_pos + total_error_neg, 'total_error should == total_error_pos + total_error_neg'
-    assert total_error_pos == sum(err[slim_info['pos_ind']])
-    assert total_error_neg == sum(err[slim_info['neg_ind']])
-    assert all(-expected_scores <= slim_info['M']), 'Big M is not big enough'
-
-    # extra sanity check tests
-    assert total_error <= min(slim_info['N_pos'], slim_info['N_neg']), 'total_error should be less than total_error_pos + total_error_neg'
+def check_slim_ip_solution(slim_mip, slim_info, data, tolerance = None):
+    """
+    Checks that the solution of a SLIM IP is consistent with the data (throws AssertionError otherwise)
+
+    Parameters
+    ----------
+    slim_mip        cplex.Cplex object with a solution
+    slim_info       dictionary produced by create_slim_ip
+    data            dictionary with the training data used to create slim_mip
+    tolerance       see verify_slim_solution
+
+    Returns
+    -------
+    report produced by verify_slim_solution
+    """
+    report = verify_slim_solution(slim_mip.solution.get_values(), slim_info, data, tolerance = tolerance)
+    assert report['passed'], '; '.join(report['failures'])
+    return report
 
 # Print Scoring System
-def print_slim_model(rho, data, show_omitted_variables = False):
+def print_slim_model(rho, data, show_omitted_variables = False, feature_map = None):
 
     rho_values = np.copy(rho)
     rho_names = list(data['variable_names'])
 
+    if feature_map is not None:
+        # report models trained on reduced data (see reduce_features) in terms of the original variables
+        if len(rho_values) == len(feature_map['kept_ind']):
+            rho_values = expand_rho(rho_values, feature_map)
+        rho_names = list(feature_map['variable_names'])
+        data = {'variable_names': rho_names, 'outcome_name': data['outcome_name']}
+
     if '(Intercept)' in rho_names:
         intercept_ind = data['variable_names'].index('(Intercept)')
-        intercept_val = int(rho[intercept_ind])
+        intercept_val = int(rho_values[intercept_ind])
         rho_values = np.delete(rho_values, intercept_ind)
         rho_names.remove('(Intercept)')
     else:
@@ -373,6 +531,7 @@ def print_slim_model(rho, data, show_omitted_variables = False):
     max_name_col_length = max(len(predict_string), len(total_string), max([len(s) for s in rho_names])) + 2
     max_value_col_length = max(7, max([len(s) for s in rho_values_string]) + len("points")) + 2
 
+    from prettytable import PrettyTable
     m = PrettyTable()
     m.field_names = ["Variable", "Points", "Tally"]
 
@@ -394,7 +553,8 @@ def print_slim_model(rho, data, show_omitted_variables = False):
 def get_model_summary(rho, slim_info, data):
 
     #build a pretty table model
-    printed_model = print_slim_model(rho, data, show_omitted_variables = False)
+    feature_map = slim_info.get('feature_map')
+    printed_model = print_slim_model(rho, data, show_omitted_variables = False, feature_map = feature_map)
 
     #transform Y
     y = np.array(data['Y'].flatten(), dtype = np.float)
@@ -428,6 +588,9 @@ def get_model_summary(rho, slim_info, data):
         'L0_norm': np.sum(rho[slim_info['L0_reg_ind']]),
     }
 
+    if feature_map is not None:
+        rho_summary['rho'] = expand_rho(rho, feature_map)
+
     return rho_summary
 
 def get_slim_summary(slim_mip, slim_info, data):
@@ -439,8 +602,8 @@ def get_slim_summary(slim_mip, slim_info, data):
         'solution_status_code': slim_mip.solution.get_status(),
         'solution_status': slim_mip.solution.get_status_string(slim_mip.solution.get_status()),
         'objective_value': slim_mip.solution.get_objective_value(),
-        'optimality_gap': slim_mip.solution.MIP.get_best_objective(),
-        'objval_lowerbound': slim_mip.solution.MIP.get_mip_relative_gap(),
+        'optimality_gap': slim_mip.solution.MIP.get_mip_relative_gap(),
+        'objval_lowerbound': slim_mip.solution.MIP.get_best_objective(),
         'simplex_iterations': slim_mip.solution.progress.get_num_iterations(),
         'nodes_processed': slim_mip.solution.progress.get_num_nodes_processed(),
         'nodes_remaining': slim_mip.solution.progress.get_num_nodes_remaining(),
@@ -461,6 +624,7 @@ def get_slim_summary(slim_mip, slim_info, data):
     }
 
     #Update with Solution-Based Stats
+    from cplex.exceptions import CplexError
     try:
         rho = np.array(slim_mip.solution.get_values(slim_info['rho_idx']))
         slim_summary.update(get_model_summary(rho, slim_info, data))
@@ -469,98 +633,39 @@ def get_slim_summary(slim_mip, slim_info, data):
 
     return slim_summary
 
-def get_accuracy_stats(model, data, error_checking = True):
-
-    accuracy_stats = {
-        'train_true_positives': float('nan'),
-        'train_true_negatives':  float('nan'),
-        'train_false_positives':  float('nan'),
-        'train_false_negatives':  float('nan'),
-        'valid_true_positives': float('nan'),
-        'valid_true_negatives': float('nan'),
-        'valid_false_positives': float('nan'),
-        'valid_false_negatives': float('nan'),
-        'test_true_positives': float('nan'),
-        'test_true_negatives': float('nan'),
-        'test_false_positives': float('nan'),
-        'test_false_negatives': float('nan'),
-    }
+def get_accuracy_stats(model, data, error_checking = True, use_sample_weights = True):
+    """
+    Computes the true/false positives/negatives of model on the training, validation and test sets in data
+    (stats for missing sets are NaN). Each set is scored in one pass over chunks of its rows (see score_splits).
 
-    def get_prediction(x, rho): return np.sign(x.dot(rho))
-    def get_true_positives_from_pred(yhat, pos_ind): return np.sum(yhat[pos_ind] == 1)
-    def get_false_positives_from_pred(yhat, pos_ind): return np.sum(yhat[~pos_ind] == 1)
-    def get_true_negatives_from_pred(yhat, pos_ind): return np.sum(yhat[~pos_ind] != 1)
-    def get_false_negatives_from_pred(yhat, pos_ind): return np.sum(yhat[pos_ind] != 1)
-
-    model = np.array(model).reshape(data['X'].shape[1], 1)
-
-    # training set
-    data_prefix = 'train'
-    X_field_name = 'X'
-    Y_field_name = 'Y'
-    Yhat = get_prediction(data['X'], model)
-    pos_ind = data[Y_field_name] == 1
-
-    accuracy_stats[data_prefix + '_' + 'true_positives'] = get_true_positives_from_pred(Yhat, pos_ind)
-    accuracy_stats[data_prefix + '_' + 'true_negatives'] = get_true_negatives_from_pred(Yhat, pos_ind)
-    accuracy_stats[data_prefix + '_' + 'false_positives'] = get_false_positives_from_pred(Yhat, pos_ind)
-    accuracy_stats[data_prefix + '_' + 'false_negatives'] = get_false_negatives_from_pred(Yhat, pos_ind)
-
-    if error_checking:
-        N_check = (accuracy_stats[data_prefix + '_' + 'true_positives'] +
-                   accuracy_stats[data_prefix + '_' + 'true_negatives'] +
-                   accuracy_stats[data_prefix + '_' + 'false_positives'] +
-                   accuracy_stats[data_prefix + '_' + 'false_negatives'])
-        assert data[X_field_name].shape[0] == N_check
-
-    # validation set
-    data_prefix = 'valid'
-    X_field_name = 'X' + '_' + data_prefix
-    Y_field_name = 'Y' + '_' + data_prefix
-    has_validation_set = (X_field_name in data and
-                          Y_field_name in data and
-                          data[X_field_name].shape[0] > 0 and
-                          data[Y_field_name].shape[0] > 0)
-
-    if has_validation_set:
-
-        Yhat = get_prediction(data[X_field_name], model)
-        pos_ind = data[Y_field_name] == 1
-        accuracy_stats[data_prefix + '_' + 'true_positives'] = get_true_positives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'true_negatives'] = get_true_negatives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'false_positives'] = get_false_positives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'false_negatives'] = get_false_negatives_from_pred(Yhat, pos_ind)
+    Parameters
+    ----------
+    model               coefficient vector (P x 1)
+    data                dictionary with X and Y, and (optionally) X_valid, Y_valid, X_test, Y_test
+                        and sample weights for each set (sample_weights, sample_weights_valid, sample_weights_test)
+    error_checking      set to True to check that the counts add up to the number (or total weight) of points
+    use_sample_weights  set to True to weight each point by its sample weight (if the set has sample weights)
 
-        if error_checking:
-            N_check = (accuracy_stats[data_prefix + '_' + 'true_positives'] +
-                       accuracy_stats[data_prefix + '_' + 'true_negatives'] +
-                       accuracy_stats[data_prefix + '_' + 'false_positives'] +
-                       accuracy_stats[data_prefix + '_' + 'false_negatives'])
-            assert data[X_field_name].shape[0] == N_check
-
-    # test set
-    data_prefix = 'test'
-    X_field_name = 'X' + '_' + data_prefix
-    Y_field_name = 'Y' + '_' + data_prefix
-    has_test_set = (X_field_name in data and
-                    Y_field_name in data and
-                    data[X_field_name].shape[0] > 0 and
-                    data[Y_field_name].shape[0] > 0)
-
-    if has_test_set:
-
-        Yhat = get_prediction(data[X_field_name], model)
-        pos_ind = data[Y_field_name] == 1
-        accuracy_stats[data_prefix + '_' + 'true_positives'] = get_true_positives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'true_negatives'] = get_true_negatives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'false_positives'] = get_false_positives_from_pred(Yhat, pos_ind)
-        accuracy_stats[data_prefix + '_' + 'false_negatives'] = get_false_negatives_from_pred(Yhat, pos_ind)
+    Returns
+    -------
+    dictionary with <set>_true_positives, <set>_true_negatives, <set>_false_positives and <set>_false_negatives
+    """
+    stat_names = ['true_positives', 'true_negatives', 'false_positives', 'false_negatives']
+    accuracy_stats = {split_name + '_' + stat_name: float('nan') for split_name in SPLIT_NAMES for stat_name in stat_names}
+
+    model = np.array(model).reshape(1, data['X'].shape[1])
+    split_counts = score_splits(model, data, split_names = SPLIT_NAMES, use_sample_weights = use_sample_weights)
+
+    for split_name, counts in split_counts.items():
+        for stat_name in stat_names:
+            accuracy_stats[split_name + '_' + stat_name] = counts[stat_name][0]
 
         if error_checking:
-            N_check = (accuracy_stats[data_prefix + '_' + 'true_positives'] +
-                       accuracy_stats[data_prefix + '_' + 'true_negatives'] +
-                       accuracy_stats[data_prefix + '_' + 'false_positives'] +
-                       accuracy_stats[data_prefix + '_' + 'false_negatives'])
-            assert data[X_field_name].shape[0] == N_check
+            X_field_name, _, weights_field_name = get_split_fields(data, split_name)
+            N_check = sum(counts[stat_name][0] for stat_name in stat_names)
+            if use_sample_weights and weights_field_name in data:
+                assert np.isclose(np.sum(data[weights_field_name]), N_check)
+            else:
+                assert data[X_field_name].shape[0] == N_check
 
     return accuracy_stats
@@ -0,0 +1,176 @@
+import os
+import time
+import json
+import hashlib
+import numpy as np
+
+MANIFEST_FORMAT_VERSION = 1
+SLIM_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Hashing
+def get_file_hash(file_name, block_size = 1 << 20):
+    """
+    Returns the SHA-256 digest of a file on disk (read in blocks to keep memory flat)
+    """
+    h = hashlib.sha256()
+    with open(file_name, 'rb') as fh:
+        block = fh.read(block_size)
+        while block:
+            h.update(block)
+            block = fh.read(block_size)
+    return h.hexdigest()
+
+def get_code_version(extra_files = None):
+    """
+    Returns a digest of the source code that produces SLIM IP instances.
+    This covers every module in the slim package as well as any extra_files
+    (e.g. the script that calls create_slim_ip), so that editing the formulation
+    invalidates cached instances.
+    """
+    file_names = sorted([os.path.join(SLIM_PACKAGE_DIR, f) for f in os.listdir(SLIM_PACKAGE_DIR) if f.endswith('.py')])
+    if extra_files is not None:
+        file_names += [os.path.abspath(f) for f in extra_files]
+
+    h = hashlib.sha256()
+    for file_name in file_names:
+        h.update(os.path.basename(file_name).encode('utf-8'))
+        h.update(get_file_hash(file_name).encode('utf-8'))
+    return h.hexdigest()
+
+def _update_hash(h, value):
+
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        h.update(('ndarray|%s|%r|' % (value.dtype.str, value.shape)).encode('utf-8'))
+        h.update(value.tobytes())
+
+    elif hasattr(value, 'variable_names') and hasattr(value, 'ub') and hasattr(value, 'lb'):
+        # CoefficientSet
+        h.update('CoefficientSet|'.encode('utf-8'))
+        for field_name in ['variable_names', 'vtype', 'sign', 'lb', 'ub', 'C_0j']:
+            h.update(('%s|' % field_name).encode('utf-8'))
+            _update_hash(h, np.array(getattr(value, field_name)))
+        _update_hash(h, getattr(value, 'groups', {}))
+
+    elif isinstance(value, (list, tuple)):
+        h.update(('list|%d|' % len(value)).encode('utf-8'))
+        for v in value:
+            _update_hash(h, v)
+
+    elif isinstance(value, dict):
+        h.update(('dict|%d|' % len(value)).encode('utf-8'))
+        for k in sorted(value.keys()):
+            h.update(('%s|' % k).encode('utf-8'))
+            _update_hash(h, value[k])
+
+    else:
+        h.update(('%s|%r|' % (type(value).__name__, value)).encode('utf-8'))
+
+def get_instance_fingerprint(data_hash, slim_input, code_version):
+    """
+    Computes a fingerprint for a SLIM IP instance
+
+    Parameters
+    ----------
+    data_hash           digest of the training data file (see get_file_hash)
+    slim_input          dictionary passed to create_slim_ip (including coef_constraints)
+    code_version        digest of the source code (see get_code_version)
+
+    Returns
+    -------
+    hex string that changes whenever the data, parameters, coefficient constraints or code change
+    """
+    h = hashlib.sha256()
+    h.update(('slim-instance|%d|' % MANIFEST_FORMAT_VERSION).encode('utf-8'))
+    h.update(('data|%s|' % data_hash).encode('utf-8'))
+    h.update(('code|%s|' % code_version).encode('utf-8'))
+    _update_hash(h, slim_input)
+    return h.hexdigest()
+
+def get_instance_parameters(slim_input):
+    """
+    Returns the scalar parameters in slim_input as a JSON-serializable dictionary (for manifests)
+    """
+    parameters = {}
+    for k in sorted(slim_input.keys()):
+        v = slim_input[k]
+        if isinstance(v, (bool, np.bool_)):
+            parameters[k] = bool(v)
+        elif isinstance(v, (int, float, np.integer, np.floating)):
+            parameters[k] = float(v)
+        elif isinstance(v, str):
+            parameters[k] = v
+    return parameters
+
+# Manifest
+def load_manifest(manifest_file):
+
+    if not os.path.isfile(manifest_file):
+        return {'format_version': MANIFEST_FORMAT_VERSION, 'artifacts': {}}
+
+    with open(manifest_file, 'r') as fh:
+        manifest = json.load(fh)
+
+    if manifest.get('format_version') != MANIFEST_FORMAT_VERSION:
+        return {'format_version': MANIFEST_FORMAT_VERSION, 'artifacts': {}}
+
+    return manifest
+
+def save_manifest(manifest, manifest_file):
+
+    # write to a temporary file first so that an interrupted run never leaves a corrupt manifest
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w') as fh:
+        json.dump(manifest, fh, indent = 2, sort_keys = True)
+    os.rename(tmp_file, manifest_file)
+
+def _get_artifact_key(manifest_file, artifact_file):
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_file))
+    return os.path.relpath(os.path.abspath(artifact_file), manifest_dir)
+
+def is_instance_cached(manifest_file, artifact_files, fingerprint):
+    """
+    Returns True if every file in artifact_files exists, was produced by an instance with
+    the same fingerprint, and has not been modified since it was recorded in the manifest
+    """
+    manifest = load_manifest(manifest_file)
+
+    for artifact_file in artifact_files:
+
+        if not os.path.isfile(artifact_file):
+            return False
+
+        entry = manifest['artifacts'].get(_get_artifact_key(manifest_file, artifact_file))
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            return False
+
+        if os.path.getsize(artifact_file) != entry.get('size'):
+            return False
+
+        if get_file_hash(artifact_file) != entry.get('artifact_hash'):
+            return False
+
+    return True
+
+def record_instance(manifest_file, artifact_files, fingerprint, data_file, data_hash, slim_input, code_version):
+    """
+    Records the provenance of each file in artifact_files in the manifest
+    """
+    manifest = load_manifest(manifest_file)
+    entry = {
+        'fingerprint': fingerprint,
+        'data_file': os.path.abspath(data_file),
+        'data_hash': data_hash,
+        'code_version': code_version,
+        'parameters': get_instance_parameters(slim_input),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+    }
+
+    for artifact_file in artifact_files:
+        artifact_entry = dict(entry)
+        artifact_entry['size'] = os.path.getsize(artifact_file)
+        artifact_entry['artifact_hash'] = get_file_hash(artifact_file)
+        manifest['artifacts'][_get_artifact_key(manifest_file, artifact_file)] = artifact_entry
+
+    save_manifest(manifest, manifest_file)
+    return manifest
@@ -0,0 +1,82 @@
+import sys
+import time
+import json
+import logging
+import resource
+from contextlib import contextmanager
+
+STAGE_LOGGER_NAME = 'slim.stages'
+
+
+def get_peak_rss():
+    """
+    returns the peak resident set size of this process (in bytes)
+    """
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class StageTimer(object):
+    """
+    Records the wall time and peak RSS of each stage of a pipeline (e.g. load_data_from_file or create_slim_ip).
+    Each stage is logged as one line of JSON through the 'slim.stages' logger, which propagates to the
+    logger configured by setup_logging. Recording a stage only costs a call to time.time and getrusage.
+
+    timer = StageTimer('create_slim_ip')
+    ...                             # code for the first stage
+    timer.lap('bounds')             # records the time since the timer was created (or since the last lap)
+    with timer.stage('write'):      # records the time spent in the with-block
+        ...
+    timer.summary()
+    """
+
+    def __init__(self, pipeline, logger = None, level = logging.INFO):
+        self.pipeline = pipeline
+        self.logger = logger if logger is not None else logging.getLogger(STAGE_LOGGER_NAME)
+        self.level = level
+        self.stages = []
+        self.start_time = time.time()
+        self._lap_time = self.start_time
+        self._lap_rss = get_peak_rss()
+
+    def _record(self, stage_name, wall_time, start_rss):
+        peak_rss = get_peak_rss()
+        record = {
+            'pipeline': self.pipeline,
+            'stage': stage_name,
+            'wall_time': wall_time,
+            'peak_rss': peak_rss,
+            'peak_rss_increase': peak_rss - start_rss,
+        }
+        self.stages.append(record)
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(record, sort_keys = True))
+        return record
+
+    def lap(self, stage_name):
+        now = time.time()
+        record = self._record(stage_name, now - self._lap_time, self._lap_rss)
+        self._lap_time = now
+        self._lap_rss = record['peak_rss']
+        return record
+
+    @contextmanager
+    def stage(self, stage_name):
+        start_time = time.time()
+        start_rss = get_peak_rss()
+        yield
+        record = self._record(stage_name, time.time() - start_time, start_rss)
+        self._lap_time = time.time()
+        self._lap_rss = record['peak_rss']
+
+    def summary(self):
+        """
+        returns a dictionary with the wall time of each stage, the total wall time and the peak RSS
+        """
+        return {
+            'pipeline': self.pipeline,
+            'wall_time': {r['stage']: r['wall_time'] for r in self.stages},
+            'total_wall_time': time.time() - self.start_time,
+            'peak_rss': get_peak_rss(),
+        }
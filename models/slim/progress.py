@@ -0,0 +1,148 @@
+import os
+import json
+
+DEFAULT_PROGRESS_INTERVAL = 1.0
+PROGRESS_FIELDS = ['time', 'incumbent', 'bound', 'gap', 'nodes', 'nodes_remaining', 'iterations']
+
+
+# Solve Monitor
+_solve_monitor_callback_class = None
+
+
+def get_solve_monitor_callback_class():
+    """
+    Returns SolveMonitorCallback, a MIPInfoCallback that passes itself and the elapsed solve time (in seconds) to a list of handlers.
+    CPLEX only runs one MIPInfoCallback per problem, so every handler that needs information during
+    the solve (e.g. CheckpointWriter and ProgressRecorder) shares this callback.
+    Each handler implements update(cb, elapsed_time) and should return quickly when it has nothing to do.
+
+    The class is created on first use so that importing slim does not import cplex.
+    """
+    global _solve_monitor_callback_class
+    if _solve_monitor_callback_class is None:
+        from cplex.callbacks import MIPInfoCallback
+
+        class SolveMonitorCallback(MIPInfoCallback):
+
+            def initialize(self, handlers):
+                self.handlers = list(handlers)
+                self.start_time = None
+
+            def __call__(self):
+                if self.start_time is None:
+                    self.start_time = self.get_start_time()
+                elapsed_time = self.get_time() - self.start_time
+                for handler in self.handlers:
+                    handler.update(self, elapsed_time)
+
+        _solve_monitor_callback_class = SolveMonitorCallback
+
+    return _solve_monitor_callback_class
+
+
+def add_solve_monitor(slim_IP, handlers):
+    """
+    registers a SolveMonitorCallback with handlers for slim_IP (replaces any MIPInfoCallback that was registered before)
+    """
+    cb = slim_IP.register_callback(get_solve_monitor_callback_class())
+    cb.initialize(handlers)
+    return cb
+
+
+# Progress Recording
+class ProgressRecorder(object):
+    """
+    Records the incumbent objective value, best bound, relative gap, nodes and simplex iterations
+    at most once every sample_interval seconds during the solve (see SolveMonitorCallback).
+    Also records the time of the first incumbent and the bound at the root node, which are not sampled.
+
+    recorder = ProgressRecorder()
+    add_solve_monitor(slim_IP, [recorder])
+    slim_IP.solve()
+    recorder.finalize(slim_IP, elapsed_time)
+    recorder.save('progress.json')
+    """
+
+    def __init__(self, sample_interval = DEFAULT_PROGRESS_INTERVAL, time_offset = 0.0):
+        self.sample_interval = float(sample_interval)
+        self.time_offset = float(time_offset)
+        self.next_sample_time = 0.0
+        self.samples = {field_name: [] for field_name in PROGRESS_FIELDS}
+        self.first_incumbent_time = None
+        self.root_bound = None
+        self._at_root = True
+
+    def _add_sample(self, elapsed_time, incumbent, bound, gap, nodes, nodes_remaining, iterations):
+        sample = [self.time_offset + elapsed_time, incumbent, bound, gap, nodes, nodes_remaining, iterations]
+        for field_name, value in zip(PROGRESS_FIELDS, sample):
+            self.samples[field_name].append(value)
+
+    def update(self, cb, elapsed_time):
+
+        if self._at_root:
+            if cb.get_num_nodes() == 0:
+                self.root_bound = cb.get_best_objective_value()
+            else:
+                self._at_root = False
+
+        if self.first_incumbent_time is None and cb.has_incumbent():
+            self.first_incumbent_time = self.time_offset + elapsed_time
+
+        if elapsed_time < self.next_sample_time:
+            return
+
+        self.next_sample_time = elapsed_time + self.sample_interval
+        has_incumbent = cb.has_incumbent()
+        self._add_sample(elapsed_time,
+                         incumbent = cb.get_incumbent_objective_value() if has_incumbent else None,
+                         bound = cb.get_best_objective_value(),
+                         gap = cb.get_MIP_relative_gap() if has_incumbent else None,
+                         nodes = cb.get_num_nodes(),
+                         nodes_remaining = cb.get_num_remaining_nodes(),
+                         iterations = cb.get_num_iterations())
+
+    def finalize(self, slim_IP, elapsed_time):
+        """
+        adds a final sample from the solution of slim_IP
+        """
+        solution = slim_IP.solution
+        has_incumbent = solution.is_primal_feasible()
+        nodes = solution.progress.get_num_nodes_processed()
+        bound = solution.MIP.get_best_objective()
+
+        if has_incumbent and self.first_incumbent_time is None:
+            self.first_incumbent_time = self.time_offset + elapsed_time
+
+        if self._at_root and nodes == 0:
+            self.root_bound = bound
+
+        self._add_sample(elapsed_time,
+                         incumbent = solution.get_objective_value() if has_incumbent else None,
+                         bound = bound,
+                         gap = solution.MIP.get_mip_relative_gap() if has_incumbent else None,
+                         nodes = nodes,
+                         nodes_remaining = solution.progress.get_num_nodes_remaining(),
+                         iterations = solution.progress.get_num_iterations())
+
+    def summary(self):
+        return {
+            'first_incumbent_time': self.first_incumbent_time,
+            'root_bound': self.root_bound,
+            'n_progress_samples': len(self.samples['time']),
+        }
+
+    def save(self, progress_file):
+        """
+        writes the samples as a JSON object with one list per field (missing values are null)
+        """
+        progress = self.summary()
+        progress['samples'] = self.samples
+        tmp_file = progress_file + '.tmp'
+        with open(tmp_file, 'w') as fh:
+            json.dump(progress, fh, separators = (',', ':'))
+        os.rename(tmp_file, progress_file)
+
+
+def load_progress(progress_file):
+    with open(progress_file, 'r') as fh:
+        return json.load(fh)
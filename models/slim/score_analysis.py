@@ -0,0 +1,273 @@
+import numpy as np
+from .data_validation import DEFAULT_CHUNK_SIZE
+from .feature_reduction import INTERCEPT_NAME
+
+
+# Score Histograms
+def get_score_histogram(rho, X, Y, sample_weights = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Counts the (weighted) number of positive and negative points at each integer score X.dot(rho)
+    with one bincount per chunk of rows of X
+
+    Parameters
+    ----------
+    rho             P x 1 coefficient vector (scores X.dot(rho) must be integers)
+    X               N x P feature matrix (can be memory-mapped or a BitPackedMatrix)
+    Y               N x 1 vector of labels in {-1, +1}
+    sample_weights  N x 1 vector of sample weights; if None, then every sample has weight 1
+    chunk_size      number of rows of X used at a time
+
+    Returns
+    -------
+    histogram       dictionary with the following keys
+                    scores  every integer between the smallest and largest score
+                    pos     (weighted) number of positive points with each score
+                    neg     (weighted) number of negative points with each score
+    """
+    rho = np.ravel(rho)
+    Y = np.ravel(Y)
+    weights = None if sample_weights is None else np.ravel(sample_weights).astype(np.float)
+    counts_dtype = np.int64 if weights is None else np.float
+    N = X.shape[0]
+
+    # counts for score s are stored at s - score_min; the range grows as new scores are seen
+    score_min, score_max = 0, -1
+    counts_pos = np.zeros(0, dtype = counts_dtype)
+    counts_neg = np.zeros(0, dtype = counts_dtype)
+
+    def resize(counts, new_min, new_max):
+        new_counts = np.zeros(new_max - new_min + 1, dtype = counts_dtype)
+        new_counts[score_min - new_min:score_max - new_min + 1] = counts
+        return new_counts
+
+    for start in range(0, N, chunk_size):
+        end = min(start + chunk_size, N)
+        scores = X[start:end].dot(rho)
+        int_scores = np.round(scores).astype(np.int64)
+        assert np.all(scores == int_scores), 'scores should be integers (rho and X should be integer-valued)'
+        if len(int_scores) == 0:
+            continue
+
+        new_min, new_max = int(int_scores.min()), int(int_scores.max())
+        if len(counts_pos) > 0:
+            new_min, new_max = min(new_min, score_min), max(new_max, score_max)
+        if (new_min, new_max) != (score_min, score_max):
+            counts_pos = resize(counts_pos, new_min, new_max)
+            counts_neg = resize(counts_neg, new_min, new_max)
+            score_min, score_max = new_min, new_max
+
+        pos = Y[start:end] == 1
+        bins = int_scores - score_min
+        w = None if weights is None else weights[start:end]
+        counts_pos += np.bincount(bins[pos], weights = None if w is None else w[pos], minlength = len(counts_pos)).astype(counts_dtype)
+        counts_neg += np.bincount(bins[~pos], weights = None if w is None else w[~pos], minlength = len(counts_neg)).astype(counts_dtype)
+
+    return {
+        'scores': np.arange(score_min, score_min + len(counts_pos), dtype = np.int64),
+        'pos': counts_pos,
+        'neg': counts_neg,
+    }
+
+
+# ROC Analysis
+def get_threshold_counts(histogram):
+    """
+    Computes the confusion matrix of the classifier that predicts y = +1 iff score >= threshold for every threshold,
+    using cumulative sums over the histogram (so the cost only depends on the number of distinct scores)
+
+    Parameters
+    ----------
+    histogram       output of get_score_histogram
+
+    Returns
+    -------
+    dictionary with the following keys (arrays with one entry per threshold)
+    thresholds      every score in the histogram and max score + 1 (which predicts y = -1 for all points)
+    true_positives, false_positives, true_negatives, false_negatives, true_positive_rate, false_positive_rate
+    """
+    scores = histogram['scores']
+    counts_pos = histogram['pos']
+    counts_neg = histogram['neg']
+
+    # number of points with score >= threshold (reverse cumulative sums, with 0 for the last threshold)
+    true_positives = np.append(np.cumsum(counts_pos[::-1])[::-1], 0)
+    false_positives = np.append(np.cumsum(counts_neg[::-1])[::-1], 0)
+    n_pos = np.sum(counts_pos)
+    n_neg = np.sum(counts_neg)
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        true_positive_rate = true_positives / np.float(n_pos)
+        false_positive_rate = false_positives / np.float(n_neg)
+
+    last_threshold = scores[-1] + 1 if len(scores) > 0 else 1
+    return {
+        'thresholds': np.append(scores, last_threshold),
+        'true_positives': true_positives,
+        'false_positives': false_positives,
+        'true_negatives': n_neg - false_positives,
+        'false_negatives': n_pos - true_positives,
+        'true_positive_rate': true_positive_rate,
+        'false_positive_rate': false_positive_rate,
+    }
+
+
+def get_roc_auc(threshold_counts):
+    """
+    returns the area under the ROC curve of get_threshold_counts (ties in the score count as 1/2, as in the Mann-Whitney U statistic)
+    """
+    tpr = threshold_counts['true_positive_rate'][::-1]
+    fpr = threshold_counts['false_positive_rate'][::-1]
+    return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+
+def get_calibration_table(histogram):
+    """
+    returns a dictionary with the scores that occur in the data, the (weighted) number of positive and negative points
+    at each score, and the observed risk P(y = +1 | score)
+    """
+    counts_pos = histogram['pos']
+    counts_neg = histogram['neg']
+    n_points = counts_pos + counts_neg
+    observed = n_points > 0
+    return {
+        'scores': histogram['scores'][observed],
+        'pos': counts_pos[observed],
+        'neg': counts_neg[observed],
+        'n_points': n_points[observed],
+        'observed_risk': counts_pos[observed] / n_points[observed].astype(np.float),
+    }
+
+
+def analyze_scores(rho, data, use_sample_weights = True, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Computes the score histogram, every threshold's confusion matrix, the ROC curve, AUC and calibration table
+    of an integer scoring system in one pass over the data
+
+    Parameters
+    ----------
+    rho                 P x 1 coefficient vector (e.g. slim_summary['rho'])
+    data                dictionary with X, Y and (optionally) sample_weights
+    use_sample_weights  set to True to weight each point by its sample weight
+    chunk_size          number of rows of X used at a time
+
+    Returns
+    -------
+    dictionary with histogram, threshold_counts, auc and calibration
+    """
+    sample_weights = data.get('sample_weights') if use_sample_weights else None
+    histogram = get_score_histogram(rho, data['X'], data['Y'], sample_weights = sample_weights, chunk_size = chunk_size)
+    threshold_counts = get_threshold_counts(histogram)
+    return {
+        'histogram': histogram,
+        'threshold_counts': threshold_counts,
+        'auc': get_roc_auc(threshold_counts),
+        'calibration': get_calibration_table(histogram),
+    }
+
+
+# Intercept Selection
+def get_intercept_candidates(scores, lb = -np.inf, ub = np.inf):
+    """
+    Returns the intercept for each threshold on the sorted distinct scores (without intercept), such that
+    score + intercept > 0 iff score >= scores[k] (for k = 0, ..., K - 1), and score + intercept <= 0 for all scores (k = K).
+    Intercepts are integers when possible, and nan if no intercept between lb and ub gives the threshold.
+    """
+    # intercept for threshold k must be in (-scores[k], -scores[k - 1]] and in [lb, ub]
+    lower = -np.append(scores, np.inf)
+    upper = np.minimum(-np.append(-np.inf, scores), ub)
+
+    # use the largest integer in the interval, or the upper end of the interval if it does not contain an integer
+    with np.errstate(invalid = 'ignore'):
+        intercepts = np.where(np.isfinite(upper), np.floor(upper), np.maximum(np.floor(lower) + 1.0, np.ceil(lb)))
+        integer_feasible = (intercepts > lower) & (intercepts >= lb)
+        intercepts = np.where(integer_feasible, intercepts, upper)
+        feasible = (intercepts > lower) & (intercepts >= lb) & (intercepts <= ub)
+    return np.where(feasible, intercepts + 0.0, np.nan)
+
+
+def select_intercept(rho, data, w_pos = 1.0, w_neg = 1.0, min_tpr = None, max_fpr = None, intercept_bounds = None,
+                     use_sample_weights = True, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Finds the intercept that minimizes w_pos * false_negatives + w_neg * false_positives for a fixed coefficient vector
+    (e.g. slim_summary['rho']), subject to optional constraints on the true positive rate and false positive rate.
+    The scores without the intercept are computed once; every intercept is then evaluated with one sweep over
+    the sorted distinct scores (see get_threshold_counts), so no IP has to be solved.
+
+    Parameters
+    ----------
+    rho                 P x 1 coefficient vector; the intercept is the entry for '(Intercept)' in data['variable_names']
+    data                dictionary with X, Y, variable_names and (optionally) sample_weights
+    w_pos               cost of a false negative
+    w_neg               cost of a false positive
+    min_tpr             if given, only intercepts with true positive rate >= min_tpr are considered
+    max_fpr             if given, only intercepts with false positive rate <= max_fpr are considered
+    intercept_bounds    (lb, ub) for the intercept (e.g. (-max_offset, max_offset)); defaults to no bounds
+    use_sample_weights  set to True to weight each point by its sample weight
+    chunk_size          number of rows of X used at a time
+
+    Returns
+    -------
+    rho                 coefficient vector with the new intercept
+    selection           dictionary with the intercept, objective value and confusion counts of the new intercept,
+                        and the objective value of the original intercept
+    """
+    rho = np.array(rho, dtype = np.float).flatten()
+    intercept_ind = data['variable_names'].index(INTERCEPT_NAME)
+    intercept = rho[intercept_ind]
+    lb, ub = (-np.inf, np.inf) if intercept_bounds is None else intercept_bounds
+
+    # scores without the intercept
+    X = data['X']
+    N = X.shape[0]
+    rho_without_intercept = np.array(rho)
+    rho_without_intercept[intercept_ind] = 0.0
+    scores = np.empty(N)
+    for start in range(0, N, chunk_size):
+        end = min(start + chunk_size, N)
+        scores[start:end] = X[start:end].dot(rho_without_intercept)
+
+    # histogram over distinct scores
+    Y = np.ravel(data['Y'])
+    pos = Y == 1
+    sample_weights = data.get('sample_weights') if use_sample_weights else None
+    weights = None if sample_weights is None else np.ravel(sample_weights).astype(np.float)
+    distinct_scores, score_ind = np.unique(scores, return_inverse = True)
+    K = len(distinct_scores)
+    histogram = {
+        'scores': distinct_scores,
+        'pos': np.bincount(score_ind[pos], weights = None if weights is None else weights[pos], minlength = K),
+        'neg': np.bincount(score_ind[~pos], weights = None if weights is None else weights[~pos], minlength = K),
+    }
+    threshold_counts = get_threshold_counts(histogram)
+    objective_values = w_pos * threshold_counts['false_negatives'] + w_neg * threshold_counts['false_positives']
+
+    # drop thresholds that violate the constraints or cannot be reached with an intercept in bounds
+    intercepts = get_intercept_candidates(distinct_scores, lb, ub)
+    feasible = ~np.isnan(intercepts)
+    if min_tpr is not None:
+        feasible &= threshold_counts['true_positive_rate'] >= min_tpr
+    if max_fpr is not None:
+        feasible &= threshold_counts['false_positive_rate'] <= max_fpr
+    assert np.any(feasible), 'no intercept satisfies the constraints'
+
+    # among optimal thresholds, pick the intercept that is closest to the original intercept
+    best_value = np.min(objective_values[feasible])
+    optimal = feasible & np.isclose(objective_values, best_value)
+    best_ind = np.flatnonzero(optimal)[np.argmin(np.abs(intercepts[optimal] - intercept))]
+
+    # objective value of the original intercept
+    original_ind = np.searchsorted(distinct_scores, -intercept, side = 'right')
+
+    new_rho = np.array(rho)
+    new_rho[intercept_ind] = intercepts[best_ind]
+    selection = {
+        'intercept': intercepts[best_ind],
+        'original_intercept': intercept,
+        'objective_value': objective_values[best_ind],
+        'original_objective_value': objective_values[original_ind],
+    }
+    for stat_name in ['true_positives', 'false_positives', 'true_negatives', 'false_negatives',
+                      'true_positive_rate', 'false_positive_rate']:
+        selection[stat_name] = threshold_counts[stat_name][best_ind]
+
+    return new_rho, selection
@@ -0,0 +1,145 @@
+import os
+import json
+import numpy as np
+from .feature_reduction import INTERCEPT_NAME
+from .bit_packing import BitPackedMatrix
+
+SCORER_FORMAT_VERSION = 1
+
+
+class Scorer(object):
+    """
+    Compact scoring system that only stores the non-zero coefficients of a SLIM model.
+    A point is predicted as y = +1 if score > 0 and y = -1 otherwise, where
+
+        score = intercept + sum_k points[k] * x[feature_idx[k]]
+
+    Scores are computed by gathering the K columns of X that have non-zero points and summing them,
+    rather than with a dot product over all P columns. If X and the points are integers, then scores
+    are computed with integer arithmetic.
+
+    scorer = export_scorer(slim_summary['rho'], data['variable_names'])
+    scorer.save('model.json')
+    ...
+    scorer = load_scorer('model.json')
+    yhat = scorer.predict(X)
+    """
+
+    def __init__(self, feature_names, points, intercept = 0, feature_idx = None, n_variables = None, outcome_name = None):
+        assert len(feature_names) == len(points), 'feature_names and points should have the same length'
+        self.feature_names = [str(n) for n in feature_names]
+        self.points = np.array(points) if len(points) > 0 else np.zeros(0, dtype = np.int64)
+        self.intercept = intercept
+        self.feature_idx = None if feature_idx is None else np.array(feature_idx, dtype = np.int64)
+        self.n_variables = n_variables
+        self.outcome_name = outcome_name
+        self.integer_flag = np.issubdtype(self.points.dtype, np.integer) and float(intercept).is_integer()
+
+    def __repr__(self):
+        terms = ['%d' % p if self.integer_flag else '%r' % p for p in self.points]
+        return 'Scorer(%s)' % ', '.join(['%s: %s' % (n, t) for n, t in zip(self.feature_names, terms)] + ['intercept: %r' % self.intercept])
+
+    def get_columns(self, column_names):
+        """
+        returns the index of each feature in column_names (e.g. the header of a file with new data)
+        """
+        column_names = list(column_names)
+        missing_names = [n for n in self.feature_names if n not in column_names]
+        if len(missing_names) > 0:
+            raise ValueError('columns are missing features: %r' % missing_names)
+        return np.array([column_names.index(n) for n in self.feature_names], dtype = np.int64)
+
+    def score(self, X, column_names = None):
+        """
+        Parameters
+        ----------
+        X               N x P matrix with the same columns as the training data (in the same order),
+                        or an N x D matrix whose columns are named in column_names (can be a BitPackedMatrix)
+        column_names    names of the columns of X; if None, X must have the same columns as the training data
+
+        Returns
+        -------
+        N x 1 numpy.ndarray of scores (integer if X and the points are integer)
+        """
+        if column_names is None:
+            assert self.feature_idx is not None, 'column_names are needed for a scorer without feature_idx'
+            assert self.n_variables is None or X.shape[1] == self.n_variables, 'X should have %d columns' % self.n_variables
+            idx = self.feature_idx
+        else:
+            idx = self.get_columns(column_names)
+
+        if isinstance(X, BitPackedMatrix):
+            scores = X.sparse_dot(idx, self.points)
+            if self.integer_flag:
+                return scores + int(self.intercept)
+            return scores + float(self.intercept)
+
+        X_used = np.take(X, idx, axis = 1)
+        if self.integer_flag and X_used.dtype.kind in 'biu':
+            return X_used.astype(np.int64).dot(self.points.astype(np.int64)) + int(self.intercept)
+        return X_used.astype(np.float).dot(self.points.astype(np.float)) + float(self.intercept)
+
+    def predict(self, X, column_names = None):
+        return np.where(self.score(X, column_names) > 0, 1, -1)
+
+    def to_dict(self):
+        return {
+            'format_version': SCORER_FORMAT_VERSION,
+            'outcome_name': self.outcome_name,
+            'intercept': int(self.intercept) if self.integer_flag else float(self.intercept),
+            'feature_names': self.feature_names,
+            'points': self.points.tolist(),
+            'feature_idx': None if self.feature_idx is None else self.feature_idx.tolist(),
+            'n_variables': self.n_variables,
+        }
+
+    def save(self, scorer_file):
+        tmp_file = scorer_file + '.tmp'
+        with open(tmp_file, 'w') as fh:
+            json.dump(self.to_dict(), fh, separators = (',', ':'))
+        os.rename(tmp_file, scorer_file)
+
+
+def export_scorer(rho, variable_names, outcome_name = None):
+    """
+    Creates a Scorer with the non-zero coefficients of rho (e.g. slim_summary['rho'])
+
+    Parameters
+    ----------
+    rho             P x 1 coefficient vector
+    variable_names  names of the P variables (e.g. data['variable_names']); the coefficient of '(Intercept)' is the intercept
+    outcome_name    name of the outcome variable (optional)
+
+    Returns
+    -------
+    Scorer
+    """
+    rho = np.array(rho, dtype = np.float).flatten()
+    assert len(rho) == len(variable_names), 'rho and variable_names should have the same length'
+
+    if np.all(rho == np.round(rho)):
+        rho = np.round(rho).astype(np.int64)
+
+    intercept = 0
+    if INTERCEPT_NAME in variable_names:
+        intercept = rho[variable_names.index(INTERCEPT_NAME)]
+
+    feature_idx = [j for j, n in enumerate(variable_names) if n != INTERCEPT_NAME and rho[j] != 0]
+    return Scorer(feature_names = [variable_names[j] for j in feature_idx],
+                  points = rho[feature_idx],
+                  intercept = intercept.item() if hasattr(intercept, 'item') else intercept,
+                  feature_idx = feature_idx,
+                  n_variables = len(variable_names),
+                  outcome_name = outcome_name)
+
+
+def load_scorer(scorer_file):
+    with open(scorer_file, 'r') as fh:
+        scorer = json.load(fh)
+    assert scorer['format_version'] == SCORER_FORMAT_VERSION, 'unsupported scorer format version: %r' % scorer['format_version']
+    return Scorer(feature_names = scorer['feature_names'],
+                  points = scorer['points'],
+                  intercept = scorer['intercept'],
+                  feature_idx = scorer['feature_idx'],
+                  n_variables = scorer['n_variables'],
+                  outcome_name = scorer['outcome_name'])
@@ -0,0 +1,215 @@
+import numpy as np
+from .data_validation import DEFAULT_CHUNK_SIZE
+from .verification import get_variable_columns
+
+
+# Collecting Models
+def harvest_solution_pool(slim_IP, slim_info, unique = True):
+    """
+    Collects the coefficient vectors of every solution in the solution pool of a solved SLIM IP
+
+    Parameters
+    ----------
+    slim_IP         solved cplex.Cplex object
+    slim_info       dictionary produced by create_slim_ip
+    unique          set to True to drop duplicate coefficient vectors
+
+    Returns
+    -------
+    rho_matrix      R x P numpy.ndarray with one coefficient vector per row
+    """
+    n_solutions = slim_IP.solution.pool.get_num()
+    rho_idx = slim_info['rho_idx']
+    rho_matrix = np.empty(shape = (n_solutions, len(rho_idx)))
+    for r in range(n_solutions):
+        rho_matrix[r, :] = slim_IP.solution.pool.get_values(r, rho_idx)
+    return to_model_matrix(rho_matrix, unique = unique)
+
+
+def to_model_matrix(rho_matrix, unique = True):
+    """
+    rounds the coefficients in rho_matrix to integers and (optionally) drops duplicate rows, keeping the first occurrence
+    """
+    rho_matrix = np.atleast_2d(np.round(np.asarray(rho_matrix, dtype = np.float))).astype(np.int64)
+    if unique and rho_matrix.shape[0] > 1:
+        _, first_idx = np.unique(rho_matrix, axis = 0, return_index = True)
+        rho_matrix = rho_matrix[np.sort(first_idx)]
+    return rho_matrix
+
+
+class IncumbentRecorder(object):
+    """
+    Records the coefficient vector of each new incumbent during the solve (a handler for SolveMonitorCallback)
+
+    recorder = IncumbentRecorder(slim_info)
+    train_slim(data, handlers = [recorder])
+    rho_matrix = recorder.get_model_matrix()
+    """
+
+    def __init__(self, slim_info):
+        self.rho_idx = list(slim_info['rho_idx'])
+        self.objective_values = []
+        self.times = []
+        self.incumbents = []
+
+    def update(self, cb, elapsed_time):
+        if not cb.has_incumbent():
+            return
+        objective_value = cb.get_incumbent_objective_value()
+        if len(self.objective_values) > 0 and objective_value == self.objective_values[-1]:
+            return
+        self.objective_values.append(objective_value)
+        self.times.append(elapsed_time)
+        self.incumbents.append(cb.get_incumbent_values(self.rho_idx))
+
+    def get_model_matrix(self, unique = True):
+        if len(self.incumbents) == 0:
+            return np.zeros(shape = (0, len(self.rho_idx)), dtype = np.int64)
+        return to_model_matrix(self.incumbents, unique = unique)
+
+
+# Batch Scoring
+SPLIT_NAMES = ('train', 'valid', 'test')
+
+
+def get_split_fields(data, split_name):
+    """
+    returns the names of X, Y and sample_weights for a split of data ('X', 'Y', 'sample_weights' for 'train',
+    and 'X_<split_name>', 'Y_<split_name>', 'sample_weights_<split_name>' otherwise)
+    """
+    suffix = '' if split_name == 'train' else '_' + split_name
+    return 'X' + suffix, 'Y' + suffix, 'sample_weights' + suffix
+
+
+def has_split(data, split_name):
+    X_name, Y_name, _ = get_split_fields(data, split_name)
+    return X_name in data and Y_name in data and data[X_name].shape[0] > 0 and data[Y_name].shape[0] > 0
+
+
+def score_models(rho_matrix, X, Y, sample_weights = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Computes (weighted) confusion counts for R models at once with one matrix product and one bincount
+    per chunk of rows of X
+
+    A model predicts y = +1 if score = X.dot(rho) > 0 (as in get_model_summary).
+    A point is also counted in margin_errors if y * score <= 0, which is how the SLIM IP counts mistakes for integer scores.
+
+    Parameters
+    ----------
+    rho_matrix      R x P matrix of coefficients
+    X               N x P feature matrix (can be memory-mapped or a BitPackedMatrix)
+    Y               N x 1 vector of labels in {-1, +1}
+    sample_weights  N x 1 vector of sample weights; if None, then every sample has weight 1
+    chunk_size      number of rows of X used at a time
+
+    Returns
+    -------
+    dictionary of R x 1 numpy.ndarrays: true_positives, false_positives, true_negatives, false_negatives,
+    margin_errors_pos and margin_errors_neg
+    """
+    rho_matrix = np.atleast_2d(rho_matrix)
+    R = rho_matrix.shape[0]
+    N = X.shape[0]
+    Y = np.ravel(Y)
+    weights = None if sample_weights is None else np.ravel(sample_weights).astype(np.float)
+
+    # each (point, model) pair falls in one of 6 cells: 3 * 1[y = +1] + sign(score) + 1
+    # cells for model r are stored at 6 * r, ..., 6 * r + 5
+    n_cells = 6
+    cell_offset = n_cells * np.arange(R)
+    cell_counts = np.zeros(n_cells * R, dtype = np.int64 if weights is None else np.float)
+
+    rho_matrix_T = rho_matrix.T
+    for start in range(0, N, chunk_size):
+        end = min(start + chunk_size, N)
+        scores = X[start:end].dot(rho_matrix_T)
+        cells = np.sign(scores).astype(np.int64)
+        cells += (3 * (Y[start:end] == 1) + 1)[:, None]
+        cells += cell_offset
+        if weights is None:
+            cell_counts += np.bincount(cells.ravel(), minlength = n_cells * R)
+        else:
+            cell_weights = np.broadcast_to(weights[start:end, None], cells.shape)
+            cell_counts += np.bincount(cells.ravel(), weights = cell_weights.ravel(), minlength = n_cells * R)
+
+    cell_counts = cell_counts.reshape(R, n_cells)
+    neg_below, neg_zero, neg_above, pos_below, pos_zero, pos_above = [cell_counts[:, k] for k in range(n_cells)]
+    return {
+        'true_negatives': neg_below + neg_zero,
+        'false_positives': neg_above,
+        'true_positives': pos_above,
+        'false_negatives': pos_below + pos_zero,
+        'margin_errors_pos': pos_below + pos_zero,
+        'margin_errors_neg': neg_zero + neg_above,
+    }
+
+
+def score_splits(rho_matrix, data, split_names = SPLIT_NAMES, use_sample_weights = True, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Computes confusion counts for R models on each named split of data with one pass over each split (see score_models)
+
+    Parameters
+    ----------
+    rho_matrix          R x P matrix of coefficients
+    data                dictionary with X, Y and (optionally) sample_weights for the training set, and X_<split_name>,
+                        Y_<split_name> and sample_weights_<split_name> for other splits (e.g. X_valid, Y_valid)
+    split_names         names of the splits to score; splits that are missing or empty are skipped
+    use_sample_weights  set to True to weight each point by its sample weight (if the split has sample weights)
+    chunk_size          number of rows of X used at a time
+
+    Returns
+    -------
+    dictionary mapping the name of each split that was scored to the output of score_models
+    """
+    split_counts = {}
+    for split_name in split_names:
+        if not has_split(data, split_name):
+            continue
+        X_name, Y_name, weights_name = get_split_fields(data, split_name)
+        sample_weights = data.get(weights_name) if use_sample_weights else None
+        split_counts[split_name] = score_models(rho_matrix, data[X_name], data[Y_name], sample_weights = sample_weights, chunk_size = chunk_size)
+    return split_counts
+
+
+def evaluate_models(rho_matrix, data, slim_info = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Scores R models on data in one pass (see score_models) and summarizes each of them
+
+    Parameters
+    ----------
+    rho_matrix      R x P matrix of coefficients (e.g. from harvest_solution_pool or IncumbentRecorder)
+    data            dictionary with X and Y (and optionally sample_weights)
+    slim_info       dictionary produced by create_slim_ip for this data; if given, then we also compute
+                    the objective value of each model in the SLIM IP (the IP does not use sample weights,
+                    so these match the IP when every sample weight is 1)
+
+    Returns
+    -------
+    dictionary of R x 1 numpy.ndarrays with confusion counts, error rates, L0 norms and objective values
+    """
+    rho_matrix = np.atleast_2d(rho_matrix)
+    counts = score_models(rho_matrix, data['X'], data['Y'], sample_weights = data.get('sample_weights'), chunk_size = chunk_size)
+
+    n_pos = counts['true_positives'] + counts['false_negatives']
+    n_neg = counts['true_negatives'] + counts['false_positives']
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        summary = dict(counts)
+        summary['mistakes'] = counts['false_positives'] + counts['false_negatives']
+        summary['error_rate'] = summary['mistakes'] / np.asarray(n_pos + n_neg, dtype = np.float)
+        summary['true_positive_rate'] = counts['true_positives'] / np.asarray(n_pos, dtype = np.float)
+        summary['false_positive_rate'] = counts['false_positives'] / np.asarray(n_neg, dtype = np.float)
+
+    if slim_info is not None:
+        summary['L0_norm'] = np.count_nonzero(rho_matrix[:, slim_info['L0_reg_ind']], axis = 1)
+        alpha_cols = get_variable_columns(slim_info['alpha_names'], 'alpha_')
+        beta_cols = get_variable_columns(slim_info['beta_names'], 'beta_')
+        C_0 = np.asarray(slim_info['C_0'])[alpha_cols]
+        C_1 = np.asarray(slim_info['C_1'])[beta_cols]
+        summary['objective_value'] = (slim_info['w_pos'] * counts['margin_errors_pos'] +
+                                      slim_info['w_neg'] * counts['margin_errors_neg'] +
+                                      (rho_matrix[:, alpha_cols] != 0).dot(C_0) +
+                                      np.abs(rho_matrix[:, beta_cols]).dot(C_1))
+    else:
+        summary['L0_norm'] = np.count_nonzero(rho_matrix, axis = 1)
+
+    return summary
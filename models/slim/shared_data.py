@@ -0,0 +1,167 @@
+import os
+import shutil
+import fcntl
+import tempfile
+import numpy as np
+from contextlib import contextmanager
+
+SHARED_MEMORY_DIR = '/dev/shm'
+SHARED_DATA_FIELDS = ['X', 'Y', 'sample_weights']
+REFCOUNT_FILE_NAME = 'refcount'
+
+# datasets published by this process (name -> handle)
+_published_data = {}
+
+
+# Reference Counting
+def _update_refcount(handle, change):
+    """
+    adds change to the reference count of a shared dataset and returns the new count
+    the count is stored in a file and updated under an exclusive lock so that any process can attach or release
+    """
+    refcount_file = os.path.join(handle['shared_dir'], REFCOUNT_FILE_NAME)
+    if not os.path.isfile(refcount_file):
+        raise IOError('could not find shared data: %s' % handle['shared_dir'])
+
+    with open(refcount_file, 'r+') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            refcount = int(fh.read().strip() or 0) + change
+            fh.seek(0)
+            fh.truncate()
+            fh.write('%d' % refcount)
+            fh.flush()
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+    return refcount
+
+
+def get_refcount(handle):
+    return _update_refcount(handle, 0)
+
+
+# Publishing and Attaching
+def publish_data(data, name = None, row_order = None, shared_dir = None):
+    """
+    Publishes a dataset once so that worker processes can attach to it without copying or pickling X.
+    X, Y and sample_weights are written to memory-mapped .npy files in POSIX shared memory (/dev/shm)
+    or in a temporary directory if /dev/shm does not exist.
+
+    Parameters
+    ----------
+    data            dictionary produced by load_data_from_csv
+    name            optional name of the dataset; publishing the same name twice in one process returns the same handle
+    row_order       optional N x 1 array of row indices; rows are stored in this order (e.g. sorted by fold)
+    shared_dir      directory for the shared files; defaults to /dev/shm if it exists
+
+    Returns
+    -------
+    handle          small picklable dictionary that can be passed to attach_data and release_data
+                    the publisher holds one reference, which it should drop with release_data
+    """
+    if name is not None and name in _published_data:
+        handle = _published_data[name]
+        _update_refcount(handle, 1)
+        return handle
+
+    if shared_dir is None and os.path.isdir(SHARED_MEMORY_DIR):
+        shared_dir = SHARED_MEMORY_DIR
+    shared_dir = tempfile.mkdtemp(prefix='slim_data_', dir=shared_dir)
+
+    handle = {
+        'name': name,
+        'shared_dir': shared_dir,
+        'variable_names': list(data['variable_names']),
+        'outcome_name': data.get('outcome_name'),
+        'files': {},
+    }
+
+    try:
+        for field_name in SHARED_DATA_FIELDS:
+            if field_name not in data:
+                continue
+            values = np.asarray(data[field_name])
+            file_name = os.path.join(shared_dir, '%s.npy' % field_name)
+            shared = np.lib.format.open_memmap(file_name, mode='w+', dtype=values.dtype, shape=values.shape)
+            if row_order is None:
+                shared[:] = values
+            else:
+                np.take(values, row_order, axis=0, out=shared)
+            shared.flush()
+            del shared
+            handle['files'][field_name] = file_name
+
+        with open(os.path.join(shared_dir, REFCOUNT_FILE_NAME), 'w') as fh:
+            fh.write('1')
+
+    except:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+        raise
+
+    if name is not None:
+        _published_data[name] = handle
+
+    return handle
+
+
+def attach_data(handle):
+    """
+    Attaches to a published dataset and adds a reference to it
+
+    Returns
+    -------
+    data dictionary whose X, Y and sample_weights are read-only numpy.ndarray views of the shared files
+    """
+    _update_refcount(handle, 1)
+    data = {
+        'variable_names': list(handle['variable_names']),
+        'outcome_name': handle['outcome_name'],
+    }
+    for field_name, file_name in handle['files'].items():
+        data[field_name] = np.asarray(np.load(file_name, mmap_mode='r'))
+    return data
+
+
+def release_data(handle):
+    """
+    Drops a reference to a published dataset; the shared files are deleted when the last reference is released.
+    Views returned by attach_data remain valid in processes that still hold them (the mapping outlives the files).
+
+    Returns
+    -------
+    number of remaining references
+    """
+    refcount = _update_refcount(handle, -1)
+    if refcount <= 0:
+        shutil.rmtree(handle['shared_dir'], ignore_errors=True)
+        if handle.get('name') in _published_data:
+            del _published_data[handle['name']]
+    return refcount
+
+
+@contextmanager
+def shared_data(data, name = None, row_order = None, shared_dir = None):
+    """
+    publishes data for the duration of a with-block and releases the publisher's reference at the end
+
+    with shared_data(data) as handle:
+        pool.map(worker, [handle] * n_jobs)
+    """
+    handle = publish_data(data, name=name, row_order=row_order, shared_dir=shared_dir)
+    try:
+        yield handle
+    finally:
+        release_data(handle)
+
+
+@contextmanager
+def attached_data(handle):
+    """
+    attaches to a published dataset for the duration of a with-block (for use in worker processes)
+    """
+    data = attach_data(handle)
+    try:
+        yield data
+    finally:
+        release_data(handle)
@@ -0,0 +1,143 @@
+import numpy as np
+from .create_slim_mip import get_slim_input, create_slim_ip
+from .helper_functions import check_slim_ip_solution, get_slim_summary
+from .bit_packing import get_packed_data
+from .checkpoint import *
+from .progress import *
+from .solver_profiles import *
+
+
+def set_slim_ip_parameters(slim_IP, timelimit=300, threads=1, random_seed=0, print_flag=False, exact_tolerances=True,
+                           solver_profile=DEFAULT_SOLVER_PROFILE):
+    """
+    :param slim_IP: cplex.Cplex object produced by create_slim_ip (or read from an MPS file)
+    :param timelimit: time limit on training (in seconds); set as -1 for no time limit
+    :param threads: number of threads used by CPLEX
+    :param random_seed: random seed used by CPLEX
+    :param print_flag: set to False to suppress the CPLEX log
+    :param exact_tolerances: set to True to set the MIP gap and integrality tolerances to machine epsilon;
+                             set to False to keep the CPLEX defaults (safe for IPs with integer loss constraints)
+    :param solver_profile: name of a profile in SOLVER_PROFILES or a dictionary of CPLEX parameters (see get_solver_parameters);
+                           parameters in the profile override threads
+
+    :return:
+    %slim_IP with the parameters used to solve the SLIM IP instances
+    """
+    slim_IP.parameters.randomseed.set(random_seed)
+    slim_IP.parameters.output.clonelog.set(0)
+    slim_IP.parameters.threads.set(threads)
+    for name, value in sorted(get_solver_parameters(solver_profile, exact_tolerances=exact_tolerances).items()):
+        set_solver_parameter(slim_IP, name, value)
+    if timelimit < 0:
+        slim_IP.parameters.timelimit.set(1e75)
+    else:
+        slim_IP.parameters.timelimit.set(min(timelimit, 1e75))
+
+    if not print_flag:
+        slim_IP.set_results_stream(None)
+        slim_IP.set_log_stream(None)
+        slim_IP.set_warning_stream(None)
+
+    return slim_IP
+
+
+def solve_slim_ip(slim_IP, timelimit=300, threads=1, random_seed=0, print_flag=False, exact_tolerances=True,
+                  solver_profile=DEFAULT_SOLVER_PROFILE):
+    """
+    sets the SLIM IP parameters and solves slim_IP in place
+
+    :return:
+    %slim_IP
+    """
+    slim_IP = set_slim_ip_parameters(slim_IP, timelimit=timelimit, threads=threads, random_seed=random_seed, print_flag=print_flag,
+                                     exact_tolerances=exact_tolerances, solver_profile=solver_profile)
+    slim_IP.solve()
+    return slim_IP
+
+
+def train_slim(data, slim_settings=None, slim_input=None, timelimit=300, threads=1, random_seed=0, print_flag=False, check_solution=True,
+               checkpoint_file=None, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, resume=False,
+               progress_file=None, progress_interval=DEFAULT_PROGRESS_INTERVAL, handlers=None,
+               solver_profile=DEFAULT_SOLVER_PROFILE):
+    """
+    builds and solves a SLIM IP in memory (without writing an MPS file or a pickle of slim_info)
+
+    :param data: dictionary produced by load_data_from_csv
+    :param slim_settings: dictionary of keyword arguments for get_slim_input (max_coef, c0_value, max_size, max_offset, integer_loss)
+    :param slim_input: dictionary of inputs for create_slim_ip; if None, then we call get_slim_input(data, **slim_settings)
+    :param timelimit: time limit on training (in seconds); set as -1 for no time limit
+    :param threads: number of threads used by CPLEX
+    :param random_seed: random seed used by CPLEX
+    :param print_flag: set to False to suppress the CPLEX log
+    :param check_solution: set to True to run check_slim_ip_solution if the IP has a feasible solution
+    :param checkpoint_file: name of a JSON file to save the incumbent, best bound and elapsed time during the solve
+    :param checkpoint_interval: minimum time between checkpoints (in seconds)
+    :param resume: set to True to start from the incumbent in checkpoint_file (if it exists) within the remaining time limit
+    :param progress_file: name of a JSON file to save the incumbent, bound, gap, nodes and iterations over time
+    :param progress_interval: minimum time between progress samples (in seconds)
+    :param handlers: list of other handlers for SolveMonitorCallback (e.g. IncumbentRecorder)
+    :param solver_profile: name of a profile in SOLVER_PROFILES or a dictionary of CPLEX parameters (see set_slim_ip_parameters)
+
+    :return:
+    %slim_IP solved cplex.Cplex object
+    %slim_info dictionary produced by create_slim_ip
+    %slim_summary dictionary produced by get_slim_summary
+    """
+    if slim_input is None:
+        slim_input = get_slim_input(data, **(slim_settings or {}))
+
+    slim_IP, slim_info = create_slim_ip(slim_input)
+
+    elapsed_time_offset = 0.0
+    checkpoint = None
+    if checkpoint_file is not None and resume:
+        checkpoint = load_checkpoint(checkpoint_file)
+        if checkpoint is not None:
+            timelimit, resumed = resume_from_checkpoint(slim_IP, slim_info, data, checkpoint, timelimit=timelimit)
+            if resumed:
+                elapsed_time_offset = checkpoint['elapsed_time']
+            else:
+                checkpoint = None
+
+    handlers = list(handlers or [])
+    if checkpoint_file is not None:
+        handlers.append(CheckpointWriter(slim_info, checkpoint_file, checkpoint_interval, elapsed_time_offset=elapsed_time_offset))
+
+    progress = None
+    if progress_file is not None:
+        progress = ProgressRecorder(progress_interval, time_offset=elapsed_time_offset)
+        handlers.append(progress)
+
+    if len(handlers) > 0:
+        add_solve_monitor(slim_IP, handlers)
+
+    start_time = slim_IP.get_time()
+    slim_IP = solve_slim_ip(slim_IP, timelimit=timelimit, threads=threads, random_seed=random_seed, print_flag=print_flag,
+                            exact_tolerances=not slim_info['integer_loss_flag'], solver_profile=solver_profile)
+    elapsed_time = elapsed_time_offset + slim_IP.get_time() - start_time
+
+    # verify and summarize the solution with the bit-packed kernel if X is binary
+    eval_data = get_packed_data(data) if slim_info['binary_data_flag'] else data
+
+    has_solution = slim_IP.solution.is_primal_feasible()
+    if check_solution and has_solution:
+        check_slim_ip_solution(slim_IP, slim_info, eval_data)
+
+    if checkpoint_file is not None and has_solution:
+        save_checkpoint(get_checkpoint(slim_info,
+                                       rho=slim_IP.solution.get_values(slim_info['rho_idx']),
+                                       objective_value=slim_IP.solution.get_objective_value(),
+                                       best_bound=slim_IP.solution.MIP.get_best_objective(),
+                                       elapsed_time=elapsed_time,
+                                       nodes_processed=slim_IP.solution.progress.get_num_nodes_processed()),
+                        checkpoint_file)
+
+    slim_summary = get_slim_summary(slim_IP, slim_info, eval_data)
+    if progress is not None:
+        progress.finalize(slim_IP, elapsed_time - elapsed_time_offset)
+        progress.save(progress_file)
+        slim_summary.update(progress.summary())
+
+    slim_summary['resumed_from_checkpoint'] = checkpoint is not None
+    slim_summary['total_elapsed_time'] = elapsed_time
+    return slim_IP, slim_info, slim_summary
@@ -0,0 +1,89 @@
+import json
+import numpy as np
+
+EPS = np.finfo(np.float).eps
+TOLERANCE_PARAMETERS = ['mip.tolerances.mipgap', 'mip.tolerances.absmipgap', 'mip.tolerances.integrality']
+
+# named sets of CPLEX parameters (name of the parameter in slim_IP.parameters -> value)
+# exact-reproducible    deterministic parallel search that proves optimality to machine precision (used for the MIPLIB instances)
+# fast-incumbent        emphasize feasibility and run heuristics often to find good models early; stops at the default gap
+# max-throughput        opportunistic parallel search on every core (threads = 0) to process as many nodes as possible
+SOLVER_PROFILES = {
+    'exact-reproducible': {
+        'parallel': 1,
+        'mip.tolerances.mipgap': EPS,
+        'mip.tolerances.absmipgap': EPS,
+        'mip.tolerances.integrality': EPS,
+    },
+    'fast-incumbent': {
+        'parallel': -1,
+        'emphasis.mip': 1,
+        'mip.strategy.heuristicfreq': 10,
+        'mip.strategy.rinsheur': 10,
+        'mip.strategy.fpheur': 1,
+        'mip.tolerances.integrality': EPS,
+    },
+    'max-throughput': {
+        'parallel': -1,
+        'threads': 0,
+        'mip.tolerances.mipgap': EPS,
+        'mip.tolerances.absmipgap': EPS,
+        'mip.tolerances.integrality': EPS,
+    },
+}
+
+DEFAULT_SOLVER_PROFILE = 'exact-reproducible'
+
+
+def get_solver_parameters(solver_profile = DEFAULT_SOLVER_PROFILE, exact_tolerances = True):
+    """
+    Parameters
+    ----------
+    solver_profile      name of a profile in SOLVER_PROFILES, or a dictionary of CPLEX parameters (e.g. from load_solver_profile)
+    exact_tolerances    set to False to drop the MIP gap and integrality tolerances from the profile (i.e. use the CPLEX defaults)
+
+    Returns
+    -------
+    dictionary mapping the name of each CPLEX parameter (e.g. 'mip.strategy.heuristicfreq') to its value
+    """
+    if isinstance(solver_profile, dict):
+        parameters = dict(solver_profile)
+    elif solver_profile in SOLVER_PROFILES:
+        parameters = dict(SOLVER_PROFILES[solver_profile])
+    else:
+        raise ValueError('unknown solver profile: %r (should be one of %r)' % (solver_profile, sorted(SOLVER_PROFILES.keys())))
+
+    if not exact_tolerances:
+        for name in TOLERANCE_PARAMETERS:
+            parameters.pop(name, None)
+
+    return parameters
+
+
+def set_solver_parameter(slim_IP, name, value):
+    """
+    sets a CPLEX parameter by its name in slim_IP.parameters (e.g. 'mip.strategy.heuristicfreq')
+    """
+    parameter = slim_IP.parameters
+    for field_name in name.split('.'):
+        parameter = getattr(parameter, field_name)
+    parameter.set(value)
+
+
+def save_solver_profiles(solver_profiles, profile_file):
+    """
+    saves a dictionary that maps the name of each profile (e.g. an instance family) to a dictionary of CPLEX parameters
+    """
+    with open(profile_file, 'w') as fh:
+        json.dump(solver_profiles, fh, indent = 2, sort_keys = True)
+
+
+def load_solver_profile(profile_file, profile_name):
+    """
+    returns the CPLEX parameters of a profile saved with save_solver_profiles (e.g. by tune_slim.py)
+    """
+    with open(profile_file, 'r') as fh:
+        solver_profiles = json.load(fh)
+    if profile_name not in solver_profiles:
+        raise ValueError('%s does not contain a profile for: %s' % (profile_file, profile_name))
+    return {str(name): value for name, value in solver_profiles[profile_name].items()}
@@ -0,0 +1,136 @@
+import numpy as np
+from .data_validation import DEFAULT_CHUNK_SIZE
+
+INTEGRALITY_TOLERANCE = 1e-5
+
+
+def get_variable_columns(names, prefix):
+    """
+    returns the column of X for each variable in names (e.g. [0, 2] for ['alpha_0', 'alpha_2'])
+    """
+    return [int(n[len(prefix):]) for n in names]
+
+
+def verify_slim_solution(values, slim_info, data, tolerance = None, chunk_size = DEFAULT_CHUNK_SIZE):
+    """
+    Checks that a solution of a SLIM IP is consistent with the data without stopping at the first problem,
+    so that it can be used on every incumbent (e.g. for solutions in the solution pool)
+
+    Parameters
+    ----------
+    values          values of all variables in the IP (e.g. slim_IP.solution.get_values())
+    slim_info       dictionary produced by create_slim_ip
+    data            dictionary with the training data used to create the IP (X can be a BitPackedMatrix)
+    tolerance       integer variables are rounded if they are within tolerance of an integer;
+                    defaults to INTEGRALITY_TOLERANCE for IPs with integer loss constraints
+                    (which are solved with the default CPLEX tolerances) and 0.0 otherwise
+    chunk_size      number of rows of X used at a time to compute scores
+
+    Returns
+    -------
+    report          dictionary with the following keys
+                    passed      True if every check passed
+                    checks      dictionary mapping the name of each check to True/False
+                    failures    list of messages for the checks that failed
+                    rho         coefficient vector
+                    total_error number of misclassified points (computed from the data)
+                    l0_norm     number of L0-regularized coefficients that are non-zero
+    """
+    integer_loss_flag = slim_info.get('integer_loss_flag', False)
+    if tolerance is None:
+        tolerance = INTEGRALITY_TOLERANCE if integer_loss_flag else 0.0
+
+    values = np.asarray(values, dtype = np.float)
+    checks = {}
+    failures = []
+
+    def check(name, passed, message):
+        passed = bool(passed)
+        checks[name] = checks.get(name, True) and passed
+        if not passed:
+            failures.append(message)
+
+    check('n_variables', len(values) == slim_info['n_variables'], 'solution should have %d values' % slim_info['n_variables'])
+
+    def get_integer_values(name, idx):
+        x = values[idx]
+        if tolerance > 0.0:
+            rounded_x = np.round(x)
+            check('integrality', np.all(np.abs(x - rounded_x) <= tolerance), '%s should be within %1.1e of an integer' % (name, tolerance))
+            x = rounded_x
+        return x
+
+    # slice the solution once for each group of variables
+    rho = get_integer_values('rho', slim_info['rho_idx']) if integer_loss_flag else values[slim_info['rho_idx']]
+    alpha = get_integer_values('alpha', slim_info['alpha_idx'])
+    beta = values[slim_info['beta_idx']]
+    err = get_integer_values('error', slim_info['error_idx'])
+    total_error, total_error_pos, total_error_neg, total_l0_norm = get_integer_values('auxiliary variables',
+                                                                                      slim_info['total_error_idx'] +
+                                                                                      slim_info['total_error_pos_idx'] +
+                                                                                      slim_info['total_error_neg_idx'] +
+                                                                                      slim_info['total_l0_norm_idx'])
+
+    # coefficient vector
+    check('rho_bounds', np.all(rho <= slim_info['rho_ub']), 'rho exceeds upper bounds')
+    check('rho_bounds', np.all(rho >= slim_info['rho_lb']), 'rho exceeds lower bounds')
+
+    # L0 indicator variables
+    alpha_rho = rho[get_variable_columns(slim_info['alpha_names'], 'alpha_')]
+    check('alpha', np.all((alpha == 0) | (alpha == 1)), 'alpha should be binary')
+    check('alpha', np.all(alpha_rho[alpha == 0] == 0.0), 'alpha = 0 should => that rho == 0')
+    check('alpha', np.all(alpha_rho[alpha == 1] != 0.0), 'alpha = 1 should => that rho != 0')
+
+    # L1 helper variables
+    beta_rho = rho[get_variable_columns(slim_info['beta_names'], 'beta_')]
+    check('beta', np.all(np.abs(np.abs(beta_rho) - beta) <= tolerance), 'beta != abs(rho)')
+
+    # L0-norm bounds
+    l0_norm = np.count_nonzero(rho[slim_info['L0_reg_ind']])
+    check('l0_norm', np.sum(alpha) == l0_norm, 'alpha should := 1[rho != 0]')
+    check('l0_norm', total_l0_norm == l0_norm, 'total_l0_norm should == L0-norm of rho')
+    check('l0_norm', slim_info['L0_min'] <= l0_norm <= slim_info['L0_max'], 'L0-norm of rho should be between L0_min and L0_max')
+
+    # error variables (scores are computed in chunks of rows)
+    X = data['X']
+    Y = np.ravel(data['Y'])
+    M = np.ravel(slim_info['M'])
+    N = X.shape[0]
+    n_wrong_errors = 0
+    n_small_M = 0
+    expected_total_error = 0
+    for start in range(0, N, chunk_size):
+        end = min(start + chunk_size, N)
+        scores = Y[start:end] * X[start:end].dot(rho)
+        if integer_loss_flag:
+            # scores are integer, so a point is misclassified iff score < 1
+            expected_err = scores < slim_info['loss_rhs']
+        else:
+            expected_err = scores <= slim_info['epsilon']
+        n_wrong_errors += np.count_nonzero(err[start:end] != expected_err)
+        n_small_M += np.count_nonzero(-scores > M[start:end])
+        expected_total_error += np.count_nonzero(expected_err)
+
+    check('error', np.all((err == 0) | (err == 1)), 'err should be binary')
+    check('error', n_wrong_errors == 0, 'error vector is not == sign(XY.dot(rho) + epsilon) for %d points' % n_wrong_errors)
+    check('big_M', n_small_M == 0, 'Big M is not big enough for %d points' % n_small_M)
+
+    # aggregate error variables
+    check('total_error', total_error == np.sum(err), 'total_error should == sum(error(i))')
+    check('total_error', total_error == total_error_pos + total_error_neg, 'total_error should == total_error_pos + total_error_neg')
+    check('total_error', total_error_pos == np.sum(err[slim_info['pos_ind']]), 'total_error_pos should == sum(error(i)) for y(i) = +1')
+    check('total_error', total_error_neg == np.sum(err[slim_info['neg_ind']]), 'total_error_neg should == sum(error(i)) for y(i) = -1')
+    check('total_error', total_error <= min(slim_info['N_pos'], slim_info['N_neg']), 'total_error should be less than the error of a trivial model')
+
+    # group constraints
+    for group_name, group_ind in slim_info.get('groups', {}).items():
+        check('groups', np.count_nonzero(rho[group_ind]) <= 1, 'group %s should have at most 1 non-zero coefficient' % group_name)
+
+    return {
+        'passed': len(failures) == 0,
+        'checks': checks,
+        'failures': failures,
+        'rho': rho,
+        'total_error': expected_total_error,
+        'l0_norm': l0_norm,
+    }
@@ -1,82 +1,37 @@
 import os
 import sys
-import numpy as np
+import time
 import argparse
 import logging
-import cplex as cpx
 import pickle
 import json
 
 #add '/models/' directory to search path to avoid import errors
-try:
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-except:
-    sys.path.append(os.getcwd()+'/models')
-
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 import slim as slim
 
-# setup SLIM IP parameters
-parsed = type('test', (), {})()
-parsed.data_file = '/Users/berk/Desktop/Dropbox (MIT)/Research/SLIM/Toolboxes/miplib2017-slim/models/data/breastcancer_processed.csv'
-parsed.instance_file = '/Users/berk/Desktop/Dropbox (MIT)/Research/SLIM/Toolboxes/miplib2017-slim/instances/breastcancer_max_5_features.mps'
-parsed.instance_info = '/Users/berk/Desktop/Dropbox (MIT)/Research/SLIM/Toolboxes/miplib2017-slim/misc/breastcancer_max_5_features.p'
-parsed.timelimit = 60
-
-#load IP file
-slim_IP = cpx.Cplex()
-slim_IP.read(parsed.instance_file)
-
-#load IP information
-with open(parsed.instance_info) as fh:
-    slim_info = pickle.load(fh)
-
-#solve IP file using CPLEX
-slim_IP.parameters.randomseed.set(0)
-slim_IP.parameters.output.clonelog.set(0)
-slim_IP.parameters.threads.set(1)
-slim_IP.parameters.parallel.set(1)
-slim_IP.parameters.mip.tolerances.mipgap.set(np.finfo(np.float).eps)
-slim_IP.parameters.mip.tolerances.absmipgap.set(np.finfo(np.float).eps)
-slim_IP.parameters.mip.tolerances.integrality.set(np.finfo(np.float).eps)
-if parsed.timelimit < 0:
-    slim_IP.parameters.timelimit.set(1e75)
-else:
-    slim_IP.parameters.timelimit.set(min(parsed.timelimit, 1e75))
-
-# solve SLIM IP
-slim_IP.solve()
-
-# run quick and dirty tests to make sure that IP output is correct
-data = slim.load_data_from_csv(parsed.data_file)
-slim.check_slim_ip_solution(slim_IP, slim_info, data)
-
-# get model results
-slim_results = slim.get_slim_summary(slim_IP, slim_info, data)
-print(slim_results)
-
-# print model output to screen
-print(slim_results['rho'])
-print 'error_rate: %1.2f%%' % (100*slim_results['error_rate'])
-print 'TPR: %1.2f%%' % (100*slim_results['true_positive_rate'])
-print 'FPR: %1.2f%%' % (100*slim_results['false_positive_rate'])
-print 'true_positives: %d' % slim_results['true_positives']
-print 'false_positives: %d' % slim_results['false_positives']
-print 'true_negatives: %d' % slim_results['true_negatives']
-print 'false_negatives: %d' % slim_results['false_negatives']
-
-# print model output to JSON
-# TODO
-
-# parsing
+# parse command line arguments
 def setup_parser():
     """
-    Create an argparse Parser object for command line arguments to create_slim_instance.
+    Create an argparse Parser object for command line arguments to solve_slim_instance.
     This object determines all command line arguments, handles input
     validation and default values.
 
     See https://docs.python.org/3/library/argparse.html for configuration
     """
 
+    def is_positive_integer(value):
+        parsed_value = int(value)
+        if parsed_value <= 0:
+            raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+        return parsed_value
+
+    def is_positive_float_or_negative_one(value):
+        parsed_value = float(value)
+        if not (parsed_value == -1 or parsed_value > 0.0):
+            raise argparse.ArgumentTypeError("%s is an invalid value (must be -1 or > 0.00)" % value)
+        return parsed_value
+
     def is_positive_integer_or_negative_one(value):
         parsed_value = int(value)
         if not (parsed_value == -1 or parsed_value >= 1):
@@ -100,31 +55,120 @@ def setup_parser():
         return is_file_on_disk(file_choices(choices, file_name))
 
     parser = argparse.ArgumentParser(
-        prog='create_slim_instance',
-        description='Create a SLIM IP instance and save it as .mps file from the command shell',
+        prog='solve_slim_instance',
+        description='Build a SLIM IP from training data and solve it in memory from the command shell',
         epilog='Copyright (C) 2017 Berk Ustun',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
 
     parser.add_argument('--data_file',
-                        type=lambda s: is_file_of_type_on_disk("csv", s),
+                        type=lambda s: is_file_of_type_on_disk(["csv", "npz", "parquet", "feather"], s),
                         required=True,
-                        help='csv file with training data')
+                        help='csv, npz, parquet or feather file with training data')
+
+    parser.add_argument('--feature_names',
+                        type=lambda s: s.split(','),
+                        help='comma-separated names of the features to use; only these columns are read from data_file')
+
+    parser.add_argument('--results_file',
+                        type=lambda s: file_choices("json", s),
+                        help='name of the file to save the solution summary (must end in .json)')
+
+    parser.add_argument('--scorer_file',
+                        type=lambda s: file_choices("json", s),
+                        help='name of the file to save the model as a standalone scorer (must end in .json; see slim.load_scorer)')
 
     parser.add_argument('--instance_file',
                         type=lambda s: file_choices("mps", s),
-                        required=True,
-                        help='name of instance file (must end in .mps)')
+                        help='name of file to save the IP that was solved (must end in .mps)')
 
     parser.add_argument('--instance_info',
                         type=lambda s: file_choices("p", s),
-                        help='name of instance information file (must be .p)')
+                        help='name of file to save the IP information (must end in .p)')
+
+    parser.add_argument('--max_size',
+                        type = is_positive_integer_or_negative_one,
+                        default=-1,
+                        help='maximum number of non-zero coefficients; set as -1 for no limit')
+
+    parser.add_argument('--max_coef',
+                        type=is_positive_integer,
+                        default=10,
+                        help='value of upper and lower bounds for any coefficient')
+
+    parser.add_argument('--max_offset',
+                        type=is_positive_integer_or_negative_one,
+                        default=-1,
+                        help='value of upper and lower bound on offset parameter; set as -1 to use a conservative value')
+
+    parser.add_argument('--c0_value',
+                        type=is_positive_float_or_negative_one,
+                        default=-1,
+                        help='l0 regularization parameter; set as a positive float > 0.00; or -1 for smallest value')
+
+    parser.add_argument('--coef_constraints_file',
+                        type=lambda s: is_file_of_type_on_disk("npz", s),
+                        help='npz file with coefficient constraints saved by CoefficientSet.save; overrides max_coef and max_offset')
+
+    parser.add_argument('--reduce_features',
+                        action='store_true',
+                        help='remove constant, duplicate and complementary columns before building the IP (models are still reported in terms of the original variables)')
+
+    parser.add_argument('--integer_loss',
+                        action='store_true',
+                        help='use integer loss constraints (and default CPLEX tolerances) when the data and coefficients are integer')
+
+    parser.add_argument('--group_constraints',
+                        choices=['none', 'sos1', 'linear'],
+                        default='none',
+                        help='restrict the levels of each one-hot encoded categorical feature to at most 1 non-zero coefficient, using SOS1 sets or linear constraints')
 
     parser.add_argument('--timelimit',
                         type=is_positive_integer_or_negative_one,
                         default=300,
                         help='time limit on training (in seconds); set as -1 for no time limit')
 
+    parser.add_argument('--threads',
+                        type=is_positive_integer,
+                        default=1,
+                        help='number of threads used by CPLEX')
+
+    parser.add_argument('--random_seed',
+                        type=int,
+                        default=0,
+                        help='random seed used by CPLEX')
+
+    parser.add_argument('--solver_profile',
+                        type=str,
+                        default=slim.DEFAULT_SOLVER_PROFILE,
+                        help='CPLEX parameter profile (%s), or the name of a profile in solver_profile_file' % ', '.join(sorted(slim.SOLVER_PROFILES.keys())))
+
+    parser.add_argument('--solver_profile_file',
+                        type=lambda s: is_file_of_type_on_disk("json", s),
+                        help='file with tuned CPLEX parameter profiles produced by tune_slim.py')
+
+    parser.add_argument('--checkpoint_file',
+                        type=lambda s: file_choices("json", s),
+                        help='name of file to save the incumbent, best bound and elapsed time during the solve (must end in .json)')
+
+    parser.add_argument('--checkpoint_interval',
+                        type=float,
+                        default=60.0,
+                        help='minimum time between checkpoints (in seconds)')
+
+    parser.add_argument('--resume',
+                        action='store_true',
+                        help='continue from the incumbent in checkpoint_file (if it exists) within the time that is left from timelimit')
+
+    parser.add_argument('--progress_file',
+                        type=lambda s: file_choices("json", s),
+                        help='name of file to save the incumbent, bound, gap, nodes and iterations over time (must end in .json)')
+
+    parser.add_argument('--progress_interval',
+                        type=float,
+                        default=1.0,
+                        help='minimum time between progress samples (in seconds)')
+
     parser.add_argument('--log',
                         type=str,
                         help='name of the log file')
@@ -135,6 +179,97 @@ def setup_parser():
 
     return parser
 
+# build and solve instance
+def solve_slim_instance(data, slim_settings = None, coef_constraints = None, reduce_features = False, group_constraints = 'none',
+                        timelimit = 300, threads = 1, random_seed = 0, solver_profile = slim.DEFAULT_SOLVER_PROFILE, check_solution = True,
+                        checkpoint_file = None, checkpoint_interval = 60.0, resume = False,
+                        progress_file = None, progress_interval = 1.0, logger = None):
+    """
+    builds a SLIM IP for data and solves it in the same process
+
+    Parameters
+    ----------
+    data                dictionary produced by load_data_from_file
+    slim_settings       dictionary of keyword arguments for get_slim_input (max_coef, c0_value, max_size, max_offset, integer_loss)
+    coef_constraints    CoefficientSet to use as is (e.g. from CoefficientSet.load)
+    reduce_features     set to True to remove redundant columns before building the IP (see reduce_features)
+    group_constraints   'none', 'sos1' or 'linear'; how to restrict one-hot encoded features (see get_one_hot_groups)
+    timelimit           time limit on training (in seconds); set as -1 for no time limit
+    threads             number of threads used by CPLEX
+    random_seed         random seed used by CPLEX
+    solver_profile      name of a profile in slim.SOLVER_PROFILES or a dictionary of CPLEX parameters (see set_slim_ip_parameters)
+    check_solution      set to True to run check_slim_ip_solution on the solution
+    checkpoint_file     name of a JSON file to save the incumbent during the solve (see CheckpointWriter)
+    checkpoint_interval minimum time between checkpoints (in seconds)
+    resume              set to True to continue from the incumbent in checkpoint_file within the remaining time limit
+    progress_file       name of a JSON file to save the progress of the solve over time (see ProgressRecorder)
+    progress_interval   minimum time between progress samples (in seconds)
+    logger              logging.Logger object
+
+    Returns
+    -------
+    slim_IP             solved cplex.Cplex object
+    slim_info           dictionary produced by create_slim_ip
+    slim_results        dictionary produced by get_slim_summary with build_time (preparing the input and creating the IP)
+                        and solve_time (in seconds)
+    """
+    log = logger.info if logger is not None else lambda msg: None
+
+    start_time = time.time()
+
+    feature_map = None
+    if reduce_features:
+        # constant columns are only folded into the intercept if they fit within its bounds
+        offset_settings = {k: v for k, v in (slim_settings or {}).items() if k in ('max_coef', 'max_offset')}
+        intercept_bounds = slim.get_intercept_bounds(data, coef_constraints, **offset_settings)
+        data, feature_map = slim.reduce_features(data, intercept_bounds = intercept_bounds)
+        log("reduced data from %d to %d columns" % (len(feature_map['variable_names']), len(feature_map['kept_ind'])))
+        if coef_constraints is not None:
+            # drop the constraints of the removed columns
+            coef_constraints = coef_constraints.subset(data['variable_names'])
+
+    slim_input = slim.get_slim_input(data, coef_constraints = coef_constraints, **(slim_settings or {}))
+    if feature_map is not None:
+        slim_input['feature_map'] = feature_map
+
+    if group_constraints != 'none':
+        if len(slim_input['coef_constraints'].groups) == 0:
+            groups = slim.get_one_hot_groups(data)
+            for group_name in sorted(groups.keys()):
+                slim_input['coef_constraints'].add_group(group_name, groups[group_name])
+            log("added %d feature groups" % len(groups))
+        slim_input['group_constraint_type'] = group_constraints
+
+    # check the data once and reuse the summary in create_slim_ip (e.g. binary_data_flag) instead of scanning X again
+    slim_input['data_summary'] = slim.check_data(data, return_summary = True)
+    log("checked data: %d rows (%d duplicates), %d columns" %
+        (slim_input['data_summary']['N'], slim_input['data_summary']['n_duplicate_rows'], slim_input['data_summary']['P']))
+
+    build_time = time.time() - start_time
+
+    slim_IP, slim_info, slim_results = slim.train_slim(data,
+                                                       slim_input = slim_input,
+                                                       timelimit = timelimit,
+                                                       threads = threads,
+                                                       random_seed = random_seed,
+                                                       solver_profile = solver_profile,
+                                                       check_solution = check_solution,
+                                                       checkpoint_file = checkpoint_file,
+                                                       checkpoint_interval = checkpoint_interval,
+                                                       resume = resume,
+                                                       progress_file = progress_file,
+                                                       progress_interval = progress_interval)
+    if slim_results['resumed_from_checkpoint']:
+        log("resumed from checkpoint: %s" % checkpoint_file)
+
+    # create_slim_ip runs inside train_slim, so its time counts towards building rather than solving
+    build_time += slim_info['stage_times']['total_wall_time']
+    slim_results['build_time'] = build_time
+    log("built SLIM IP in %1.2f seconds" % build_time)
+    slim_results['solve_time'] = time.time() - start_time - build_time
+    log("solved SLIM IP in %1.2f seconds (status: %s)" % (slim_results['solve_time'], slim_results['solution_status']))
+    return slim_IP, slim_info, slim_results
+
 if __name__ == '__main__':
 
     parser = setup_parser()
@@ -147,25 +282,75 @@ if __name__ == '__main__':
     logger = logging.getLogger()
     logger = slim.setup_logging(logger, log_to_console=(not parsed.silent), log_file=parsed.log)
     logger.setLevel(logging.INFO)
-    logger.info("running 'create_slim_instance.py'")
-    logger.info("working directory: %r" % os.getcwd())
-    logger.info("parsed the following variables:\n-%s" % '-'.join(parsed_string))
-
-    logger.info("creating SLIM IP")
-    slim_IP, slim_info = solve_slim_instance(data_file=parsed.data_file,
-                                              max_coef=parsed.max_coef,
-                                              max_size=parsed.max_size,
-                                              max_offset=parsed.max_offset,
-                                              c0_value=parsed.c0_value,
-                                              logger=logger)
-    logger.info("finished creating SLIM IP")
-
-    logger.info("saving SLIM IP to disk")
-    slim_IP.write(parsed.instance_file)
-    logger.info("saved SLIM IP to file: %s" % parsed.instance_file)
+    logger.info("running 'solve_slim_instance.py'")
+    logger.info("current working directory: %r" % os.getcwd())
+    logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
+
+    data = slim.load_data_from_file(parsed.data_file, feature_names=parsed.feature_names)
+    logger.info("loaded data with %d samples and %d features" % data['X'].shape)
+
+    coef_constraints = None
+    if parsed.coef_constraints_file is not None:
+        coef_constraints = slim.CoefficientSet.load(parsed.coef_constraints_file)
+        logger.info("loaded coefficient constraints from file: %s" % parsed.coef_constraints_file)
+
+    solver_profile = parsed.solver_profile
+    if parsed.solver_profile_file is not None:
+        solver_profile = slim.load_solver_profile(parsed.solver_profile_file, parsed.solver_profile)
+        logger.info("loaded solver profile %s from file: %s" % (parsed.solver_profile, parsed.solver_profile_file))
+    elif solver_profile not in slim.SOLVER_PROFILES:
+        parser.error("unknown solver profile: %s" % solver_profile)
+
+    slim_settings = {
+        'max_coef': parsed.max_coef,
+        'max_size': parsed.max_size,
+        'max_offset': parsed.max_offset,
+        'c0_value': parsed.c0_value,
+        'integer_loss': parsed.integer_loss,
+    }
+
+    slim_IP, slim_info, slim_results = solve_slim_instance(data,
+                                                           slim_settings=slim_settings,
+                                                           coef_constraints=coef_constraints,
+                                                           reduce_features=parsed.reduce_features,
+                                                           group_constraints=parsed.group_constraints,
+                                                           timelimit=parsed.timelimit,
+                                                           threads=parsed.threads,
+                                                           random_seed=parsed.random_seed,
+                                                           solver_profile=solver_profile,
+                                                           checkpoint_file=parsed.checkpoint_file,
+                                                           checkpoint_interval=parsed.checkpoint_interval,
+                                                           resume=parsed.resume,
+                                                           progress_file=parsed.progress_file,
+                                                           progress_interval=parsed.progress_interval,
+                                                           logger=logger)
+
+    logger.info("model:\n%s" % str(slim_results['pretty_model']))
+    logger.info("error_rate: %1.2f%%" % (100 * slim_results['error_rate']))
+    logger.info("TPR: %1.2f%%" % (100 * slim_results['true_positive_rate']))
+    logger.info("FPR: %1.2f%%" % (100 * slim_results['false_positive_rate']))
+
+    if parsed.scorer_file is not None:
+        scorer = slim.export_scorer(slim_results['rho'], data['variable_names'], outcome_name=data['outcome_name'])
+        scorer.save(parsed.scorer_file)
+        logger.info("saved scorer to file: %s" % parsed.scorer_file)
+
+    if parsed.instance_file is not None:
+        slim_IP.write(parsed.instance_file)
+        logger.info("saved SLIM IP to file: %s" % parsed.instance_file)
+
+    if parsed.instance_info is not None:
+        with open(parsed.instance_info, 'w') as fh:
+            pickle.dump(slim_info, fh)
+        logger.info("saved SLIM IP information to file: %s" % parsed.instance_info)
+
+    if parsed.results_file is not None:
+        slim_results['pretty_model'] = str(slim_results['pretty_model'])
+        slim_results['settings'] = slim_settings
+        slim_results['solver_profile'] = solver_profile
+        with open(parsed.results_file, 'w') as fh:
+            json.dump(slim.to_json_compatible(slim_results), fh, indent=2)
+        logger.info("saved results to file: %s" % parsed.results_file)
 
     logger.info("quitting")
     sys.exit(0)
-
-
-
@@ -0,0 +1,243 @@
+import os
+import sys
+import time
+import json
+import random
+import argparse
+import logging
+
+#add '/models/' directory to search path to avoid import errors
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import slim as slim
+from benchmark_slim import PROBLEM_TYPES, get_benchmark_datasets, run_benchmarks
+
+# values of each CPLEX parameter that are searched after the named profiles in slim.SOLVER_PROFILES
+TUNING_SPACE = {
+    'parallel': [-1, 1],
+    'emphasis.mip': [0, 1, 2, 3],
+    'mip.strategy.heuristicfreq': [-1, 0, 10, 50],
+    'mip.strategy.rinsheur': [-1, 0, 10, 50],
+    'mip.strategy.probe': [-1, 0, 1, 2, 3],
+    'mip.strategy.variableselect': [-1, 0, 3, 4],
+    'mip.cuts.mircut': [-1, 0, 1, 2],
+}
+
+# a run with a gap below this value counts as solved to optimality
+OPTIMALITY_GAP = 1e-6
+
+
+# parse command line arguments
+def setup_parser():
+    """
+    Create an argparse Parser object for command line arguments to tune_slim.
+    This object determines all command line arguments, handles input
+    validation and default values.
+
+    See https://docs.python.org/3/library/argparse.html for configuration
+    """
+
+    def is_positive_integer(value):
+        parsed_value = int(value)
+        if parsed_value <= 0:
+            raise argparse.ArgumentTypeError("%s is an invalid positive int value" % value)
+        return parsed_value
+
+    def file_choices(choices, file_name):
+        ext = os.path.splitext(file_name)[1][1:]
+        if ext not in choices:
+            parser.error("file doesn't end with one of {}".format(choices))
+        return file_name
+
+    parser = argparse.ArgumentParser(
+        prog='tune_slim',
+        description='Search CPLEX parameters for each problem type over the bundled datasets within a time budget, and save the best profile for each',
+        epilog='Copyright (C) 2017 Berk Ustun',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--profile_file',
+                        type=lambda s: file_choices("json", s),
+                        required=True,
+                        help='name of the file to save the best profile for each problem type (use with solve_slim_instance.py --solver_profile_file)')
+
+    parser.add_argument('--results_file',
+                        type=lambda s: file_choices("json", s),
+                        help='name of the file to save the results of every trial')
+
+    parser.add_argument('--datasets',
+                        type=lambda s: s.split(','),
+                        help='comma-separated names of the datasets to run; defaults to every dataset in models/data')
+
+    parser.add_argument('--problem_types',
+                        type=lambda s: s.split(','),
+                        default=sorted(PROBLEM_TYPES.keys()),
+                        help='comma-separated names of the problem types (instance families) to tune (%s)' % ', '.join(sorted(PROBLEM_TYPES.keys())))
+
+    parser.add_argument('--time_budget',
+                        type=is_positive_integer,
+                        default=3600,
+                        help='total time for tuning (in seconds), split evenly between problem types')
+
+    parser.add_argument('--timelimit',
+                        type=is_positive_integer,
+                        default=60,
+                        help='time limit on each solve (in seconds)')
+
+    parser.add_argument('--threads',
+                        type=is_positive_integer,
+                        default=1,
+                        help='number of threads used by CPLEX (unless a profile sets threads)')
+
+    parser.add_argument('--random_seed',
+                        type=int,
+                        default=0,
+                        help='random seed used by CPLEX and to sample parameters')
+
+    parser.add_argument('--log',
+                        type=str,
+                        help='name of the log file')
+
+    parser.add_argument('--silent',
+                        action='store_true',
+                        help='flag to suppress logging to stderr')
+
+    return parser
+
+
+# tuning
+def get_run_cost(result, timelimit):
+    """
+    returns the cost of one solve (lower is better):
+    - solve_time / timelimit (in [0, 1]) if the solve proved optimality
+    - 1 + final_gap if the solve found an incumbent but did not prove optimality
+    - 3 if the solve did not find an incumbent
+    """
+    if result['final_gap'] is None or result['final_gap'] != result['final_gap']:
+        return 3.0
+    if result['final_gap'] <= OPTIMALITY_GAP:
+        return min(result['solve_time'] / float(timelimit), 1.0)
+    return 1.0 + min(result['final_gap'], 1.0)
+
+
+def get_candidate_profiles(random_seed = 0):
+    """
+    yields (name, parameters) for the named profiles in slim.SOLVER_PROFILES, and then for random settings of
+    the parameters in TUNING_SPACE (on top of the exact-reproducible profile, so that the tolerances do not change)
+    """
+    for name in sorted(slim.SOLVER_PROFILES.keys()):
+        yield name, slim.get_solver_parameters(name)
+
+    rng = random.Random(random_seed)
+    base_parameters = slim.get_solver_parameters(slim.DEFAULT_SOLVER_PROFILE)
+    n_settings = 1
+    for values in TUNING_SPACE.values():
+        n_settings *= len(values)
+
+    seen = set()
+    while len(seen) < n_settings:
+        parameters = dict(base_parameters)
+        for name in sorted(TUNING_SPACE.keys()):
+            parameters[name] = rng.choice(TUNING_SPACE[name])
+        key = tuple(sorted(parameters.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield 'random_%d' % len(seen), parameters
+
+
+def tune_solver_profiles(datasets, problem_types, time_budget = 3600, timelimit = 60, threads = 1, random_seed = 0, logger = None):
+    """
+    Evaluates candidate profiles (see get_candidate_profiles) on every dataset for each problem type with run_benchmarks,
+    until the time budget for the problem type runs out. Each candidate is scored by the mean of get_run_cost over datasets.
+
+    Returns
+    -------
+    profiles        dictionary mapping each problem type to the parameters of its best candidate
+    trials          list with the name, parameters, cost and results of every candidate that was evaluated
+    """
+    log = logger.info if logger is not None else (lambda msg: None)
+    family_budget = float(time_budget) / len(problem_types)
+
+    profiles = {}
+    trials = []
+    for problem_type in problem_types:
+        start_time = time.time()
+        family_trials = []
+        for name, parameters in get_candidate_profiles(random_seed):
+            # stop if another candidate could exceed the budget (every problem type evaluates at least one candidate)
+            elapsed_time = time.time() - start_time
+            if len(family_trials) > 0 and elapsed_time + timelimit * len(datasets) > family_budget:
+                break
+
+            benchmark = run_benchmarks(datasets, [problem_type],
+                                       timelimit=timelimit,
+                                       threads=threads,
+                                       random_seed=random_seed,
+                                       solver_profile=parameters)
+
+            costs = [get_run_cost(r, timelimit) for r in benchmark['results']]
+            trial = {
+                'problem_type': problem_type,
+                'name': name,
+                'parameters': parameters,
+                'cost': sum(costs) / len(costs),
+                'results': benchmark['results'],
+            }
+            family_trials.append(trial)
+            log("%s: %s has cost %1.4f (best so far: %1.4f)" % (problem_type, name, trial['cost'], min(t['cost'] for t in family_trials)))
+
+        best_trial = min(family_trials, key=lambda t: t['cost'])
+        profiles[problem_type] = best_trial['parameters']
+        log("%s: best profile is %s with cost %1.4f (%d candidates)" % (problem_type, best_trial['name'], best_trial['cost'], len(family_trials)))
+        trials.extend(family_trials)
+
+    return profiles, trials
+
+
+if __name__ == '__main__':
+
+    parser = setup_parser()
+    parsed = parser.parse_args()
+    parsed_dict = vars(parsed)
+    parsed_string = [key + ' : ' + str(parsed_dict[key]) + '\n' for key in parsed_dict]
+    parsed_string.sort()
+
+    # setup logging
+    logger = logging.getLogger()
+    logger = slim.setup_logging(logger, log_to_console=(not parsed.silent), log_file=parsed.log)
+    logger.setLevel(logging.INFO)
+    logger.info("running 'tune_slim.py'")
+    logger.info("current working directory: %r" % os.getcwd())
+    logger.info("parsed command line arguments:\n-%s" % '-'.join(parsed_string))
+
+    # per-stage timings are recorded in the results; do not log them for every run
+    logging.getLogger(slim.STAGE_LOGGER_NAME).setLevel(logging.WARNING)
+
+    datasets = get_benchmark_datasets()
+    if parsed.datasets is not None:
+        unknown_datasets = [d for d in parsed.datasets if d not in datasets]
+        if len(unknown_datasets) > 0:
+            parser.error("unknown datasets: %s" % ', '.join(unknown_datasets))
+        datasets = {d: datasets[d] for d in parsed.datasets}
+
+    unknown_problem_types = [p for p in parsed.problem_types if p not in PROBLEM_TYPES]
+    if len(unknown_problem_types) > 0:
+        parser.error("unknown problem types: %s" % ', '.join(unknown_problem_types))
+
+    profiles, trials = tune_solver_profiles(datasets, parsed.problem_types,
+                                            time_budget=parsed.time_budget,
+                                            timelimit=parsed.timelimit,
+                                            threads=parsed.threads,
+                                            random_seed=parsed.random_seed,
+                                            logger=logger)
+
+    slim.save_solver_profiles(profiles, parsed.profile_file)
+    logger.info("saved solver profiles to file: %s" % parsed.profile_file)
+
+    if parsed.results_file is not None:
+        with open(parsed.results_file, 'w') as fh:
+            json.dump(slim.to_json_compatible({'profiles': profiles, 'trials': trials}), fh, indent=2, sort_keys=True)
+        logger.info("saved tuning results to file: %s" % parsed.results_file)
+
+    logger.info("quitting")
+    sys.exit(0)